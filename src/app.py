@@ -1,14 +1,36 @@
 # src/app.py
 
 import streamlit as st
-import json
 import logging
-import asyncio
-from datetime import datetime
-from typing import Dict, List, Any
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 import pandas as pd
-from config import TWEETS_FILE
+from config import (
+    TWEETS_FILE,
+    LOAD_BATCH_SIZE,
+    LOAD_BUFFER_LIMIT_MB,
+    USE_CORPUS_SNAPSHOT,
+    SNAPSHOT_DIR,
+    SESSION_RESULTS_MAX_ENTRIES,
+    ANALYSIS_CONFIRM_REQUESTS,
+    PARALLEL_SEARCH_MIN_TWEETS,
+    SEARCH_SHARDS,
+    SHARD_SERVERS,
+    INGEST_FILE
+)
+from async_runtime import CallbackRelay, get_runtime
+from corpus_loader import load_corpus, ProgressCallback
+from corpus_snapshot import default_snapshot_path, open_corpus
 from gpt_analyzer import GPTAnalyzer
+from parallel_search import ParallelSearch
+from search_engine import SearchEngine
+from search_index import InvertedIndex
+from segments import JsonlFollower, SegmentedCorpus
+from tweet_store import TweetStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,62 +39,97 @@ logger = logging.getLogger(__name__)
 class TweetData:
     """Class to manage tweet data loading and basic operations."""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, progress: Optional[ProgressCallback] = None):
         """Initialize with tweets data file."""
-        self.tweets = self._load_tweets(file_path)
+        self._use(*self._load_tweets(file_path, progress))
+    
+    @classmethod
+    def from_tweets(cls, tweets: List[Dict]) -> 'TweetData':
+        """Wrap tweets already in memory, e.g. matches fetched from shard servers."""
+        tweet_data = cls.__new__(cls)
+        store = TweetStore.from_tweets(tweets)
+        tweet_data._use(store, InvertedIndex(store))
+        return tweet_data
+    
+    def _use(self, store: TweetStore, index: InvertedIndex):
+        self.store, self.index = store, index
         self.authors = self._get_unique_authors()
+        self._known_authors = set(self.authors)
+        # Loaded tweets plus tweets added later
+        self.corpus = SegmentedCorpus(SearchEngine(self.store, self.index))
         
-    def _load_tweets(self, file_path: str) -> List[Dict]:
-        """Load tweets from JSON file."""
+    @property
+    def tweets(self) -> Sequence[Dict]:
+        """Loaded and added tweets as a sequence of dictionaries, built lazily per row."""
+        return self.corpus.tweets
+    
+    def append(self, tweets: List[Dict]) -> int:
+        """Add new tweets (or new versions of known tweets), searchable right away."""
+        count = self.corpus.append(tweets)
+        new_authors = {str(tweet.get('author_id', '')) for tweet in tweets} - self._known_authors
+        if new_authors:
+            self._known_authors |= new_authors
+            self.authors = sorted(self._known_authors)
+        return count
+    
+    def delete(self, tweet_ids: List[str]) -> int:
+        """Delete tweets by id."""
+        return self.corpus.delete(tweet_ids)
+        
+    def _load_tweets(self, 
+                     file_path: str, 
+                     progress: Optional[ProgressCallback] = None) -> Tuple[TweetStore, InvertedIndex]:
+        """Open tweets snapshot, or stream JSON or JSONL file into the store and index."""
         try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
+            if USE_CORPUS_SNAPSHOT:
+                return open_corpus(
+                    file_path,
+                    SNAPSHOT_DIR,
+                    batch_size=LOAD_BATCH_SIZE,
+                    buffer_limit_mb=LOAD_BUFFER_LIMIT_MB,
+                    progress=progress
+                )
+            return load_corpus(
+                file_path,
+                batch_size=LOAD_BATCH_SIZE,
+                buffer_limit_mb=LOAD_BUFFER_LIMIT_MB,
+                progress=progress
+            )
         except Exception as e:
             logger.error(f"Error loading tweets: {e}")
-            return []
+            store = TweetStore.from_tweets([])
+            return store, InvertedIndex(store)
             
     def _get_unique_authors(self) -> List[str]:
         """Get list of unique authors from tweets."""
-        return sorted(list(set(tweet['author_id'] for tweet in self.tweets)))
+        return list(self.store.authors)
 
     def get_author_tweets(self, author_id: str) -> List[Dict]:
         """Get all tweets from specific author."""
-        return [tweet for tweet in self.tweets if tweet['author_id'] == author_id]
+        return self.corpus.author_tweets(author_id)
+
+    def get_author_statistics(self, 
+                              author_id: str,
+                              date_from: Optional[date] = None,
+                              date_to: Optional[date] = None,
+                              min_engagement: int = 0,
+                              sort_by: str = 'engagement') -> Dict:
+        """Calculate statistics for tweets of an author from the engagement rollups."""
+        return self.corpus.author_statistics(
+            author_id,
+            date_from=date_from,
+            date_to=date_to,
+            min_engagement=min_engagement,
+            sort_by=sort_by,
+            top_n=5
+        )
 
     def get_tweet_statistics(self, tweets: List[Dict]) -> Dict:
         """Calculate statistics for given tweets."""
-        if not tweets:
-            return {
-                "total_tweets": 0,
-                "total_engagement": 0,
-                "avg_engagement": 0,
-                "top_tweets": []
-            }
-            
-        return {
-            "total_tweets": len(tweets),
-            "total_engagement": sum(
-                tweet['metrics']['retweet_count'] + 
-                tweet['metrics']['reply_count'] + 
-                tweet['metrics']['like_count']
-                for tweet in tweets
-            ),
-            "avg_engagement": sum(
-                tweet['metrics']['retweet_count'] + 
-                tweet['metrics']['reply_count'] + 
-                tweet['metrics']['like_count']
-                for tweet in tweets
-            ) / len(tweets),
-            "top_tweets": sorted(
-                tweets,
-                key=lambda x: (
-                    x['metrics']['retweet_count'] + 
-                    x['metrics']['reply_count'] + 
-                    x['metrics']['like_count']
-                ),
-                reverse=True
-            )[:5]
-        }
+        store = TweetStore.from_tweets(tweets)
+        stats = store.statistics(store.all_rows(), top_n=5)
+        stats['top_tweets'] = [tweets[row] for row in stats.pop('top_rows')]
+        return stats
 
 def create_search_interface():
     """Create and return search interface elements."""
@@ -113,29 +170,33 @@ def create_search_interface():
         
     return search_query, filters
 
+def show_search_match(match: Dict):
+    """Display a single search result."""
+    with st.container():
+        st.markdown(f"**@{match['author_id']}**")
+        st.markdown(match['text'])
+        
+        # Show relevance and explanation if available
+        if 'relevance_score' in match:
+            st.markdown(f"*Relevance Score:* {match['relevance_score']:.2f}")
+        if 'relevance_explanation' in match:
+            st.markdown(f"*Why relevant:* {match['relevance_explanation']}")
+        
+        # Show metrics
+        st.markdown(f"""
+            *Posted on: {match['created_at']}* | 
+            💬 {match['metrics']['reply_count']} | 
+            🔄 {match['metrics']['retweet_count']} | 
+            ❤️ {match['metrics']['like_count']}
+        """)
+        st.markdown("---")
+
 def show_search_results(matches: List[Dict]):
     """Display search results."""
     st.markdown(f"### Found {len(matches)} matching tweets")
     
     for match in matches:
-        with st.container():
-            st.markdown(f"**@{match['author_id']}**")
-            st.markdown(match['text'])
-            
-            # Show relevance and explanation if available
-            if 'relevance_score' in match:
-                st.markdown(f"*Relevance Score:* {match['relevance_score']:.2f}")
-            if 'relevance_explanation' in match:
-                st.markdown(f"*Why relevant:* {match['relevance_explanation']}")
-            
-            # Show metrics
-            st.markdown(f"""
-                *Posted on: {match['created_at']}* | 
-                💬 {match['metrics']['reply_count']} | 
-                🔄 {match['metrics']['retweet_count']} | 
-                ❤️ {match['metrics']['like_count']}
-            """)
-            st.markdown("---")
+        show_search_match(match)
 
 def show_content_analysis(analysis: Dict):
     col1, col2 = st.columns(2)
@@ -194,7 +255,7 @@ def show_content_analysis(analysis: Dict):
                 st.markdown(f"*Importance:* {discussion['importance']}/10")
                 st.markdown("---")
 
-def show_statistics(tweet_data: TweetData, tweets: List[Dict]):
+def show_statistics(tweet_data: TweetData):
     with st.sidebar:
         st.header("Author Statistics Filters")
         
@@ -222,12 +283,10 @@ def show_statistics(tweet_data: TweetData, tweets: List[Dict]):
         
         # Варіанти сортування
         sort_options = {
-            "Total Engagement": lambda t: (t['metrics']['retweet_count'] + 
-                                           t['metrics']['reply_count'] + 
-                                           t['metrics']['like_count']),
-            "Retweets": lambda t: t['metrics']['retweet_count'],
-            "Likes": lambda t: t['metrics']['like_count'],
-            "Replies": lambda t: t['metrics']['reply_count']
+            "Total Engagement": 'engagement',
+            "Retweets": 'retweet_count',
+            "Likes": 'like_count',
+            "Replies": 'reply_count'
         }
         
         # Вибір сортування
@@ -246,34 +305,19 @@ def show_statistics(tweet_data: TweetData, tweets: List[Dict]):
     
     # Фільтрація твітів
     if apply_filters or selected_author:
-        # Фільтр по автору
-        author_tweets = [t for t in tweets if t['author_id'] == selected_author]
-        
         # Фільтр по даті
+        date_from = date_to = None
         if date_range and len(date_range) == 2:
-            start_date, end_date = date_range
-            author_tweets = [
-                t for t in author_tweets 
-                if start_date <= datetime.strptime(t['created_at'], '%Y-%m-%dT%H:%M:%S').date() <= end_date
-            ]
-        
-        # Фільтр по залученості
-        author_tweets = [
-            t for t in author_tweets
-            if (t['metrics']['retweet_count'] + 
-                t['metrics']['reply_count'] + 
-                t['metrics']['like_count']) >= min_engagement
-        ]
-        
-        # Сортування
-        author_tweets = sorted(
-            author_tweets, 
-            key=sort_options[sort_by], 
-            reverse=True
-        )
+            date_from, date_to = date_range
         
-        # Розрахунок статистики
-        stats = tweet_data.get_tweet_statistics(author_tweets)
+        # Розрахунок статистики з rollups знайдених твітів автора
+        stats = tweet_data.get_author_statistics(
+            selected_author,
+            date_from=date_from,
+            date_to=date_to,
+            min_engagement=min_engagement,
+            sort_by=sort_options[sort_by]
+        )
         
         # Виведення статистики
         col1, col2 = st.columns(2)
@@ -283,6 +327,11 @@ def show_statistics(tweet_data: TweetData, tweets: List[Dict]):
             st.markdown(f"**Total Tweets:** {stats['total_tweets']}")
             st.markdown(f"**Total Engagement:** {stats['total_engagement']}")
             st.markdown(f"**Average Engagement:** {stats['avg_engagement']:.2f}")
+            metric_totals = stats['metric_totals']
+            st.markdown(
+                f"**Retweets / Replies / Likes:** {metric_totals['retweet_count']} / "
+                f"{metric_totals['reply_count']} / {metric_totals['like_count']}"
+            )
         
         with col2:
             st.markdown("### Top Tweets")
@@ -297,108 +346,291 @@ def show_statistics(tweet_data: TweetData, tweets: List[Dict]):
                 st.markdown("---")
         
         # Додаткова перевірка, якщо немає твітів після фільтрації
-        if not author_tweets:
+        if not stats['total_tweets']:
             st.info("No tweets found matching the selected filters")
 
-async def main():
-    st.set_page_config(page_title="Twitter Analysis Tool", layout="wide")
-    st.title("Twitter Analysis Tool")
+def show_connection_stats():
+    """Display OpenAI connection pool metrics in the sidebar."""
+    with st.sidebar.expander("API connections"):
+        st.json(get_runtime().pool_stats())
+
+class CorpusHandle:
+    """Loads tweet data on first use and shares it across sessions."""
     
-    # Initialize components
-    tweet_data = TweetData(TWEETS_FILE)
-    analyzer = GPTAnalyzer()
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._data: Optional[TweetData] = None
+        self._follower: Optional[JsonlFollower] = None
     
-    # Search interface
-    search_query, filters = create_search_interface()
+    def get(self, progress: Optional[ProgressCallback] = None) -> TweetData:
+        """Get tweet data, loading it with progress reported if not loaded yet."""
+        with self._lock:
+            if self._data is None:
+                if SHARD_SERVERS:
+                    # Shard servers hold the tweets, only their matches are fetched
+                    self._data = TweetData.from_tweets([])
+                    return self._data
+                self._data = TweetData(self.file_path, progress)
+                if INGEST_FILE:
+                    self._follower = JsonlFollower(INGEST_FILE, self._data.append, self._data.corpus.flush).start()
+            return self._data
     
-    if search_query:
-        # Створюємо порожній контейнер для статусу
-        status_container = st.empty()
-        
-        # Створюємо прогрес-бар одразу
-        progress_bar = st.progress(0)
+    def close(self):
+        """Stop following the ingest file and close search worker processes."""
+        with self._lock:
+            if self._follower is not None:
+                self._follower.stop()
+                self._follower = None
+            if self._data is not None:
+                self._data.corpus.close()
+
+@st.cache_resource(show_spinner=False)
+def open_corpora() -> Dict[str, CorpusHandle]:
+    """Get the corpus handle in use per tweets file, so a replaced one can be closed."""
+    return {}
 
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_corpus(file_path: str, file_version: Tuple[float, int]) -> CorpusHandle:
+    """
+    Get the corpus handle shared by all sessions.
+    
+    Args:
+        file_path: Tweets file
+        file_version: Modification time and size, so an edited file is reloaded
+    """
+    # The previous version of the file is no longer served
+    handles = open_corpora()
+    previous = handles.get(file_path)
+    if previous is not None:
+        previous.close()
+    # Loading happens outside the cached function so it can show progress
+    handles[file_path] = handle = CorpusHandle(file_path)
+    return handle
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_analyzer(file_path: str, file_version: Tuple[float, int]) -> GPTAnalyzer:
+    """Get the analyzer shared by all sessions for a corpus version."""
+    tweet_data = get_corpus(file_path, file_version).get()
+    shards = SEARCH_SHARDS or os.cpu_count() or 1
+    if (USE_CORPUS_SNAPSHOT and PARALLEL_SEARCH_MIN_TWEETS and shards > 1
+            and len(tweet_data.store) >= PARALLEL_SEARCH_MIN_TWEETS):
         try:
-            # Пошук твітів з прогресом відразу
-            with st.spinner(f'Searching tweets...'):
-                progress_bar.progress(10)  # Прогрес одразу після старту
-                search_results = await analyzer.search_tweets(
+            tweet_data.corpus.replace_base(
+                ParallelSearch(tweet_data.store, default_snapshot_path(file_path, SNAPSHOT_DIR), shards)
+            )
+        except Exception as e:
+            logger.error(f"Parallel search unavailable, searching in process: {e}")
+    return GPTAnalyzer(index=tweet_data.index, engine=tweet_data.corpus)
+
+def file_version(file_path: str) -> Tuple[float, int]:
+    """Get modification time and size of a file, zeros if it is missing."""
+    try:
+        stat = os.stat(file_path)
+        return stat.st_mtime, stat.st_size
+    except OSError:
+        return 0.0, 0
+
+def session_results() -> OrderedDict:
+    """Get search and analysis results memoized in this user session."""
+    if 'search_results' not in st.session_state:
+        st.session_state['search_results'] = OrderedDict()
+    return st.session_state['search_results']
+
+def run_search(analyzer: GPTAnalyzer, 
+               tweet_data: TweetData, 
+               search_query: str, 
+               filters: Dict) -> Optional[Dict]:
+    """
+    Search and analyze tweets, showing progress.
+    
+    Returns:
+        Dictionary with matches and analysis, None if nothing was found
+        or an error was shown
+    """
+    runtime = get_runtime()
+    
+    # Створюємо порожній контейнер для статусу
+    status_container = st.empty()
+    
+    # Створюємо прогрес-бар одразу
+    progress_bar = st.progress(0)
+
+    try:
+        # Results are shown here as they stream in, until the tabs are ready
+        live_results = st.empty()
+        live_container = live_results.container()
+        live_container.markdown("### Matching tweets (loading...)")
+
+        def show_live_match(match: Dict):
+            with live_container:
+                show_search_match(match)
+
+        # Callbacks from the event loop thread are run on this thread
+        relay = CallbackRelay()
+
+        # Пошук твітів з прогресом відразу
+        with st.spinner(f'Searching tweets...'):
+            progress_bar.progress(10)  # Прогрес одразу після старту
+            search_results = runtime.run(
+                analyzer.search_tweets(
                     tweet_data.tweets, 
                     search_query, 
-                    filters
+                    filters,
+                    on_match=relay.wrap(show_live_match)
+                ),
+                relay=relay
+            )
+        
+        if search_results.get("error"):
+            live_results.empty()
+            st.error(f"Search error: {search_results['error']}")
+            progress_bar.empty()
+            return None
+        
+        matched_tweets = search_results.get("matches", [])
+        
+        if not matched_tweets:
+            live_results.empty()
+            st.warning("No tweets found matching your criteria.")
+            progress_bar.empty()
+            return None
+        
+        # Оновлюємо spinner з інформацією про кількість знайдених твітів
+        with st.spinner(f'Searching tweets... Found {len(matched_tweets)} tweets. Analyzing content...'):
+            progress_bar.progress(30)  # Повертаємо попередній рівень прогресу
+
+        # Аналіз контенту
+        with st.spinner('Performing content analysis...'):
+            progress_bar.progress(50)
+
+            def report_stage(stage: str, completed: int, total: int):
+                progress_bar.progress(
+                    50 + 40 * completed // total,
+                    text=f"{stage.capitalize()} analysis ({completed}/{total})"
                 )
-            
-            if search_results.get("error"):
-                st.error(f"Search error: {search_results['error']}")
-                progress_bar.empty()
-                return
-            
-            matched_tweets = search_results.get("matches", [])
-            
-            if not matched_tweets:
-                st.warning("No tweets found matching your criteria.")
-                progress_bar.empty()
-                return
-            
-            # Оновлюємо spinner з інформацією про кількість знайдених твітів
-            with st.spinner(f'Searching tweets... Found {len(matched_tweets)} tweets. Analyzing content...'):
-                progress_bar.progress(30)  # Повертаємо попередній рівень прогресу
 
-            # Аналіз контенту
-            with st.spinner('Performing content analysis...'):
-                progress_bar.progress(50)
-                content_analysis = await analyzer.analyze_content(matched_tweets)
-                
-                progress_bar.progress(70)
-                sentiment_analysis = await analyzer.analyze_sentiment(matched_tweets)
-                
-                progress_bar.progress(90)
-            
-            # Очищаємо статус-контейнер
-            status_container.empty()
+            # Analyze every keyword match, not only the tweets ranked by GPT
+            analysis_tweets = runtime.run(
+                analyzer.find_matches(tweet_data.tweets, search_query, filters=filters)
+            ) or matched_tweets
             
-            # Завершуємо прогрес-бар
-            progress_bar.progress(100)
+            # Show the cost before sending it; large analyses wait for the user
+            requests = analyzer.estimate_requests(analysis_tweets)
+            label = f"Analyze {len(analysis_tweets)} matching tweets (about {requests} GPT requests)"
+            if requests > ANALYSIS_CONFIRM_REQUESTS:
+                confirm = st.empty()
+                if not confirm.button(label):
+                    progress_bar.empty()
+                    return None
+                confirm.empty()
+            progress_bar.progress(50, text=label)
             
-            # Combine analyses
-            full_analysis = {
-                "topics": content_analysis.get('topics', []),
-                "key_discussions": content_analysis.get('key_discussions', []),
-                "trends": content_analysis.get('trends', {}),
-                "sentiment": {
-                    **sentiment_analysis,
-                    "sentiment_distribution": sentiment_analysis.get('sentiment_distribution', {
-                        'positive': 0,
-                        'negative': 0,
-                        'neutral': 0
-                    })
-                }
-            }
-            
-            # Display results in tabs
-            tab1, tab2, tab3 = st.tabs(
-                ["Search Results", "Content Analysis", "Statistics"]
+            analysis = runtime.run(
+                analyzer.analyze_all(analysis_tweets, on_progress=relay.wrap(report_stage)),
+                relay=relay
             )
+            content_analysis = analysis['content']
+            sentiment_analysis = analysis['sentiment']
+
+            progress_bar.progress(90)
+        
+        # Очищаємо статус-контейнер
+        status_container.empty()
+        
+        # Завершуємо прогрес-бар
+        progress_bar.progress(100)
+        
+        # Combine analyses
+        full_analysis = {
+            "topics": content_analysis.get('topics', []),
+            "key_discussions": content_analysis.get('key_discussions', []),
+            "trends": content_analysis.get('trends', {}),
+            "sentiment": {
+                **sentiment_analysis,
+                "sentiment_distribution": sentiment_analysis.get('sentiment_distribution', {
+                    'positive': 0,
+                    'negative': 0,
+                    'neutral': 0
+                })
+            }
+        }
+        
+        # Видаляємо прогрес-бар після завершення
+        live_results.empty()
+        progress_bar.empty()
+        # Statistics cover the matched tweets; their own rollups answer the sidebar filters
+        return {
+            "matches": matched_tweets,
+            "analysis": full_analysis,
+            "statistics": TweetData.from_tweets(analysis_tweets)
+        }
+        
+    except Exception as e:
+        logger.error(f"Analysis error: {e}")
+        status_container.error("An error occurred during analysis. Please try again.")
+        progress_bar.empty()
+        return None
+
+def main():
+    st.set_page_config(page_title="Twitter Analysis Tool", layout="wide")
+    st.title("Twitter Analysis Tool")
+    
+    # GPT requests run on the shared background event loop
+    show_connection_stats()
+    
+    # Initialize components, loaded once per process
+    version = file_version(TWEETS_FILE)
+    load_progress = st.progress(0, text="Loading tweets...")
+    tweet_data = get_corpus(TWEETS_FILE, version).get(
+        progress=lambda p: load_progress.progress(
+            p.fraction, text=f"Loading tweets... {p.tweets_loaded:,} loaded"
+        )
+    )
+    load_progress.empty()
+    analyzer = get_analyzer(TWEETS_FILE, version)
+    
+    # Search interface
+    search_query, filters = create_search_interface()
+    
+    if search_query:
+        # Widget changes rerun the script; reuse results of the same search
+        results = session_results()
+        key = (version, search_query, json.dumps(filters, sort_keys=True))
+        result = results.get(key)
+        if result is not None and result['generation'] != tweet_data.corpus.generation:
+            # Tweets were added since this search; search again only when asked
+            refresh = st.empty()
+            if refresh.button("New tweets arrived - refresh results"):
+                refresh.empty()
+                result = None
+        if result is None:
+            generation = tweet_data.corpus.generation
+            result = run_search(analyzer, tweet_data, search_query, filters)
+            if result is None:
+                return
+            result['generation'] = generation
+            results[key] = result
+            while len(results) > SESSION_RESULTS_MAX_ENTRIES:
+                results.popitem(last=False)
+        else:
+            results.move_to_end(key)
+        
+        matched_tweets = result['matches']
+        
+        # Display results in tabs
+        tab1, tab2, tab3 = st.tabs(
+            ["Search Results", "Content Analysis", "Statistics"]
+        )
+        
+        with tab1:
+            show_search_results(matched_tweets)
             
-            with tab1:
-                show_search_results(matched_tweets)
-                
-            with tab2:
-                show_content_analysis(full_analysis)
-                
-            with tab3:
-                matched_authors = list(set(tweet['author_id'] for tweet in matched_tweets))
-                tweet_data = TweetData(TWEETS_FILE)
-                tweet_data.authors = matched_authors
-                show_statistics(tweet_data, matched_tweets)
-            
-            # Видаляємо прогрес-бар після завершення
-            progress_bar.empty()
+        with tab2:
+            show_content_analysis(result['analysis'])
             
-        except Exception as e:
-            logger.error(f"Analysis error: {e}")
-            status_container.error("An error occurred during analysis. Please try again.")
-            progress_bar.empty()
+        with tab3:
+            show_statistics(result['statistics'])
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
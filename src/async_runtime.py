@@ -0,0 +1,248 @@
+# src/async_runtime.py
+
+from importlib.util import find_spec
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import threading
+import weakref
+import httpx
+from openai import AsyncClient
+from fake_openai import FakeAsyncClient
+from config import (
+    OPENAI_API_KEY,
+    USE_FAKE_OPENAI,
+    FAKE_OPENAI_LATENCY_MS,
+    FAKE_OPENAI_LATENCY_DISTRIBUTION,
+    FAKE_OPENAI_TOKENS_PER_SECOND,
+    FAKE_OPENAI_ERROR_RATE,
+    FAKE_OPENAI_RATE_LIMIT_RATE,
+    FAKE_OPENAI_SEED,
+    HTTP2_ENABLED,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_SECONDS,
+    HTTP_TIMEOUT_SECONDS
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# HTTP/2 needs the optional h2 package
+HTTP2_AVAILABLE = find_spec('h2') is not None
+if HTTP2_ENABLED and not HTTP2_AVAILABLE:
+    logger.warning("h2 is not installed, using HTTP/1.1 connections")
+
+
+class PoolMetrics:
+    """Counts requests and new connections seen through httpx tracing."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def _trace(self, event_name: str, info: Dict):
+        if event_name == 'connection.connect_tcp.complete':
+            self.connections_opened += 1
+        elif event_name == 'connection.start_tls.complete':
+            self.tls_handshakes += 1
+
+    async def on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions['trace'] = self._trace
+
+
+def create_client(metrics: Optional[PoolMetrics] = None) -> AsyncClient:
+    """
+    Build an OpenAI client over a pooled HTTP client.
+
+    The client must only be used on the event loop it is first used on.
+
+    Args:
+        metrics: Collects request and connection counts if given
+
+    Returns:
+        OpenAI client, or the local fake if USE_FAKE_OPENAI is set;
+        retries are left to the request scheduler
+    """
+    if USE_FAKE_OPENAI:
+        return FakeAsyncClient(
+            latency_ms=FAKE_OPENAI_LATENCY_MS,
+            latency_distribution=FAKE_OPENAI_LATENCY_DISTRIBUTION,
+            tokens_per_second=FAKE_OPENAI_TOKENS_PER_SECOND,
+            error_rate=FAKE_OPENAI_ERROR_RATE,
+            rate_limit_rate=FAKE_OPENAI_RATE_LIMIT_RATE,
+            seed=FAKE_OPENAI_SEED
+        )
+    http_client = httpx.AsyncClient(
+        http2=HTTP2_ENABLED and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=10.0),
+        event_hooks={'request': [metrics.on_request]} if metrics else None
+    )
+    return AsyncClient(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+
+
+class CallbackRelay:
+    """
+    Runs callbacks on the thread that waits for a coroutine.
+
+    Callbacks wrapped here may be called from the runtime thread; they
+    are queued and run by AsyncRuntime.run on the calling thread, where
+    Streamlit elements can be updated.
+    """
+
+    def __init__(self):
+        self._calls: queue.Queue = queue.Queue()
+
+    def wrap(self, callback: Callable[..., None]) -> Callable[..., None]:
+        def relayed(*args, **kwargs):
+            self._calls.put((callback, args, kwargs))
+        return relayed
+
+    def drain(self, timeout: Optional[float] = None):
+        """Run queued callbacks, waiting up to timeout for the first one."""
+        try:
+            callback, args, kwargs = self._calls.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            callback(*args, **kwargs)
+            try:
+                callback, args, kwargs = self._calls.get_nowait()
+            except queue.Empty:
+                return
+
+
+class AsyncRuntime:
+    """
+    Event loop running for the life of the process in a daemon thread.
+
+    The loop owns one pooled OpenAI client, so keep-alive connections,
+    TLS sessions and HTTP/2 streams are reused across Streamlit reruns
+    and user sessions. Other threads submit coroutines to it.
+    """
+
+    def __init__(self):
+        self.metrics = PoolMetrics()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='async-runtime', daemon=True)
+        self._thread.start()
+        self.client = self.run(self._create_client())
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _create_client(self) -> AsyncClient:
+        return create_client(self.metrics)
+
+    def submit(self, coro: Awaitable[T]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the runtime loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self,
+            coro: Awaitable[T],
+            timeout: Optional[float] = None,
+            relay: Optional[CallbackRelay] = None) -> T:
+        """
+        Run a coroutine on the runtime loop and wait for its result.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait, no limit if None
+            relay: Callbacks wrapped by it are run on this thread while waiting
+
+        Returns:
+            Result of the coroutine
+
+        Raises:
+            Exception: Whatever the coroutine raised; the coroutine is
+                cancelled if waiting is interrupted or times out
+        """
+        future = self.submit(coro)
+        try:
+            if relay is None:
+                return future.result(timeout)
+            deadline = None if timeout is None else self.loop.time() + timeout
+            while not future.done():
+                if deadline is not None and self.loop.time() >= deadline:
+                    raise concurrent.futures.TimeoutError()
+                relay.drain(timeout=0.05)
+            relay.drain(timeout=0)
+            return future.result()
+        except BaseException:
+            # Streamlit stops a rerun by raising in the script thread
+            future.cancel()
+            raise
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool metrics.
+
+        Returns:
+            Dictionary with open, idle and HTTP/2 connection counts,
+            requests sent and connections opened since start
+        """
+        return self.run(self._pool_stats(), timeout=5)
+
+    async def _pool_stats(self) -> Dict[str, Any]:
+        # The fake client has no HTTP pool
+        transport = getattr(getattr(self.client, '_client', None), '_transport', None)
+        pool = getattr(transport, '_pool', None)
+        connections = list(getattr(pool, 'connections', []))
+        requests = self.metrics.requests
+        opened = self.metrics.connections_opened
+        return {
+            "http2": HTTP2_ENABLED and HTTP2_AVAILABLE,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "http2_connections": sum(1 for c in connections if 'HTTP/2' in c.info()),
+            "requests": requests,
+            "connections_opened": opened,
+            "tls_handshakes": self.metrics.tls_handshakes,
+            "requests_per_connection": round(requests / opened, 2) if opened else 0.0
+        }
+
+
+_runtime: Optional[AsyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+# Clients for event loops other than the runtime's, e.g. asyncio.run in scripts
+_loop_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]' = weakref.WeakKeyDictionary()
+
+
+def get_runtime() -> AsyncRuntime:
+    """Get the process-wide runtime, starting it on first use."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+        return _runtime
+
+
+def get_client() -> AsyncClient:
+    """
+    Get the OpenAI client for the running event loop.
+
+    Returns:
+        Pooled client of the runtime on its loop, otherwise a client
+        created once per event loop
+    """
+    loop = asyncio.get_running_loop()
+    if _runtime is not None and loop is _runtime.loop:
+        return _runtime.client
+    client = _loop_clients.get(loop)
+    if client is None:
+        client = _loop_clients[loop] = create_client()
+    return client
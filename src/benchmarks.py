@@ -0,0 +1,270 @@
+# src/benchmarks.py
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import numpy as np
+from config import SNAPSHOT_DIR, VECTOR_DIMENSIONS
+from corpus_generator import write_corpus
+from corpus_loader import load_corpus
+from corpus_snapshot import default_snapshot_path, open_corpus
+from gpt_analyzer import GPTAnalyzer
+from parallel_search import ParallelSearch
+from query_parser import QueryParser, TweetMatcher
+from search_engine import SearchEngine
+from vector_index import VectorIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = 'data/.bench'
+DEFAULT_SIZES = (10000, 100000)
+
+# Query shapes; {author} is replaced with the most active author of the corpus
+QUERY_SHAPES = {
+    "term": "bitcoin",
+    "or": "bitcoin OR ethereum OR solana",
+    "phrase": '"smart contract"',
+    "exclude": "crypto -scam",
+    "from": "defi from:{author}",
+    "year": "nft (2024)",
+    "complex": '(bitcoin OR ethereum) "layer 2" -scam lang:en'
+}
+
+# Slower than the baseline by more than this ratio counts as a regression
+REGRESSION_RATIO = 1.10
+
+
+def measure(function: Callable[[], Any], repeat: int = 5, number: int = 1) -> Dict[str, float]:
+    """
+    Time a function.
+
+    Args:
+        function: Code to time
+        repeat: Number of timed rounds
+        number: Calls per round
+
+    Returns:
+        Median, minimum and maximum seconds per call
+    """
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        rounds.append((time.perf_counter() - started) / number)
+    return {
+        "median_s": statistics.median(rounds),
+        "min_s": min(rounds),
+        "max_s": max(rounds)
+    }
+
+
+def corpus_path(size: int, seed: int) -> str:
+    """Get path of a generated corpus, generating it on first use."""
+    path = os.path.join(BENCH_DIR, f"corpus_{size}_{seed}.jsonl")
+    if not os.path.exists(path):
+        write_corpus(path, size, seed=seed)
+    return path
+
+
+def git_commit() -> Optional[str]:
+    """Get current commit hash, None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def check_snapshot_search(path: str, queries: List[str]):
+    """
+    Check that the snapshot of a corpus searches like the corpus loaded in memory.
+
+    Args:
+        path: Tweets file, its snapshot is built if missing
+        queries: Queries compared
+
+    Raises:
+        RuntimeError: Results or vectors differ
+    """
+    mapped = SearchEngine(*open_corpus(path, SNAPSHOT_DIR))
+    loaded = SearchEngine(*load_corpus(path))
+    for query in queries:
+        expected = loaded.search(query).rows
+        found = mapped.search(query).rows
+        if not np.array_equal(found, expected):
+            raise RuntimeError(f"Snapshot search for {query!r} found {len(found)} tweets, expected {len(expected)}")
+    # Vector ranking reads the vocabulary out of the mapped index
+    mapped_vectors = VectorIndex.from_index(mapped.index, VECTOR_DIMENSIONS)
+    loaded_vectors = VectorIndex.from_index(loaded.index, VECTOR_DIMENSIONS)
+    if not np.array_equal(mapped_vectors.matrix, loaded_vectors.matrix):
+        raise RuntimeError("Snapshot vectors differ from vectors of the loaded corpus")
+
+
+def run_benchmarks(sizes: List[int], repeat: int = 5, seed: int = 0, shards: int = 0) -> List[Dict[str, Any]]:
+    """
+    Run every benchmark for every corpus size and query shape.
+
+    Args:
+        sizes: Corpus sizes in tweets
+        repeat: Timed rounds per benchmark
+        seed: Corpus generator seed
+        shards: Also time parallel search with this many shards if above 1
+
+    Returns:
+        List of results with name, size, shape and timings
+    """
+    # Imported here so the rest of the suite runs without Streamlit
+    from app import TweetData
+
+    parser = QueryParser()
+    matcher = TweetMatcher()
+    results: List[Dict[str, Any]] = []
+
+    def record(name: str, size: Optional[int], shape: Optional[str], timing: Dict, **extra):
+        results.append({"name": name, "size": size, "shape": shape, **timing, **extra})
+        logger.info(f"{name} size={size} shape={shape}: {timing['median_s'] * 1000:.3f} ms")
+
+    for size in sizes:
+        path = corpus_path(size, seed)
+
+        # Cold load builds the snapshot, warm loads map it
+        snapshot = default_snapshot_path(path, SNAPSHOT_DIR)
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+        started = time.perf_counter()
+        tweet_data = TweetData(path)
+        cold = time.perf_counter() - started
+        record("tweet_data_load_cold", size, None, {"median_s": cold, "min_s": cold, "max_s": cold})
+        record("tweet_data_load", size, None, measure(lambda: TweetData(path), repeat))
+        check_snapshot_search(path, [template.format(author=tweet_data.authors[0]) for template in QUERY_SHAPES.values()])
+
+        tweets = tweet_data.store
+        tweet_dicts = tweets.tweets(tweets.all_rows())
+        author = max(tweet_data.authors, key=lambda a: len(tweet_data.store.author_rows(a)))
+        analyzer = GPTAnalyzer(index=tweet_data.index)
+        parallel = ParallelSearch(tweets, snapshot, shards) if shards > 1 else None
+
+        for shape, template in QUERY_SHAPES.items():
+            query = template.format(author=author)
+            if size == sizes[0]:
+                record("query_parser_parse", None, shape, measure(lambda: parser.parse(query), repeat, 1000))
+
+            conditions = parser.generate_search_conditions(parser.parse(query))
+            record(
+                "tweet_matcher_scan", size, shape,
+                measure(lambda: [t for t in tweet_dicts if matcher.matches_conditions(t, conditions)], repeat)
+            )
+
+            matches = analyzer._basic_search(tweets, query, limit=None)
+            record("basic_search", size, shape, measure(lambda: analyzer._basic_search(tweets, query), repeat),
+                   matches=len(matches))
+            if parallel is not None:
+                record("parallel_search", size, shape, measure(lambda: parallel.search(query, 25), repeat),
+                       shards=shards)
+            record("tweet_statistics", size, shape,
+                   measure(lambda: tweet_data.get_tweet_statistics(matches), repeat), tweets=len(matches))
+
+        if parallel is not None:
+            parallel.close()
+
+        # Sidebar statistics come from rollups, built by the first call
+        tweet_data.get_author_statistics(author)
+        record("author_statistics", size, None,
+               measure(lambda: tweet_data.get_author_statistics(author, min_engagement=100, sort_by='like_count'),
+                       repeat))
+
+        # New tweets go into the memory segment; the loaded tweets are not rebuilt
+        new_tweets = [{**tweet, 'id': f"new-{tweet['id']}"} for tweet in tweet_dicts[:1000]]
+        record("segment_append", size, None, measure(lambda: tweet_data.append(new_tweets), repeat),
+               tweets=len(new_tweets))
+        record("segment_search", size, None,
+               measure(lambda: tweet_data.corpus.search(QUERY_SHAPES['term'], 25), repeat))
+
+    return results
+
+
+def compare(baseline: Dict, current: Dict) -> List[str]:
+    """
+    Compare two result files.
+
+    Args:
+        baseline: Earlier results
+        current: New results
+
+    Returns:
+        Report lines; regressions are marked with "!"
+    """
+    def key(result: Dict) -> tuple:
+        return result['name'], result['size'], result['shape']
+
+    before = {key(result): result for result in baseline['results']}
+    lines = []
+    for result in current['results']:
+        old = before.get(key(result))
+        if old is None or not old['median_s']:
+            continue
+        ratio = result['median_s'] / old['median_s']
+        marker = '!' if ratio > REGRESSION_RATIO else ' '
+        name, size, shape = key(result)
+        lines.append(
+            f"{marker} {name:<22} {str(size or ''):>9} {shape or '':<8} "
+            f"{old['median_s'] * 1000:>10.3f} ms -> {result['median_s'] * 1000:>10.3f} ms  x{ratio:.2f}"
+        )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark search and statistics on synthetic corpora")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated corpus sizes")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shards', type=int, default=0, help="Also benchmark parallel search with this many shards")
+    parser.add_argument('--output', help="Results file, under data/.bench/results by default")
+    parser.add_argument('--compare', help="Earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    commit = git_commit()
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "shards": args.shards
+        },
+        "results": run_benchmarks(sizes, args.repeat, args.seed, args.shards)
+    }
+
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', f"{datetime.now():%Y%m%d-%H%M%S}-{(commit or 'nogit')[:8]}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print('\n'.join(compare(baseline, report)))
+
+
+if __name__ == "__main__":
+    main()
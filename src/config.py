@@ -1,7 +1,6 @@
 # src/config.py
 
 import os
-from openai import AsyncClient
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,16 +10,95 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 GPT_MODEL = "gpt-4o"
 
-# Create async client
-async_client = AsyncClient(api_key=OPENAI_API_KEY)
+# Pooled HTTP connections of the OpenAI client, owned by the async runtime
+HTTP2_ENABLED = True  # Multiplex requests over HTTP/2 when the h2 package is installed
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_SECONDS = 120  # Idle connections are kept open this long
+HTTP_TIMEOUT_SECONDS = 120  # Read timeout, long enough for streamed completions
+
+# Local stand-in for the OpenAI API, for benchmarks and load tests (set USE_FAKE_OPENAI=1)
+USE_FAKE_OPENAI = os.getenv('USE_FAKE_OPENAI', '').lower() in ('1', 'true', 'yes')
+FAKE_OPENAI_LATENCY_MS = float(os.getenv('FAKE_OPENAI_LATENCY_MS', 800))  # Median time to first token
+FAKE_OPENAI_LATENCY_DISTRIBUTION = os.getenv('FAKE_OPENAI_LATENCY_DISTRIBUTION', 'lognormal')  # constant, uniform, exponential or lognormal
+FAKE_OPENAI_TOKENS_PER_SECOND = float(os.getenv('FAKE_OPENAI_TOKENS_PER_SECOND', 200))
+FAKE_OPENAI_ERROR_RATE = float(os.getenv('FAKE_OPENAI_ERROR_RATE', 0))  # Fraction of requests failing with 500
+FAKE_OPENAI_RATE_LIMIT_RATE = float(os.getenv('FAKE_OPENAI_RATE_LIMIT_RATE', 0))  # Fraction of requests failing with 429
+FAKE_OPENAI_SEED = int(os.getenv('FAKE_OPENAI_SEED', 0))
 
 # API request parameters
 MAX_TOKENS = 4000  # Збільшено для більшої кількості твітів
 TEMPERATURE = 0.3  # Зменшено для більш точних результатів
+PAYLOAD_TOKEN_BUDGET = 6000  # Tweet payload tokens per request, counted with tiktoken when installed
+TWEET_TEXT_MAX_CHARS = 500  # Longer tweet texts are trimmed before sending
+STREAM_RESPONSES = True  # Stream completions and parse results as they arrive
+
+# Request scheduling, shared by all GPT requests of the process
+GPT_REQUESTS_PER_MINUTE = 500  # Match the rate limits of your OpenAI account tier
+GPT_TOKENS_PER_MINUTE = 150000  # Requests reserve prompt tokens plus MAX_TOKENS
+GPT_MAX_RETRIES = 5  # Retries of rate-limited, timed out and failed requests
+GPT_RETRY_BASE_DELAY = 0.5  # Seconds; doubled per retry with full jitter
+GPT_RETRY_MAX_DELAY = 30  # Longest backoff unless the server asks for more via retry-after
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive upstream failures that open the circuit
+CIRCUIT_RESET_SECONDS = 30  # Requests fail fast for this long before a probe request
+
+# GPT response cache
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_PATH = 'data/.cache/gpt_responses.sqlite3'  # None keeps the cache in memory only
+RESPONSE_CACHE_MEMORY_ENTRIES = 256  # In-memory LRU tier size
+RESPONSE_CACHE_TTL_SECONDS = 24 * 3600
+RESPONSE_CACHE_MAX_ENTRIES = 10000  # Disk tier limits
+RESPONSE_CACHE_MAX_MB = 100
+
+# Per-tweet analysis results, stored in the response cache file
+USE_TWEET_ENRICHMENT = True  # Analyze tweets one by one and reuse cached per-tweet results
+ENRICHMENT_CACHE_MEMORY_ENTRIES = 10000  # In-memory LRU tier size
+ENRICHMENT_CACHE_MAX_ENTRIES = 1000000  # Disk tier limit
+FUSED_ANALYSIS = False  # Without enrichment, ask for content and sentiment analysis in one request
+
+# Map-reduce analysis of large result sets
+ANALYSIS_MAX_TWEETS = 300  # Keyword matches analyzed per query
+ANALYSIS_CONFIRM_REQUESTS = 20  # Ask before an analysis sends more GPT requests than this
+ANALYSIS_CONCURRENCY = 4  # Chunks analyzed at the same time
+ANALYSIS_SUMMARY_PASS = True  # Summarize merged chunk results with one more request
 
 # Search configuration
-MAX_TWEETS_FOR_GPT = 25  # Максимальна кількість твітів для аналізу
+MAX_TWEETS_FOR_GPT = 25  # Максимальна кількість твітів для аналізу в одному запиті
 MIN_RELEVANCE_SCORE = 0.3  # Мінімальний бал релевантності для результатів
+USE_INVERTED_INDEX = True  # Search through the inverted index instead of scanning every tweet
+SEARCH_RANKING = 'bm25'  # Order of keyword matches: 'bm25' (needs the index), 'vector' or 'keywords'
+BM25_K1 = 1.2  # Term frequency saturation
+BM25_B = 0.75  # Tweet length normalization
+ENGAGEMENT_BOOST = 0.2  # Largest relative BM25 boost, given to the most engaged tweet
+FILTER_SCAN_MAX_ROWS = 2000  # Tweets left by filters are matched one by one instead of through the index up to this count
+PARALLEL_SEARCH_MIN_TWEETS = 500000  # Snapshot corpora this large are searched by shard worker processes, 0 disables
+SEARCH_SHARDS = 0  # Shards and worker processes of parallel search, 0 for one per CPU core
+SHARD_SERVERS = os.getenv('SHARD_SERVERS', '')  # host:port of shard servers searched instead of local tweets, comma between shards, | between replicas
+SHARD_TIMEOUT_SECONDS = float(os.getenv('SHARD_TIMEOUT_SECONDS', 2.0))  # Shards answering later are left out of the results
+SHARD_HEDGE_PERCENTILE = 95  # A shard slower than this percentile of its recent latencies gets a second request
+SHARD_HEDGE_MIN_MS = 50  # Shortest wait before a second request
+SHARD_MIN_ANSWERS = 1  # Fewer answering shards fall back to searching local tweets
+VECTOR_DIMENSIONS = 512  # Hashed TF-IDF dimensions, 2 bytes per tweet each
+USE_PARTITION_PRUNING = True  # Skip time partitions that cannot match the year, date range or keywords of a query
+PARTITION_GRANULARITY = 'month'  # Tweets per partition: 'day' or 'month'
+PARTITION_BLOOM_BITS = 10  # Trigram filter bits per distinct trigram of the largest partition
+
+# Corpus loading
+LOAD_BATCH_SIZE = 10000  # Tweets parsed per batch while streaming the tweets file
+LOAD_BUFFER_LIMIT_MB = 256  # Limit for parser buffers and the pending batch; the store and index still grow with the corpus
+USE_CORPUS_SNAPSHOT = True  # Open the corpus through a memory-mapped snapshot
+SNAPSHOT_DIR = 'data/.snapshots'  # Rebuilt automatically when the tweets file changes
+
+# Incremental ingest
+INGEST_FILE = os.getenv('INGEST_FILE', '')  # JSONL file followed for new tweets, searchable as soon as lines are appended
+INGEST_POLL_SECONDS = 1.0  # Seconds between checks of the ingest file
+SEGMENT_MEMORY_TWEETS = 5000  # New tweets held in the mutable segment before it is indexed as an immutable one
+SEGMENT_MERGE_FACTOR = 4  # Immutable segments of one size tier merged together
+SEGMENT_FLUSH_SECONDS = 30  # New tweets are indexed after the ingest file is idle this long
+ROLLUP_TOP_N = 20  # Best tweets per sort column kept in the author x day rollups
+
+# Streamlit UI
+SESSION_RESULTS_MAX_ENTRIES = 10  # Searches whose results are kept per user session
 
 # File paths
-TWEETS_FILE = 'data/mock_tweets.json'
\ No newline at end of file
+TWEETS_FILE = 'data/mock_tweets.json'  # JSON array or JSONL
\ No newline at end of file
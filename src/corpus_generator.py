@@ -0,0 +1,275 @@
+# src/corpus_generator.py
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+import argparse
+import json
+import logging
+import os
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Most frequent words, placed at the top of the Zipf ranking
+COMMON_WORDS = (
+    'the to and a of is in for on this it with that are be we our just you '
+    'now new will more from at not all your out up has have about what can '
+    'today big time next week thread here why how one so get'
+).split()
+
+# Domain vocabulary, ranked after the common words
+DOMAIN_WORDS = (
+    'crypto bitcoin ethereum blockchain defi nft web3 token market price '
+    'solana layer scaling protocol wallet staking yield liquidity exchange '
+    'smart contract contracts dao governance airdrop mainnet testnet bridge '
+    'rollup rollups zk security audit hack scam regulation sec etf bull bear '
+    'pump dump altcoin stablecoin usdc usdt trading trader chart btc eth sol '
+    'validator node gas fees upgrade launch community builders developers '
+    'ai adoption institutional custody mining hashrate halving lightning '
+    'metaverse gaming tokenomics mint floor whale portfolio hodl bullish '
+    'bearish rally crash volatility research report innovation privacy'
+).split()
+
+# Multi-word terms added to some tweets, so phrase queries have matches
+DOMAIN_PHRASES = (
+    'smart contract', 'layer 2', 'bitcoin etf', 'proof of stake',
+    'market cap', 'web3 gaming', 'real world assets', 'zero knowledge'
+)
+
+# Syllables of the synthetic long-tail vocabulary
+SYLLABLES = (
+    'ka lo mi ne ru sa ti vo ze ba de fi go hu ja ke li mo nu pa qu re si '
+    'ta ul ve wa xi yo zu'
+).split()
+
+HANDLE_PREFIXES = (
+    'crypto defi chain block web3 eth btc sol nft dao token alpha degen '
+    'onchain ledger satoshi vitalik moon whale builder'
+).split()
+HANDLE_SUFFIXES = 'Lab Daily News Guru Dev Trader Insider Watch Capital Research Hub Maxi'.split()
+
+# Defaults for realistic corpora
+DEFAULT_VOCABULARY_SIZE = 50000
+DEFAULT_WORD_EXPONENT = 1.07  # Zipf exponent of word frequencies
+DEFAULT_AUTHOR_EXPONENT = 1.2  # Zipf exponent of tweets per author
+DEFAULT_TWEETS_PER_AUTHOR = 25  # Average, sets the number of authors
+DEFAULT_START = datetime(2022, 1, 1)
+DEFAULT_END = datetime(2024, 12, 31)
+FIRST_TWEET_ID = 1480000000000000000
+
+
+def _synthetic_words(count: int, rng: np.random.Generator) -> List[str]:
+    """Generate count distinct pronounceable words."""
+    words: List[str] = []
+    seen = set(COMMON_WORDS) | set(DOMAIN_WORDS)
+    syllables = np.array(SYLLABLES)
+    while len(words) < count:
+        lengths = rng.integers(2, 5, size=count)
+        for length in lengths:
+            word = ''.join(rng.choice(syllables, size=length))
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+                if len(words) == count:
+                    break
+    return words
+
+
+def build_vocabulary(size: int, rng: np.random.Generator) -> List[str]:
+    """
+    Build a vocabulary in Zipf rank order.
+
+    Args:
+        size: Number of words
+        rng: Random generator
+
+    Returns:
+        Common words, then domain words, then synthetic words
+    """
+    base = list(dict.fromkeys(COMMON_WORDS + DOMAIN_WORDS))
+    if size <= len(base):
+        return base[:size]
+    return base + _synthetic_words(size - len(base), rng)
+
+
+def zipf_cdf(size: int, exponent: float) -> np.ndarray:
+    """Cumulative probabilities of ranks 1..size with P(rank) proportional to rank^-exponent."""
+    weights = 1.0 / np.arange(1, size + 1, dtype=np.float64) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def build_authors(count: int, rng: np.random.Generator) -> List[str]:
+    """Generate count distinct author handles."""
+    prefixes = rng.choice(HANDLE_PREFIXES, size=count)
+    suffixes = rng.choice(HANDLE_SUFFIXES, size=count)
+    return [f"{prefix}{suffix}_{i}" for i, (prefix, suffix) in enumerate(zip(prefixes, suffixes))]
+
+
+def generate_tweets(count: int,
+                    seed: int = 0,
+                    vocabulary_size: int = DEFAULT_VOCABULARY_SIZE,
+                    word_exponent: float = DEFAULT_WORD_EXPONENT,
+                    authors: Optional[int] = None,
+                    author_exponent: float = DEFAULT_AUTHOR_EXPONENT,
+                    start: datetime = DEFAULT_START,
+                    end: datetime = DEFAULT_END,
+                    batch_size: int = 10000) -> Iterator[List[Dict]]:
+    """
+    Generate tweets with the schema of data/mock_tweets.json, in batches.
+
+    Words follow a Zipf distribution over the vocabulary and tweets per
+    author follow a Zipf distribution over authors. Popular authors get
+    higher engagement. Tweets are in time order with increasing ids.
+
+    Args:
+        count: Number of tweets
+        seed: Seed; the same arguments give the same corpus
+        vocabulary_size: Number of distinct words
+        word_exponent: Zipf exponent of word frequencies
+        authors: Number of authors, count / DEFAULT_TWEETS_PER_AUTHOR if None
+        author_exponent: Zipf exponent of tweets per author
+        start: Time of the first tweet
+        end: Time of the last tweet
+        batch_size: Tweets per yielded batch
+
+    Yields:
+        Lists of tweet dictionaries
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(build_vocabulary(vocabulary_size, rng), dtype=object)
+    word_cdf = zipf_cdf(len(vocabulary), word_exponent)
+    # Hashtags come from the domain words, also Zipf-distributed
+    hashtags = np.array([f"#{word.capitalize()}" for word in DOMAIN_WORDS], dtype=object)
+    hashtag_cdf = zipf_cdf(len(hashtags), 1.0)
+
+    author_count = authors or max(10, count // DEFAULT_TWEETS_PER_AUTHOR)
+    handles = np.array(build_authors(author_count, rng), dtype=object)
+    author_cdf = zipf_cdf(author_count, author_exponent)
+    # Engagement scale by author popularity rank
+    popularity = (author_count / np.arange(1, author_count + 1)) ** 0.5
+
+    span = (end - start).total_seconds()
+    step = span / max(count, 1)
+
+    for first in range(0, count, batch_size):
+        size = min(batch_size, count - first)
+
+        lengths = np.clip(rng.normal(18, 7, size=size).astype(int), 3, 50)
+        word_ids = np.searchsorted(word_cdf, rng.random(int(lengths.sum())))
+        words = vocabulary[word_ids]
+        ends = np.cumsum(lengths)
+
+        author_ids = np.searchsorted(author_cdf, rng.random(size))
+        hashtag_counts = rng.choice(4, size=size, p=[0.45, 0.3, 0.17, 0.08])
+        hashtag_ids = np.searchsorted(hashtag_cdf, rng.random(int(hashtag_counts.sum())))
+        hashtag_ends = np.cumsum(hashtag_counts)
+        kinds = rng.random(size)
+        mentions = np.searchsorted(author_cdf, rng.random(size))
+        has_link = rng.random(size) < 0.2
+        phrase_ids = np.where(rng.random(size) < 0.15, rng.integers(0, len(DOMAIN_PHRASES), size=size), -1)
+
+        offsets = (first + np.arange(size) + rng.random(size)) * step
+        id_steps = rng.integers(1, 1000, size=size)
+
+        likes = rng.lognormal(np.log(3 * popularity[author_ids] + 1), 1.2).astype(np.int64)
+        retweets = (likes * rng.beta(2, 8, size=size)).astype(np.int64)
+        replies = (likes * rng.beta(1.5, 12, size=size)).astype(np.int64)
+        quotes = (retweets * rng.beta(1, 10, size=size)).astype(np.int64)
+
+        batch = []
+        for i in range(size):
+            text = ' '.join(words[ends[i] - lengths[i]:ends[i]])
+            if phrase_ids[i] >= 0:
+                text += ' ' + DOMAIN_PHRASES[phrase_ids[i]]
+            text = text[0].upper() + text[1:]
+            if kinds[i] < 0.05:
+                text = f"RT @{handles[mentions[i]]}: {text}"
+            elif kinds[i] < 0.15:
+                text = f"@{handles[mentions[i]]} {text}"
+            tags = hashtags[hashtag_ids[hashtag_ends[i] - hashtag_counts[i]:hashtag_ends[i]]]
+            if len(tags):
+                text += ' ' + ' '.join(tags)
+            if has_link[i]:
+                text += f" https://t.co/{first + i:010x}"
+
+            batch.append({
+                "id": str(FIRST_TWEET_ID + (first + i) * 1000 + int(id_steps[i])),
+                "text": text,
+                "created_at": (start + timedelta(seconds=float(offsets[i]))).strftime('%Y-%m-%dT%H:%M:%S'),
+                "author_id": handles[author_ids[i]],
+                "metrics": {
+                    "retweet_count": int(retweets[i]),
+                    "reply_count": int(replies[i]),
+                    "like_count": int(likes[i]),
+                    "quote_count": int(quotes[i])
+                }
+            })
+        yield batch
+
+
+def write_corpus(path: str, count: int, **kwargs) -> int:
+    """
+    Generate a corpus straight to a file, one batch in memory at a time.
+
+    Args:
+        path: Output file; a JSON array if it ends with .json, else JSONL
+        count: Number of tweets
+        **kwargs: Passed to generate_tweets
+
+    Returns:
+        Number of tweets written
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    as_array = path.endswith('.json')
+    written = 0
+    temp_path = path + '.tmp'
+
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        if as_array:
+            f.write('[\n')
+        for batch in generate_tweets(count, **kwargs):
+            lines = [json.dumps(tweet, ensure_ascii=False) for tweet in batch]
+            if as_array:
+                f.write((',\n' if written else '') + ',\n'.join(lines))
+            else:
+                f.write('\n'.join(lines) + '\n')
+            written += len(batch)
+            if written % 1000000 < len(batch):
+                logger.info(f"Generated {written:,} of {count:,} tweets")
+        if as_array:
+            f.write('\n]\n')
+
+    os.replace(temp_path, path)
+    logger.info(f"Wrote {written:,} tweets to {path}")
+    return written
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic tweets corpus")
+    parser.add_argument('output', help="Output file, JSON array if it ends with .json, else JSONL")
+    parser.add_argument('--tweets', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vocabulary', type=int, default=DEFAULT_VOCABULARY_SIZE)
+    parser.add_argument('--word-exponent', type=float, default=DEFAULT_WORD_EXPONENT)
+    parser.add_argument('--authors', type=int, help="Number of authors")
+    parser.add_argument('--author-exponent', type=float, default=DEFAULT_AUTHOR_EXPONENT)
+    args = parser.parse_args(argv)
+
+    write_corpus(
+        args.output,
+        args.tweets,
+        seed=args.seed,
+        vocabulary_size=args.vocabulary,
+        word_exponent=args.word_exponent,
+        authors=args.authors,
+        author_exponent=args.author_exponent
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+# src/corpus_loader.py
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import codecs
+import json
+import logging
+import os
+from search_index import IndexBuilder, InvertedIndex
+from tweet_store import TweetStore, TweetStoreBuilder
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bytes read from disk at a time
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class LoadProgress:
+    """Progress of a corpus load, reported after every batch."""
+    bytes_read: int
+    total_bytes: int
+    tweets_loaded: int
+
+    @property
+    def fraction(self) -> float:
+        """Share of the file processed so far (0-1)."""
+        if not self.total_bytes:
+            return 1.0
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+
+ProgressCallback = Callable[[LoadProgress], None]
+
+
+class _ByteCounter:
+    """File wrapper counting bytes consumed, iterating lines that start before end."""
+
+    def __init__(self, file, end: Optional[int] = None):
+        self.file = file
+        self.bytes_read = 0
+        self.end = end
+
+    def read(self, size: int) -> bytes:
+        chunk = self.file.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def __iter__(self):
+        position = self.file.tell()
+        for line in self.file:
+            if self.end is not None and position >= self.end:
+                return
+            position += len(line)
+            self.bytes_read += len(line)
+            yield line
+
+
+def _detect_format(file) -> str:
+    """Peek at the first non-whitespace character of a binary file."""
+    position = file.tell()
+    head = file.read(4096).lstrip(codecs.BOM_UTF8).lstrip()
+    file.seek(position)
+    return 'array' if head[:1] == b'[' else 'jsonl'
+
+
+def _iter_json_array(source: _ByteCounter, max_buffer_chars: int) -> Iterator[Dict]:
+    """
+    Decode elements of a top-level JSON array one at a time.
+
+    Args:
+        source: Binary file positioned at the start of the array
+        max_buffer_chars: Largest amount of undecoded text to hold
+
+    Yields:
+        Array elements
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+
+    def read_more() -> bool:
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        chunk = source.read(READ_CHUNK_BYTES)
+        eof = not chunk
+        buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+        position = 0
+        return True
+
+    while True:
+        # Skip whitespace between tokens
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position >= len(buffer):
+            if not read_more():
+                if started:
+                    logger.warning("JSON array is not closed, file may be truncated")
+                return
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != '[':
+                raise ValueError("Expected JSON array")
+            started = True
+            position += 1
+            continue
+        if char == ',':
+            position += 1
+            continue
+        if char == ']':
+            return
+
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if len(buffer) - position > max_buffer_chars:
+                raise ValueError(
+                    f"Tweet record exceeds buffer limit of {max_buffer_chars} characters"
+                )
+            if not read_more():
+                raise
+            continue
+
+        if end == len(buffer) and not eof:
+            # A scalar may continue in the next chunk
+            read_more()
+            continue
+
+        yield element
+        position = end
+
+
+def _iter_jsonl(source: _ByteCounter, max_buffer_chars: int) -> Iterator[Dict]:
+    """
+    Decode one JSON document per line.
+
+    Args:
+        source: Binary file
+        max_buffer_chars: Largest line accepted
+
+    Yields:
+        Decoded documents
+    """
+    for line_number, line in enumerate(source, start=1):
+        if len(line) > max_buffer_chars:
+            logger.error(f"Skipping line {line_number}: exceeds buffer limit")
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.error(f"Skipping invalid JSON on line {line_number}: {e}")
+
+
+def part_byte_range(total_bytes: int, part: Tuple[int, int]) -> Tuple[int, int]:
+    """Get the byte range of part (index, count) of a file, cut into near equal shares."""
+    index, count = part
+    return total_bytes * index // count, total_bytes * (index + 1) // count
+
+
+def iter_tweet_batches(file_path: str,
+                       batch_size: int = 10000,
+                       buffer_limit_mb: int = 256,
+                       progress: Optional[ProgressCallback] = None,
+                       part: Optional[Tuple[int, int]] = None) -> Iterator[List[Dict]]:
+    """
+    Stream tweets from a JSON array or JSONL file in batches.
+
+    A part of a JSONL file holds the lines starting in its share of the
+    file's bytes (see part_byte_range). Only that share is read, so the
+    parts of a file can be loaded on different machines.
+
+    Args:
+        file_path: Path to tweets file
+        batch_size: Maximum number of tweets per batch
+        buffer_limit_mb: Limit for undecoded text plus the pending batch
+        progress: Called after every batch
+        part: (index, count) to read only that part of a JSONL file
+
+    Yields:
+        Lists of tweet dictionaries
+
+    Raises:
+        ValueError: A part of a JSON array file was requested
+    """
+    start, end = 0, os.path.getsize(file_path)
+    if part is not None:
+        start, end = part_byte_range(end, part)
+    total_bytes = end - start
+    buffer_limit = buffer_limit_mb * 1024 * 1024
+    # Half of the limit for raw text, half for decoded tweets
+    max_buffer_chars = buffer_limit // 2
+    max_batch_chars = buffer_limit // 2
+    tweets_loaded = 0
+
+    with open(file_path, 'rb') as file:
+        file_format = _detect_format(file)
+        if part is not None:
+            if file_format == 'array':
+                raise ValueError("Only JSONL files can be read in parts, split JSON arrays beforehand")
+            if start:
+                # The line running into the range belongs to the part before
+                file.seek(start - 1)
+                file.readline()
+        source = _ByteCounter(file, end if part is not None else None)
+        if file_format == 'array':
+            elements = _iter_json_array(source, max_buffer_chars)
+        else:
+            elements = _iter_jsonl(source, max_buffer_chars)
+
+        batch: List[Dict] = []
+        batch_chars = 0
+        for element in elements:
+            if not isinstance(element, dict):
+                logger.warning("Skipping non-object tweet record")
+                continue
+            batch.append(element)
+            batch_chars += len(element.get('text') or '')
+            if len(batch) >= batch_size or batch_chars >= max_batch_chars:
+                tweets_loaded += len(batch)
+                yield batch
+                batch, batch_chars = [], 0
+                if progress:
+                    progress(LoadProgress(source.bytes_read, total_bytes, tweets_loaded))
+
+        if batch:
+            tweets_loaded += len(batch)
+            yield batch
+        if progress:
+            progress(LoadProgress(total_bytes, total_bytes, tweets_loaded))
+
+
+def load_corpus(file_path: str,
+                batch_size: int = 10000,
+                buffer_limit_mb: int = 256,
+                progress: Optional[ProgressCallback] = None,
+                part: Optional[Tuple[int, int]] = None) -> Tuple[TweetStore, InvertedIndex]:
+    """
+    Load tweets file into a TweetStore and its InvertedIndex.
+
+    Tweets are parsed incrementally and each batch goes straight into
+    the column and index builders, so the whole file is never held in
+    memory as JSON text or tweet dictionaries. The builders themselves
+    are in memory: the store columns and index postings grow with the
+    corpus, and buffer_limit_mb does not bound them. Loading a part
+    (see iter_tweet_batches) keeps them to the size of that part.
+
+    Args:
+        file_path: Path to JSON array or JSONL tweets file
+        batch_size: Maximum number of tweets per batch
+        buffer_limit_mb: Limit for parser buffers and the pending batch
+        progress: Called after every batch
+        part: (index, count) to load only that part of a JSONL file,
+            see iter_tweet_batches
+
+    Returns:
+        Tuple of (TweetStore, InvertedIndex)
+    """
+    store_builder = TweetStoreBuilder()
+    index_builder = IndexBuilder()
+
+    for batch in iter_tweet_batches(file_path, batch_size, buffer_limit_mb, progress, part):
+        for tweet in batch:
+            store_builder.add(tweet)
+            index_builder.add(tweet)
+
+    store = store_builder.build()
+    index = InvertedIndex(store, arrays=index_builder.finish())
+    logger.info(f"Loaded {len(store)} tweets from {file_path}")
+    return store, index
@@ -0,0 +1,351 @@
+# src/corpus_snapshot.py
+
+from typing import Dict, Optional, Tuple, Union
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import numpy as np
+from corpus_loader import load_corpus, part_byte_range, ProgressCallback
+from search_index import InvertedIndex
+from tweet_store import METRIC_FIELDS, StringColumn, TweetStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# File signature and layout version; bump the version whenever the
+# layout of sections changes so old snapshots are rebuilt
+SNAPSHOT_MAGIC = b'TWEETSNP'
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Sections start on this boundary so arrays are aligned in memory
+SECTION_ALIGNMENT = 64
+
+# Magic followed by little-endian uint64 header length
+PREAMBLE = struct.Struct('<8sQ')
+
+
+class MappedBytes:
+    """Read-only byte range of a memory map, supporting find and slicing."""
+
+    def __init__(self, mapped: mmap.mmap, offset: int, length: int):
+        self._mapped = mapped
+        self._offset = offset
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        index = self._mapped.find(sub, self._offset + start, self._offset + self._length)
+        return -1 if index == -1 else index - self._offset
+
+    def __getitem__(self, key: slice) -> bytes:
+        start, stop, _ = key.indices(self._length)
+        return self._mapped[self._offset + start:self._offset + stop]
+
+    def __bytes__(self) -> bytes:
+        return self[0:self._length]
+
+
+def default_snapshot_path(source_path: str, snapshot_dir: str) -> str:
+    """
+    Get snapshot location for a tweets file.
+
+    Args:
+        source_path: Path to tweets file
+        snapshot_dir: Directory holding snapshots
+
+    Returns:
+        Snapshot file path, unique per absolute source path
+    """
+    source_id = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(snapshot_dir, f"{os.path.basename(source_path)}.{source_id}.snap")
+
+
+def file_checksum(path: str, part: Optional[Tuple[int, int]] = None) -> str:
+    """Get SHA-256 of a file, or of the bytes of one part of it (see part_byte_range), read in chunks."""
+    digest = hashlib.sha256()
+    start, end = 0, os.path.getsize(path)
+    if part is not None:
+        start, end = part_byte_range(end, part)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(8 * 1024 * 1024, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _sections(store: TweetStore, index: InvertedIndex) -> Dict[str, Union[np.ndarray, bytes]]:
+    """Collect arrays and byte blobs to write, by section name."""
+    sections: Dict[str, Union[np.ndarray, bytes]] = {}
+
+    def as_bytes(blob):
+        # Blobs of an already mapped snapshot are copied out of the mapping
+        return blob[0:len(blob)] if isinstance(blob, MappedBytes) else blob
+
+    def add_strings(name: str, column):
+        if not isinstance(column, StringColumn):
+            column = StringColumn.from_strings(column)
+        sections[f'{name}.heap'] = as_bytes(column.heap)
+        sections[f'{name}.offsets'] = np.asarray(column.offsets, dtype=np.int64)
+
+    add_strings('store.ids', store.ids)
+    add_strings('store.texts', store.texts)
+    add_strings('store.created_at', store.created_at)
+    add_strings('store.author_names', store.author_names)
+    sections['store.timestamps'] = store.timestamps
+    sections['store.author_codes'] = store.author_codes
+    sections['store.engagement'] = store.engagement
+    sections['store.is_retweet'] = store.is_retweet
+    sections['store.is_reply'] = store.is_reply
+    for field in METRIC_FIELDS:
+        sections[f'store.metrics.{field}'] = store.metrics[field]
+    if store.lang_codes is not None:
+        sections['store.lang_codes'] = store.lang_codes
+
+    add_strings('index.author_names', index.author_names)
+    sections['index.all_docs'] = index.all_docs
+    sections['index.years'] = index.years
+    sections['index.langs'] = index.langs
+    sections['index.authors'] = index.authors
+    for name, flags in index.tweet_filters.items():
+        sections[f'index.filters.{name}'] = flags
+    sections['index.vocab_blob'] = as_bytes(index.vocab_blob)
+    sections['index.vocab_starts'] = index.vocab_starts
+    sections['index.doc_offsets'] = index.doc_offsets
+    sections['index.doc_ids'] = index.doc_ids
+    sections['index.pos_offsets'] = index.pos_offsets
+    sections['index.positions'] = index.positions
+    return sections
+
+
+def _align(offset: int) -> int:
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+
+def write_snapshot(path: str, store: TweetStore, index: InvertedIndex, source: Dict):
+    """
+    Write store and index to a snapshot file.
+
+    The file is written next to its destination and moved into place, so
+    readers never see a partial snapshot.
+
+    Args:
+        path: Snapshot file path
+        store: Tweet columns
+        index: Search index over the store
+        source: Size, mtime_ns and sha256 of the tweets file
+    """
+    sections = _sections(store, index)
+
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        if isinstance(data, np.ndarray):
+            entry = {"dtype": data.dtype.str, "length": len(data), "nbytes": data.nbytes}
+        else:
+            entry = {"nbytes": len(data)}
+        offset = _align(offset)
+        entry["offset"] = offset
+        layout[name] = entry
+        offset += entry["nbytes"]
+
+    header = json.dumps({
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "source": source,
+        "tweet_count": len(store),
+        "store_lang_names": store.lang_names,
+        "index_lang_names": index.lang_names,
+        "sections": layout
+    }).encode('utf-8')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(PREAMBLE.pack(SNAPSHOT_MAGIC, len(header)))
+            f.write(header)
+            data_start = _align(PREAMBLE.size + len(header))
+            for name, data in sections.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(memoryview(data).cast('B') if isinstance(data, np.ndarray) else data)
+            f.truncate(data_start + offset)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    logger.info(f"Wrote corpus snapshot {path} ({data_start + offset} bytes)")
+
+
+def _read_header(path: str) -> Optional[Tuple[Dict, int]]:
+    """Read snapshot header and the offset where section data starts."""
+    try:
+        with open(path, 'rb') as f:
+            magic, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != SNAPSHOT_MAGIC:
+                return None
+            header = json.loads(f.read(header_length))
+        if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            return None
+        return header, _align(PREAMBLE.size + header_length)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def read_snapshot_header(path: str) -> Optional[Dict]:
+    """
+    Read snapshot header without mapping the file.
+
+    Args:
+        path: Snapshot file path
+
+    Returns:
+        Header dictionary, or None if the file is missing or not a
+        snapshot of the current format version
+    """
+    result = _read_header(path)
+    return result[0] if result is not None else None
+
+
+def open_snapshot(path: str) -> Tuple[TweetStore, InvertedIndex]:
+    """
+    Memory-map a snapshot read-only.
+
+    Columns, strings and postings are served straight from the mapping,
+    so opening costs the same for any corpus size and all processes on a
+    host share the same pages.
+
+    Args:
+        path: Snapshot file path
+
+    Returns:
+        Tuple of (TweetStore, InvertedIndex)
+    """
+    result = _read_header(path)
+    if result is None:
+        raise ValueError(f"Not a valid snapshot: {path}")
+    header, data_start = result
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    layout = header["sections"]
+
+    def array(name: str) -> np.ndarray:
+        entry = layout[name]
+        return np.frombuffer(
+            mapped,
+            dtype=np.dtype(entry["dtype"]),
+            count=entry["length"],
+            offset=data_start + entry["offset"]
+        )
+
+    def blob(name: str) -> MappedBytes:
+        entry = layout[name]
+        return MappedBytes(mapped, data_start + entry["offset"], entry["nbytes"])
+
+    def strings(name: str) -> StringColumn:
+        return StringColumn(blob(f'{name}.heap'), array(f'{name}.offsets'))
+
+    store = TweetStore(
+        ids=strings('store.ids'),
+        texts=strings('store.texts'),
+        created_at=strings('store.created_at'),
+        timestamps=array('store.timestamps'),
+        author_codes=array('store.author_codes'),
+        author_names=strings('store.author_names'),
+        metrics={field: array(f'store.metrics.{field}') for field in METRIC_FIELDS},
+        lang_codes=array('store.lang_codes') if 'store.lang_codes' in layout else None,
+        lang_names=header["store_lang_names"],
+        engagement=array('store.engagement'),
+        is_retweet=array('store.is_retweet'),
+        is_reply=array('store.is_reply')
+    )
+
+    index = InvertedIndex(store, arrays={
+        'all_docs': array('index.all_docs'),
+        'years': array('index.years'),
+        'langs': array('index.langs'),
+        'lang_names': header["index_lang_names"],
+        'authors': array('index.authors'),
+        'author_names': strings('index.author_names'),
+        'tweet_filters': {
+            name.rsplit('.', 1)[1]: array(name)
+            for name in layout if name.startswith('index.filters.')
+        },
+        'vocab_blob': blob('index.vocab_blob'),
+        'vocab_starts': array('index.vocab_starts'),
+        'doc_offsets': array('index.doc_offsets'),
+        'doc_ids': array('index.doc_ids'),
+        'pos_offsets': array('index.pos_offsets'),
+        'positions': array('index.positions')
+    })
+
+    logger.info(f"Opened corpus snapshot {path}: {header['tweet_count']} tweets")
+    return store, index
+
+
+def open_corpus(source_path: str,
+                snapshot_dir: str,
+                batch_size: int = 10000,
+                buffer_limit_mb: int = 256,
+                progress: Optional[ProgressCallback] = None,
+                part: Optional[Tuple[int, int]] = None) -> Tuple[TweetStore, InvertedIndex]:
+    """
+    Open a tweets file (or a part of it) through its snapshot, rebuilding it when stale.
+
+    A snapshot is reused when the source file size and mtime match, or
+    when only the mtime changed and the SHA-256 checksum still matches.
+    Otherwise the source is streamed with load_corpus and a new snapshot
+    is written.
+
+    Args:
+        source_path: Path to JSON array or JSONL tweets file
+        snapshot_dir: Directory holding snapshots
+        batch_size: Maximum number of tweets per batch when rebuilding
+        buffer_limit_mb: Loader buffer limit when rebuilding, see load_corpus
+        progress: Called after every batch when rebuilding
+        part: (index, count) to open only that part of a JSONL file, with
+            a snapshot of its own, see load_corpus
+
+    Returns:
+        Tuple of (TweetStore, InvertedIndex)
+    """
+    snapshot_path = default_snapshot_path(source_path, snapshot_dir)
+    if part is not None:
+        snapshot_path = f"{snapshot_path[:-len('.snap')]}.part{part[0]}-{part[1]}.snap"
+    stat = os.stat(source_path)
+    header = read_snapshot_header(snapshot_path)
+
+    if header is not None:
+        source = header["source"]
+        if source["size"] == stat.st_size and source.get("part") == (list(part) if part is not None else None):
+            if (source["mtime_ns"] == stat.st_mtime_ns
+                    or source["sha256"] == file_checksum(source_path, part)):
+                return open_snapshot(snapshot_path)
+        logger.info(f"Snapshot {snapshot_path} is stale, rebuilding")
+
+    store, index = load_corpus(source_path, batch_size, buffer_limit_mb, progress, part)
+    source = {
+        "path": os.path.abspath(source_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_checksum(source_path, part)
+    }
+    if part is not None:
+        source["part"] = list(part)
+    try:
+        write_snapshot(snapshot_path, store, index, source)
+    except OSError as e:
+        logger.error(f"Could not write corpus snapshot: {e}")
+        return store, index
+    return open_snapshot(snapshot_path)
@@ -0,0 +1,319 @@
+# src/distributed_search.py
+
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import itertools
+import logging
+import time
+import numpy as np
+from ranking import top_k_positions
+from shard_server import ProtocolError, encode_frame, read_frame
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+# Latencies kept per shard for the hedge delay
+LATENCY_WINDOW = 200
+
+# Latencies needed before the percentile is trusted
+MIN_LATENCY_SAMPLES = 20
+
+
+class ShardUnavailable(Exception):
+    """A shard (or too many shards) could not answer."""
+
+
+class DistributedResult(NamedTuple):
+    """Merged answer of the shard servers."""
+    tweets: List[Dict]  # Best matching tweets, best first
+    scores: np.ndarray  # Score of each tweet
+    total: int  # Number of matches on the shards that answered
+    failed_shards: List[int]  # Shards left out because they failed or timed out
+
+
+def parse_shard_servers(spec: str) -> List[List[Address]]:
+    """
+    Parse shard server addresses.
+
+    Args:
+        spec: host:port per shard, comma-separated; replicas of a shard
+            joined by |, e.g. "127.0.0.1:7101|127.0.0.1:7111,127.0.0.1:7102"
+
+    Returns:
+        List of replica addresses per shard
+    """
+    shards = []
+    for shard in filter(None, (part.strip() for part in spec.split(','))):
+        replicas = []
+        for replica in shard.split('|'):
+            host, _, port = replica.strip().rpartition(':')
+            replicas.append((host or '127.0.0.1', int(port)))
+        shards.append(replicas)
+    return shards
+
+
+class ShardConnection:
+    """
+    Persistent connection to one shard server.
+
+    Requests are multiplexed by id, so concurrent requests share the
+    connection. The connection belongs to the event loop that opened it
+    and is reopened when used from another loop or after it broke.
+    """
+
+    def __init__(self, address: Address, connect_timeout: float = 1.0):
+        self.address = address
+        self.connect_timeout = connect_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connecting: Optional[asyncio.Task] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+
+    def __repr__(self) -> str:
+        return f"{self.address[0]}:{self.address[1]}"
+
+    def _connected(self, loop: asyncio.AbstractEventLoop) -> bool:
+        return self._loop is loop and self._writer is not None and not self._writer.is_closing()
+
+    async def _open(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(*self.address), self.connect_timeout
+        )
+        self._writer = writer
+        self._reader_task = asyncio.create_task(self._read_responses(reader, writer))
+
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Resolve pending requests as their responses arrive."""
+        error: Exception = ShardUnavailable(f"{self} closed the connection")
+        try:
+            while True:
+                response = await read_frame(reader)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except asyncio.IncompleteReadError:
+            pass
+        except (ProtocolError, ConnectionError, OSError) as e:
+            error = ShardUnavailable(f"{self}: {e}")
+        finally:
+            writer.close()
+            if self._writer is writer:
+                self._writer = None
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _ensure_connected(self):
+        loop = asyncio.get_running_loop()
+        if self._connected(loop):
+            return
+        if self._loop is not loop:
+            # Objects of another loop cannot be used here
+            self._loop = loop
+            self._writer = None
+            self._connecting = None
+            self._pending = {}
+        if self._connecting is None or self._connecting.done():
+            self._connecting = asyncio.create_task(self._open())
+        try:
+            await asyncio.shield(self._connecting)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ShardUnavailable(f"Cannot connect to {self}: {e!r}")
+
+    async def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a request and wait for its response.
+
+        Raises:
+            ShardUnavailable: Connection failed or closed before the response
+        """
+        await self._ensure_connected()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(encode_frame({**message, "id": request_id}))
+            await self._writer.drain()
+            return await future
+        except (ConnectionError, OSError) as e:
+            raise ShardUnavailable(f"{self}: {e}")
+        finally:
+            self._pending.pop(request_id, None)
+
+    def close(self):
+        """Close the connection."""
+        if self._writer is not None:
+            self._writer.close()
+
+
+class DistributedSearch:
+    """
+    Scatter-gather search over shard servers (see shard_server.py).
+
+    A query goes to every shard at once and the best matches of the
+    shards that answer are merged. Each shard has a timeout; shards that
+    fail or time out are left out and reported, and the search fails
+    only when fewer than min_shards answer.
+
+    Slow shards get a hedged request: when a shard has not answered
+    within a high percentile of its recent latencies, the same request
+    goes to its next replica and the first answer wins; shards with one
+    server are not hedged. A failed replica is replaced by the next one
+    right away.
+    """
+
+    def __init__(self,
+                 shards: List[List[Address]],
+                 timeout: float = 2.0,
+                 hedge_percentile: float = 95,
+                 hedge_min_seconds: float = 0.05,
+                 min_shards: int = 1):
+        """
+        Initialize client.
+
+        Args:
+            shards: Replica addresses of every shard, see parse_shard_servers
+            timeout: Seconds a shard gets to answer
+            hedge_percentile: Latency percentile after which a request is hedged
+            hedge_min_seconds: Shortest hedge delay
+            min_shards: Fewest answering shards for a successful search
+        """
+        if not shards or not all(shards):
+            raise ValueError("Every shard needs at least one server")
+        self.replicas = [[ShardConnection(address) for address in replicas] for replicas in shards]
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+        self.min_shards = min_shards
+        self._latencies: List[Deque[float]] = [deque(maxlen=LATENCY_WINDOW) for _ in shards]
+        self._next_replica = [0] * len(shards)
+        self.stats: Counter = Counter()
+
+    def hedge_delay(self, shard: int) -> float:
+        """Seconds to wait for a shard before hedging."""
+        latencies = self._latencies[shard]
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return max(self.hedge_min_seconds, self.timeout / 2)
+        return max(self.hedge_min_seconds, float(np.percentile(latencies, self.hedge_percentile)))
+
+    async def _query_shard(self, shard: int, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the answer of one shard, hedging and failing over between replicas.
+
+        Raises:
+            ShardUnavailable: No replica answered in time
+        """
+        replicas = self.replicas[shard]
+        first = self._next_replica[shard]
+        self._next_replica[shard] = (first + 1) % len(replicas)
+        order = [replicas[(first + i) % len(replicas)] for i in range(len(replicas))]
+        # A lone server runs searches one at a time, so a repeat would only
+        # queue behind the slow request; only other replicas are tried
+        backups = iter(order[1:])
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.timeout
+        hedge_at = started + self.hedge_delay(shard)
+        attempts = {asyncio.create_task(order[0].request(message)): 0}
+        errors = []
+        try:
+            while attempts:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                wake = min(deadline, hedge_at) if hedge_at > now else deadline
+                done, _ = await asyncio.wait(attempts, timeout=wake - now, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    hedged = attempts.pop(task)
+                    error = task.exception()
+                    if error is None and task.result().get('ok'):
+                        self._latencies[shard].append(loop.time() - started)
+                        if hedged:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    errors.append(str(error or task.result().get('error')))
+
+                if (done or loop.time() >= hedge_at) and loop.time() < deadline:
+                    # A failure is replaced at once, a slow request is hedged
+                    backup = next(backups, None)
+                    if backup is not None:
+                        if not done:
+                            self.stats['hedges'] += 1
+                        attempts[asyncio.create_task(backup.request(message))] = 1
+                    hedge_at = deadline
+                if not attempts:
+                    break
+        finally:
+            for task in attempts:
+                task.cancel()
+
+        if loop.time() >= deadline and not errors:
+            self.stats['timeouts'] += 1
+            raise ShardUnavailable(f"Shard {shard} timed out after {self.timeout}s")
+        self.stats['failures'] += 1
+        raise ShardUnavailable(f"Shard {shard} failed: {'; '.join(errors) or 'timed out'}")
+
+    async def search(self, query: str, limit: Optional[int], filters: Optional[Dict] = None) -> DistributedResult:
+        """
+        Search every shard and merge their best matches.
+
+        Args:
+            query: Raw search query string
+            limit: Maximum number of tweets returned, per shard and in total
+            filters: Advanced search filters, applied by the shards
+
+        Returns:
+            DistributedResult; ties keep shard order
+
+        Raises:
+            ShardUnavailable: Fewer than min_shards shards answered
+        """
+        message = {"op": "search", "query": query, "limit": limit, "filters": filters or {}}
+        started = time.perf_counter()
+        answers = await asyncio.gather(
+            *(self._query_shard(shard, message) for shard in range(len(self.replicas))),
+            return_exceptions=True
+        )
+        self.stats['searches'] += 1
+
+        tweets: List[Dict] = []
+        scores: List[float] = []
+        total = 0
+        failed = []
+        for shard, answer in enumerate(answers):
+            if isinstance(answer, BaseException):
+                logger.warning(f"Search without shard {shard}: {answer}")
+                failed.append(shard)
+                continue
+            tweets.extend(answer['tweets'])
+            scores.extend(answer['scores'])
+            total += answer['total']
+
+        answered = len(self.replicas) - len(failed)
+        if answered < self.min_shards:
+            raise ShardUnavailable(f"Only {answered} of {len(self.replicas)} shards answered")
+        if failed:
+            self.stats['partial'] += 1
+
+        merged = np.array(scores, dtype=np.float32)
+        best = top_k_positions(merged, limit)
+        logger.info(
+            f"Distributed search: {total} matches from {answered} of {len(self.replicas)} shards "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return DistributedResult([tweets[i] for i in best.tolist()], merged[best], total, failed)
+
+    def close(self):
+        """Close all connections."""
+        for replicas in self.replicas:
+            for connection in replicas:
+                connection.close()
@@ -0,0 +1,477 @@
+# src/enrichment.py
+
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import logging
+from tweet_store import parse_timestamp
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SENTIMENT_LABELS = ('positive', 'negative', 'neutral')
+
+# Aggregate sizes
+MAX_TOPICS = 10
+MAX_KEYWORDS = 10
+MAX_KEY_DISCUSSIONS = 5
+MAX_RISING_TOPICS = 3
+MAX_EXAMPLES = 2
+
+# Change of mean sentiment score between the older and newer half of
+# the tweets that counts as a notable shift
+SENTIMENT_SHIFT_THRESHOLD = 0.3
+
+
+def _clamp(value: Any, low: float, high: float, default: float) -> float:
+    try:
+        return min(max(float(value), low), high)
+    except (TypeError, ValueError):
+        return default
+
+
+def _strings(values: Any, limit: int, lower: bool = False) -> List[str]:
+    if not isinstance(values, list):
+        return []
+    result = {}
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            value = value.strip()
+            # Keep the first spelling of values differing only in case
+            result.setdefault(value.lower(), value.lower() if lower else value)
+    return list(result.values())[:limit]
+
+
+def normalize_enrichment(raw: Dict) -> Optional[Dict]:
+    """
+    Validate one per-tweet result returned by GPT.
+
+    Args:
+        raw: Entry of the "tweets" array of TWEET_ENRICHMENT_PROMPT
+
+    Returns:
+        Enrichment with every field present and in range, or None if
+        the entry is not an object
+    """
+    if not isinstance(raw, dict):
+        return None
+
+    sentiment = str(raw.get('sentiment') or '').lower()
+    if sentiment not in SENTIMENT_LABELS:
+        sentiment = 'neutral'
+
+    return {
+        "sentiment": sentiment,
+        "sentiment_score": _clamp(raw.get('sentiment_score'), -1.0, 1.0, 0.0),
+        "emotion": str(raw.get('emotion') or '').strip().lower(),
+        "topics": _strings(raw.get('topics'), 3),
+        "keywords": _strings(raw.get('keywords'), 5, lower=True),
+        "importance": _clamp(raw.get('importance'), 1.0, 10.0, 1.0),
+        "why_important": str(raw.get('why_important') or '')
+    }
+
+
+def _enriched(tweets: List[Dict], enrichments: Dict[str, Dict]) -> List[tuple]:
+    """Pair tweets with their enrichment, skipping tweets without one."""
+    return [
+        (tweet, enrichments[str(tweet.get('id'))])
+        for tweet in tweets
+        if str(tweet.get('id')) in enrichments
+    ]
+
+
+def _by_time(pairs: List[tuple]) -> List[tuple]:
+    """Sort pairs by tweet creation time, oldest first."""
+    return sorted(pairs, key=lambda pair: parse_timestamp(pair[0].get('created_at') or ''))
+
+
+def _topic_groups(pairs: List[tuple]) -> Dict[str, Dict]:
+    """
+    Group tweets by topic, case-insensitively.
+
+    Returns:
+        Dictionary of lowercased topic to its display name and pairs,
+        in order of first mention
+    """
+    groups: Dict[str, Dict] = {}
+    for tweet, enrichment in pairs:
+        for topic in enrichment['topics']:
+            group = groups.setdefault(topic.lower(), {"name": topic, "pairs": []})
+            group["pairs"].append((tweet, enrichment))
+    return groups
+
+
+def _examples(pairs: List[tuple]) -> List[str]:
+    """Get texts of the most important tweets of a group."""
+    ranked = sorted(pairs, key=lambda pair: pair[1]['importance'], reverse=True)
+    return [tweet.get('text', '') for tweet, _ in ranked[:MAX_EXAMPLES]]
+
+
+def build_content_analysis(tweets: List[Dict], enrichments: Dict[str, Dict]) -> Dict[str, Any]:
+    """
+    Aggregate per-tweet enrichments into the content analysis structure.
+
+    Args:
+        tweets: Analyzed tweets
+        enrichments: Dictionary of tweet id to normalized enrichment
+
+    Returns:
+        Dictionary with topics, key_discussions and trends, shaped like
+        the response to SYSTEM_ANALYSIS_PROMPT
+    """
+    pairs = _enriched(tweets, enrichments)
+    groups = _topic_groups(pairs)
+
+    topics = []
+    for group in groups.values():
+        group_pairs = group["pairs"]
+        topics.append({
+            "name": group["name"],
+            "count": len(group_pairs),
+            "importance": round(sum(e['importance'] for _, e in group_pairs) / len(group_pairs)),
+            "context": f"Mentioned in {len(group_pairs)} of {len(pairs)} analyzed tweets",
+            "examples": _examples(group_pairs)
+        })
+    topics.sort(key=lambda topic: (topic["count"], topic["importance"]), reverse=True)
+
+    ranked = sorted(pairs, key=lambda pair: pair[1]['importance'], reverse=True)
+    key_discussions = [
+        {
+            "tweet_text": tweet.get('text', ''),
+            "author": tweet.get('author_id', 'Unknown'),
+            "importance": round(enrichment['importance']),
+            "why_important": enrichment['why_important'],
+            "related_topics": enrichment['topics']
+        }
+        for tweet, enrichment in ranked[:MAX_KEY_DISCUSSIONS]
+    ]
+
+    keyword_counts = Counter(
+        keyword for _, enrichment in pairs for keyword in enrichment['keywords']
+    )
+
+    return {
+        "topics": topics[:MAX_TOPICS],
+        "key_discussions": key_discussions,
+        "trends": {
+            "rising": _rising_topics(pairs),
+            "keywords": [keyword for keyword, _ in keyword_counts.most_common(MAX_KEYWORDS)]
+        }
+    }
+
+
+def _rising_topics(pairs: List[tuple]) -> List[Dict]:
+    """Find topics mentioned more often in the newer half of the tweets."""
+    ordered = _by_time(pairs)
+    middle = len(ordered) // 2
+    older, newer = ordered[:middle], ordered[middle:]
+    if not older or not newer:
+        return []
+
+    older_groups = _topic_groups(older)
+    rising = []
+    for key, group in _topic_groups(newer).items():
+        newer_count = len(group["pairs"])
+        older_count = len(older_groups.get(key, {"pairs": []})["pairs"])
+        growth = newer_count / len(newer) - older_count / len(older)
+        if growth > 0 and newer_count > 1:
+            rising.append((growth, {
+                "topic": group["name"],
+                "context": (
+                    f"{newer_count} of {len(newer)} recent tweets, "
+                    f"up from {older_count} of {len(older)} earlier"
+                )
+            }))
+    rising.sort(key=lambda item: item[0], reverse=True)
+    return [item for _, item in rising[:MAX_RISING_TOPICS]]
+
+
+def build_sentiment_analysis(tweets: List[Dict], enrichments: Dict[str, Dict]) -> Dict[str, Any]:
+    """
+    Aggregate per-tweet enrichments into the sentiment analysis structure.
+
+    Args:
+        tweets: Analyzed tweets
+        enrichments: Dictionary of tweet id to normalized enrichment
+
+    Returns:
+        Dictionary with overall_sentiment, key_sentiments,
+        sentiment_distribution and emotional_patterns, shaped like the
+        response to SENTIMENT_ANALYSIS_PROMPT
+    """
+    pairs = _enriched(tweets, enrichments)
+    distribution = Counter(enrichment['sentiment'] for _, enrichment in pairs)
+
+    if pairs:
+        score = sum(e['sentiment_score'] for _, e in pairs) / len(pairs)
+        label, count = max(
+            ((label, distribution[label]) for label in SENTIMENT_LABELS),
+            key=lambda item: item[1]
+        )
+        summary = f"Mostly {label} ({count} of {len(pairs)} tweets)"
+    else:
+        score, summary = 0.0, "No tweets could be analyzed"
+
+    key_sentiments = []
+    groups = sorted(_topic_groups(pairs).values(), key=lambda g: len(g["pairs"]), reverse=True)
+    for group in groups[:MAX_TOPICS]:
+        labels = Counter(e['sentiment'] for _, e in group["pairs"])
+        key_sentiments.append({
+            "topic": group["name"],
+            "sentiment": labels.most_common(1)[0][0],
+            "examples": _examples(group["pairs"])
+        })
+
+    emotions = Counter(e['emotion'] for _, e in pairs if e['emotion'])
+
+    return {
+        "overall_sentiment": {
+            "score": round(score, 2),
+            "summary": summary,
+            # Share of the tweets that have a per-tweet result
+            "confidence": round(len(pairs) / len(tweets), 2) if tweets else 0
+        },
+        "key_sentiments": key_sentiments,
+        "sentiment_distribution": {label: distribution[label] for label in SENTIMENT_LABELS},
+        "emotional_patterns": {
+            "primary_emotions": [emotion for emotion, _ in emotions.most_common(3)],
+            "notable_shifts": _sentiment_shifts(pairs)
+        }
+    }
+
+
+def _sentiment_shifts(pairs: List[tuple]) -> List[str]:
+    """Describe a change of mean sentiment between older and newer tweets."""
+    ordered = _by_time(pairs)
+    middle = len(ordered) // 2
+    older, newer = ordered[:middle], ordered[middle:]
+    if not older or not newer:
+        return []
+
+    older_score = sum(e['sentiment_score'] for _, e in older) / len(older)
+    newer_score = sum(e['sentiment_score'] for _, e in newer) / len(newer)
+    change = newer_score - older_score
+    if abs(change) < SENTIMENT_SHIFT_THRESHOLD:
+        return []
+    direction = "positive" if change > 0 else "negative"
+    return [f"Sentiment turned more {direction} over time ({older_score:.2f} to {newer_score:.2f})"]
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _items(value: Any) -> List[Dict]:
+    """Get dictionaries of a list returned by GPT, dropping anything else."""
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+
+def merge_content_analyses(partials: List[Dict]) -> Dict[str, Any]:
+    """
+    Merge content analyses of separate chunks of tweets.
+
+    Topic counts are summed and importance averaged weighted by count;
+    key discussions, rising topics and keywords are ranked across all
+    chunks.
+
+    Args:
+        partials: Content analyses shaped like the response to
+            SYSTEM_ANALYSIS_PROMPT
+
+    Returns:
+        Merged content analysis of the same shape
+    """
+    topics: Dict[str, Dict] = {}
+    discussions = []
+    rising: Dict[str, Dict] = {}
+    keyword_scores: Counter = Counter()
+    keyword_names: Dict[str, str] = {}
+
+    for partial in partials:
+        for topic in _items(partial.get('topics')):
+            name = str(topic.get('name') or '').strip()
+            if not name:
+                continue
+            count = max(_number(topic.get('count'), 1), 0)
+            merged = topics.setdefault(name.lower(), {
+                "name": name, "count": 0, "weight": 0.0, "context": "", "examples": []
+            })
+            merged["count"] += int(count)
+            merged["weight"] += _number(topic.get('importance'), 1) * count
+            merged["context"] = merged["context"] or str(topic.get('context') or '')
+            merged["examples"].extend(
+                example for example in topic.get('examples') or [] if isinstance(example, str)
+            )
+
+        discussions.extend(
+            discussion for discussion in _items(partial.get('key_discussions'))
+            if discussion.get('tweet_text')
+        )
+
+        trends = partial.get('trends') if isinstance(partial.get('trends'), dict) else {}
+        for trend in _items(trends.get('rising')):
+            topic = str(trend.get('topic') or '').strip()
+            if topic:
+                entry = rising.setdefault(topic.lower(), {"topic": topic, "context": "", "chunks": 0})
+                entry["chunks"] += 1
+                entry["context"] = entry["context"] or str(trend.get('context') or '')
+
+        keywords = [k for k in trends.get('keywords') or [] if isinstance(k, str) and k.strip()]
+        for rank, keyword in enumerate(keywords):
+            # Keywords are listed most frequent first within each chunk
+            keyword_scores[keyword.lower()] += len(keywords) - rank
+            keyword_names.setdefault(keyword.lower(), keyword)
+
+    merged_topics = [
+        {
+            "name": topic["name"],
+            "count": topic["count"],
+            "importance": round(topic["weight"] / topic["count"]) if topic["count"] else 1,
+            "context": topic["context"],
+            "examples": topic["examples"][:MAX_EXAMPLES]
+        }
+        for topic in topics.values()
+    ]
+    merged_topics.sort(key=lambda topic: (topic["count"], topic["importance"]), reverse=True)
+    discussions.sort(key=lambda discussion: _number(discussion.get('importance')), reverse=True)
+    merged_rising = sorted(rising.values(), key=lambda trend: trend["chunks"], reverse=True)
+
+    return {
+        "topics": merged_topics[:MAX_TOPICS],
+        "key_discussions": discussions[:MAX_KEY_DISCUSSIONS],
+        "trends": {
+            "rising": [
+                {"topic": trend["topic"], "context": trend["context"]}
+                for trend in merged_rising[:MAX_RISING_TOPICS]
+            ],
+            "keywords": [
+                keyword_names[keyword]
+                for keyword, _ in keyword_scores.most_common(MAX_KEYWORDS)
+            ]
+        }
+    }
+
+
+def merge_sentiment_analyses(partials: List[tuple]) -> Dict[str, Any]:
+    """
+    Merge sentiment analyses of separate chunks of tweets.
+
+    Distributions are summed; scores and confidence are averaged
+    weighted by chunk size.
+
+    Args:
+        partials: Tuples of (sentiment analysis shaped like the response
+            to SENTIMENT_ANALYSIS_PROMPT, number of tweets in the chunk)
+
+    Returns:
+        Merged sentiment analysis of the same shape
+    """
+    distribution: Counter = Counter()
+    total_size = 0
+    score = 0.0
+    confidence = 0.0
+    topics: Dict[str, Dict] = {}
+    emotions: Counter = Counter()
+    shifts: List[str] = []
+
+    for partial, size in partials:
+        overall = partial.get('overall_sentiment')
+        overall = overall if isinstance(overall, dict) else {}
+        total_size += size
+        score += _clamp(overall.get('score'), -1.0, 1.0, 0.0) * size
+        confidence += _clamp(overall.get('confidence'), 0.0, 1.0, 0.0) * size
+
+        chunk_distribution = partial.get('sentiment_distribution')
+        if isinstance(chunk_distribution, dict):
+            for label in SENTIMENT_LABELS:
+                distribution[label] += int(max(_number(chunk_distribution.get(label)), 0))
+
+        for sentiment in _items(partial.get('key_sentiments')):
+            topic = str(sentiment.get('topic') or '').strip()
+            if not topic:
+                continue
+            merged = topics.setdefault(topic.lower(), {"topic": topic, "labels": Counter(), "examples": []})
+            merged["labels"][str(sentiment.get('sentiment') or 'neutral').lower()] += 1
+            merged["examples"].extend(
+                example for example in sentiment.get('examples') or [] if isinstance(example, str)
+            )
+
+        patterns = partial.get('emotional_patterns')
+        patterns = patterns if isinstance(patterns, dict) else {}
+        emotions.update(
+            emotion.lower() for emotion in patterns.get('primary_emotions') or []
+            if isinstance(emotion, str)
+        )
+        shifts.extend(shift for shift in patterns.get('notable_shifts') or [] if isinstance(shift, str))
+
+    counted = sum(distribution.values())
+    if counted:
+        label, count = max(
+            ((label, distribution[label]) for label in SENTIMENT_LABELS),
+            key=lambda item: item[1]
+        )
+        summary = f"Mostly {label} ({count} of {counted} tweets)"
+    else:
+        summary = "No tweets could be analyzed"
+
+    merged_topics = sorted(topics.values(), key=lambda t: sum(t["labels"].values()), reverse=True)
+
+    return {
+        "overall_sentiment": {
+            "score": round(score / total_size, 2) if total_size else 0,
+            "summary": summary,
+            "confidence": round(confidence / total_size, 2) if total_size else 0
+        },
+        "key_sentiments": [
+            {
+                "topic": topic["topic"],
+                "sentiment": topic["labels"].most_common(1)[0][0],
+                "examples": topic["examples"][:MAX_EXAMPLES]
+            }
+            for topic in merged_topics[:MAX_TOPICS]
+        ],
+        "sentiment_distribution": {label: distribution[label] for label in SENTIMENT_LABELS},
+        "emotional_patterns": {
+            "primary_emotions": [emotion for emotion, _ in emotions.most_common(3)],
+            "notable_shifts": list(dict.fromkeys(shifts))[:3]
+        }
+    }
+
+
+def apply_summary(content: Optional[Dict], sentiment: Optional[Dict], summary: Dict):
+    """
+    Apply the final summarization pass to merged analyses in place.
+
+    Args:
+        content: Merged content analysis, if any
+        sentiment: Merged sentiment analysis, if any
+        summary: Response to ANALYSIS_SUMMARY_PROMPT
+    """
+    if not isinstance(summary, dict):
+        return
+
+    if content is not None:
+        contexts = {
+            str(topic.get('name') or '').lower(): topic.get('context')
+            for topic in _items(summary.get('topics'))
+        }
+        for topic in content.get('topics', []):
+            context = contexts.get(topic['name'].lower())
+            if isinstance(context, str) and context:
+                topic['context'] = context
+        rising = [
+            {"topic": str(trend['topic']), "context": str(trend.get('context') or '')}
+            for trend in _items(summary.get('rising')) if trend.get('topic')
+        ]
+        if rising:
+            content['trends']['rising'] = rising[:MAX_RISING_TOPICS]
+
+    if sentiment is not None:
+        if isinstance(summary.get('sentiment_summary'), str) and summary['sentiment_summary']:
+            sentiment['overall_sentiment']['summary'] = summary['sentiment_summary']
+        shifts = [shift for shift in summary.get('notable_shifts') or [] if isinstance(shift, str)]
+        if shifts:
+            sentiment['emotional_patterns']['notable_shifts'] = shifts[:3]
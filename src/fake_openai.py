@@ -0,0 +1,416 @@
+# src/fake_openai.py
+
+from collections import Counter
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import time
+import httpx
+from openai import InternalServerError, RateLimitError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from search_prompts import (
+    SYSTEM_ANALYSIS_PROMPT,
+    FUSED_ANALYSIS_PROMPT,
+    SEMANTIC_SEARCH_PROMPT,
+    SENTIMENT_ANALYSIS_PROMPT,
+    TWEET_ENRICHMENT_PROMPT,
+    ANALYSIS_SUMMARY_PROMPT
+)
+from token_budget import CHARS_PER_TOKEN, count_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ('constant', 'uniform', 'exponential', 'lognormal')
+
+# Characters per streamed chunk, roughly what the API sends
+STREAM_CHUNK_CHARS = 16
+
+WORD_PATTERN = re.compile(r'[a-z][a-z0-9]{3,}')
+STOP_WORDS = {
+    'this', 'that', 'with', 'from', 'have', 'will', 'just', 'about', 'what',
+    'your', 'they', 'their', 'there', 'been', 'more', 'into', 'than', 'some',
+    'when', 'were', 'would', 'could', 'should', 'https', 'http'
+}
+POSITIVE_WORDS = {
+    'bull', 'bullish', 'moon', 'great', 'good', 'love', 'amazing', 'gains',
+    'growth', 'excited', 'launch', 'success', 'win', 'best', 'strong', 'up'
+}
+NEGATIVE_WORDS = {
+    'bear', 'bearish', 'scam', 'crash', 'dump', 'bad', 'hack', 'hacked', 'loss',
+    'fear', 'worst', 'fraud', 'rug', 'down', 'weak', 'ban'
+}
+EMOTIONS = {'positive': 'excitement', 'negative': 'concern', 'neutral': 'curiosity'}
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in WORD_PATTERN.findall((text or '').lower()) if word not in STOP_WORDS]
+
+
+def _unit(*parts: Any) -> float:
+    """Deterministic number in [0, 1) derived from parts."""
+    digest = hashlib.sha1(':'.join(map(str, parts)).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def _sentiment(tweet: Dict) -> float:
+    """Sentiment score of a tweet from a small lexicon, hashed if no word matches."""
+    words = set(WORD_PATTERN.findall((tweet.get('text') or '').lower()))
+    positive = len(words & POSITIVE_WORDS)
+    negative = len(words & NEGATIVE_WORDS)
+    if positive or negative:
+        return round((positive - negative) / (positive + negative), 2)
+    return round(_unit('sentiment', tweet.get('text')) * 0.6 - 0.3, 2)
+
+
+def _label(score: float) -> str:
+    if score > 0.2:
+        return 'positive'
+    if score < -0.2:
+        return 'negative'
+    return 'neutral'
+
+
+def _importance(tweet: Dict) -> int:
+    return 1 + int(_unit('importance', tweet.get('text')) * 10)
+
+
+def _top_words(tweets: List[Dict], limit: int) -> List[tuple]:
+    counts: Counter = Counter()
+    for tweet in tweets:
+        counts.update(set(_words(tweet.get('text'))))
+    return counts.most_common(limit)
+
+
+def _tweets(payload: Any) -> List[Dict]:
+    if isinstance(payload, dict):
+        payload = payload.get('tweets', [])
+    return [tweet for tweet in payload or [] if isinstance(tweet, dict)]
+
+
+def content_response(payload: Any) -> Dict:
+    """Response to SYSTEM_ANALYSIS_PROMPT."""
+    tweets = _tweets(payload)
+    top = _top_words(tweets, 8)
+    topics = []
+    for word, count in top[:5]:
+        examples = [t.get('text', '')[:120] for t in tweets if word in _words(t.get('text'))][:2]
+        topics.append({
+            "name": word.capitalize(),
+            "count": count,
+            "importance": min(10, 3 + count),
+            "context": f"Tweets discussing {word}",
+            "examples": examples
+        })
+    ranked = sorted(tweets, key=_importance, reverse=True)[:5]
+    return {
+        "topics": topics,
+        "key_discussions": [
+            {
+                "n": tweet.get('n'),
+                "importance": _importance(tweet),
+                "why_important": "Drives discussion around " + (_words(tweet.get('text')) or ['the topic'])[0],
+                "related_topics": [word.capitalize() for word in _words(tweet.get('text'))[:2]]
+            }
+            for tweet in ranked
+        ],
+        "trends": {
+            "rising": [
+                {"topic": word.capitalize(), "context": f"Mentioned in {count} tweets"}
+                for word, count in top[:3]
+            ],
+            "keywords": [word for word, _ in top[:5]]
+        }
+    }
+
+
+def sentiment_response(payload: Any) -> Dict:
+    """Response to SENTIMENT_ANALYSIS_PROMPT."""
+    tweets = _tweets(payload)
+    scores = [_sentiment(tweet) for tweet in tweets]
+    labels = [_label(score) for score in scores]
+    distribution = {label: labels.count(label) for label in ('positive', 'negative', 'neutral')}
+    overall = round(sum(scores) / len(scores), 2) if scores else 0.0
+    key_sentiments = []
+    for word, _ in _top_words(tweets, 3):
+        related = [(t, l) for t, l in zip(tweets, labels) if word in _words(t.get('text'))]
+        label = Counter(l for _, l in related).most_common(1)[0][0]
+        key_sentiments.append({
+            "topic": word.capitalize(),
+            "sentiment": label,
+            "examples": [t.get('text', '')[:120] for t, _ in related[:2]]
+        })
+    return {
+        "overall_sentiment": {
+            "score": overall,
+            "summary": f"Mostly {_label(overall)} discussion",
+            "confidence": round(min(1.0, 0.5 + len(tweets) / 100), 2)
+        },
+        "key_sentiments": key_sentiments,
+        "sentiment_distribution": distribution,
+        "emotional_patterns": {
+            "primary_emotions": sorted({EMOTIONS[label] for label in labels}),
+            "notable_shifts": []
+        }
+    }
+
+
+def fused_response(payload: Any) -> Dict:
+    """Response to FUSED_ANALYSIS_PROMPT."""
+    return {**content_response(payload), "sentiment": sentiment_response(payload)}
+
+
+def search_response(payload: Any) -> Dict:
+    """Response to SEMANTIC_SEARCH_PROMPT."""
+    query = payload.get('query', '') if isinstance(payload, dict) else ''
+    terms = set(_words(query)) or set(WORD_PATTERN.findall(query.lower()))
+    matches = []
+    for tweet in _tweets(payload):
+        found = sorted(terms & set(WORD_PATTERN.findall((tweet.get('text') or '').lower())))
+        score = (len(found) / len(terms) if terms else 0) * 0.7 + _unit('relevance', query, tweet.get('text')) * 0.3
+        if score >= 0.3:
+            matches.append({
+                "n": tweet.get('n'),
+                "relevance_score": round(score, 2),
+                "relevance_explanation": f"Mentions {', '.join(found)}" if found else "Related to the query topic",
+                "matched_concepts": found
+            })
+    matches.sort(key=lambda match: match['relevance_score'], reverse=True)
+    return {
+        "matches": matches,
+        "search_metadata": {
+            "query_interpretation": f"Tweets about {query}",
+            "related_topics": [word.capitalize() for word, _ in _top_words(_tweets(payload), 3)],
+            "suggested_queries": [f"{query} news", f"{query} price"]
+        }
+    }
+
+
+def enrichment_response(payload: Any) -> Dict:
+    """Response to TWEET_ENRICHMENT_PROMPT."""
+    results = []
+    for tweet in _tweets(payload):
+        score = _sentiment(tweet)
+        label = _label(score)
+        words = _words(tweet.get('text'))
+        results.append({
+            "n": tweet.get('n'),
+            "sentiment": label,
+            "sentiment_score": score,
+            "emotion": EMOTIONS[label],
+            "topics": [word.capitalize() for word in words[:2]] or ["General"],
+            "keywords": words[:5],
+            "importance": _importance(tweet),
+            "why_important": f"Shares a {label} view on " + (words[0] if words else "the market")
+        })
+    return {"tweets": results}
+
+
+def summary_response(payload: Any) -> Dict:
+    """Response to ANALYSIS_SUMMARY_PROMPT."""
+    payload = payload if isinstance(payload, dict) else {}
+    topics = payload.get('topics') or []
+    summary: Dict[str, Any] = {
+        "topics": [
+            {"name": topic.get('name'), "context": f"{topic.get('name')} across {topic.get('count', 0)} tweets"}
+            for topic in topics if isinstance(topic, dict)
+        ],
+        "rising": [
+            {"topic": topic.get('name'), "context": "Growing across batches"}
+            for topic in topics[:2] if isinstance(topic, dict)
+        ]
+    }
+    if 'sentiment' in payload or 'sentiment_distribution' in payload:
+        summary["sentiment_summary"] = "Sentiment is mixed across batches"
+        summary["notable_shifts"] = []
+    return summary
+
+
+# Canned response builder for each system prompt
+RESPONDERS: Dict[str, Callable[[Any], Dict]] = {
+    SYSTEM_ANALYSIS_PROMPT: content_response,
+    FUSED_ANALYSIS_PROMPT: fused_response,
+    SEMANTIC_SEARCH_PROMPT: search_response,
+    SENTIMENT_ANALYSIS_PROMPT: sentiment_response,
+    TWEET_ENRICHMENT_PROMPT: enrichment_response,
+    ANALYSIS_SUMMARY_PROMPT: summary_response
+}
+
+
+def canned_response(system_prompt: str, content: str) -> str:
+    """
+    Build a schema-valid response for a request.
+
+    Args:
+        system_prompt: One of the prompts in search_prompts
+        content: JSON user message
+
+    Returns:
+        JSON response text, derived only from the request
+    """
+    responder = RESPONDERS.get(system_prompt)
+    if responder is None:
+        logger.warning("Fake OpenAI got an unknown prompt, returning an empty object")
+        return '{}'
+    try:
+        payload = json.loads(content)
+    except json.JSONDecodeError:
+        payload = []
+    return json.dumps(responder(payload), ensure_ascii=False)
+
+
+class FakeAsyncClient:
+    """
+    Local stand-in for openai.AsyncClient chat completions.
+
+    Responses are built from the request, so the same request always
+    gets the same answer. Latency and injected failures are drawn from a
+    seeded generator. Streamed responses arrive in chunks paced by
+    tokens_per_second after the first-token latency.
+    """
+
+    def __init__(self,
+                 latency_ms: float = 800,
+                 latency_distribution: str = 'lognormal',
+                 latency_sigma: float = 0.5,
+                 tokens_per_second: float = 200,
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 retry_after_seconds: float = 1.0,
+                 seed: int = 0):
+        """
+        Initialize the fake.
+
+        Args:
+            latency_ms: Median time to first token
+            latency_distribution: One of LATENCY_DISTRIBUTIONS
+            latency_sigma: Spread of the lognormal distribution
+            tokens_per_second: Completion speed; 0 returns the whole response at once
+            error_rate: Fraction of requests failing with a 500
+            rate_limit_rate: Fraction of requests failing with a 429
+            retry_after_seconds: retry-after sent with 429 responses
+            seed: Seed of the latency and failure generator
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self._random = random.Random(seed)
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+        self.chat = self
+        self.completions = self
+
+    def _latency(self) -> float:
+        """Draw time to first token in seconds."""
+        median = self.latency_ms / 1000
+        if self.latency_distribution == 'constant':
+            return median
+        if self.latency_distribution == 'uniform':
+            return self._random.uniform(0, 2 * median)
+        if self.latency_distribution == 'exponential':
+            return self._random.expovariate(math.log(2) / median) if median else 0.0
+        return self._random.lognormvariate(math.log(median), self.latency_sigma) if median else 0.0
+
+    def _fail(self):
+        """Raise an injected failure, if one is drawn."""
+        draw = self._random.random()
+        request = httpx.Request('POST', 'http://fake-openai/v1/chat/completions')
+        if draw < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            response = httpx.Response(
+                429, request=request, headers={'retry-after': str(self.retry_after_seconds)}
+            )
+            raise RateLimitError("Rate limit reached (injected)", response=response, body=None)
+        if draw < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            response = httpx.Response(500, request=request)
+            raise InternalServerError("Server error (injected)", response=response, body=None)
+
+    async def create(self,
+                     model: str,
+                     messages: List[Dict],
+                     max_tokens: Optional[int] = None,
+                     stream: bool = False,
+                     stream_options: Optional[Dict] = None,
+                     **kwargs):
+        """Mimic chat.completions.create for JSON-answering prompts."""
+        self.stats["requests"] += 1
+        latency = self._latency()
+        self._fail()
+        await asyncio.sleep(latency)
+
+        system_prompt = next((m['content'] for m in messages if m['role'] == 'system'), '')
+        content = next((m['content'] for m in messages if m['role'] == 'user'), '')
+        text = canned_response(system_prompt, content)
+        finish_reason = 'stop'
+        if max_tokens and count_tokens(text, model) > max_tokens:
+            text = text[:max_tokens * CHARS_PER_TOKEN]
+            finish_reason = 'length'
+
+        prompt_tokens = count_tokens(system_prompt, model) + count_tokens(content, model)
+        completion_tokens = count_tokens(text, model)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        completion_id = f"chatcmpl-fake-{self.stats['requests']}"
+        created = int(time.time())
+
+        if not stream:
+            if self.tokens_per_second:
+                await asyncio.sleep(completion_tokens / self.tokens_per_second)
+            return ChatCompletion.model_validate({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": finish_reason,
+                    "message": {"role": "assistant", "content": text}
+                }],
+                "usage": usage
+            })
+
+        include_usage = bool((stream_options or {}).get('include_usage'))
+        return self._stream(text, finish_reason, usage if include_usage else None,
+                            completion_id, created, model)
+
+    async def _stream(self,
+                      text: str,
+                      finish_reason: str,
+                      usage: Optional[Dict],
+                      completion_id: str,
+                      created: int,
+                      model: str) -> AsyncIterator[ChatCompletionChunk]:
+        def chunk(delta: Dict, finish: Optional[str] = None, choices: bool = True, **extra):
+            return ChatCompletionChunk.model_validate({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if choices else [],
+                **extra
+            })
+
+        delay = STREAM_CHUNK_CHARS / CHARS_PER_TOKEN / self.tokens_per_second if self.tokens_per_second else 0
+        yield chunk({"role": "assistant", "content": ""})
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk({"content": text[start:start + STREAM_CHUNK_CHARS]})
+        yield chunk({}, finish_reason)
+        if usage is not None:
+            yield chunk({}, choices=False, usage=usage)
@@ -0,0 +1,246 @@
+# src/filter_engine.py
+
+from datetime import date
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+import logging
+import numpy as np
+from query_parser import And, FieldFilter, Or, QueryNode, YearFilter
+from query_plan import DEFAULT_LANG
+from tweet_store import MISSING_TIMESTAMP, TweetStore, day_end, day_start
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# created_at years are read from the local time in the string while
+# timestamps are UTC, so year ranges are widened by the largest offset
+YEAR_MARGIN_SECONDS = 14 * 3600
+
+
+class Constraint(NamedTuple):
+    """One pushed-down filter."""
+    size: int  # Number of rows the filter keeps, known without materializing them
+    rows: Callable[[], np.ndarray]  # Sorted rows kept by the filter
+    keep: Callable[[np.ndarray], np.ndarray]  # Mask of the given rows kept by the filter
+
+
+def _normalize_author(author: str) -> str:
+    """Normalize an author handle the way from: matching does."""
+    return str(author).lower().lstrip('@')
+
+
+class FilterEngine:
+    """
+    Row filters over the columns of a TweetStore.
+
+    Timestamps and engagement are kept as sorted arrays with the rows in
+    that order, so a date range or an engagement threshold is found by
+    binary search; authors map to their rows through a grouped index.
+    When several filters apply, the most selective one produces the
+    candidate rows and the rest are checked on those rows only. The
+    sorted arrays are built on first use.
+
+    Filters from the query ((year), from: and lang:) are pushed down as
+    supersets of what they match, so the query must still be evaluated
+    over the candidates.
+    """
+
+    def __init__(self, store: TweetStore):
+        """
+        Initialize engine over a store.
+
+        Args:
+            store: Columnar tweets
+        """
+        self.store = store
+        self.size = len(store)
+        self._time_order: Optional[np.ndarray] = None
+        self._sorted_times: Optional[np.ndarray] = None
+        self._engagement_order: Optional[np.ndarray] = None
+        self._sorted_engagement: Optional[np.ndarray] = None
+        self._author_lookup: Optional[Dict[str, int]] = None
+        self._tweet_authors: Optional[np.ndarray] = None
+        self._author_rows: Optional[np.ndarray] = None
+        self._author_offsets: Optional[np.ndarray] = None
+
+    def _time_index(self):
+        if self._time_order is None:
+            self._time_order = np.argsort(self.store.timestamps, kind='stable')
+            self._sorted_times = self.store.timestamps[self._time_order]
+
+    def _engagement_index(self):
+        if self._engagement_order is None:
+            self._engagement_order = np.argsort(self.store.engagement, kind='stable')
+            self._sorted_engagement = self.store.engagement[self._engagement_order]
+
+    def _author_index(self):
+        if self._author_lookup is None:
+            lookup: Dict[str, int] = {}
+            codes = np.array([
+                lookup.setdefault(_normalize_author(name), len(lookup))
+                for name in self.store.author_names
+            ], dtype=np.int32)
+            self._tweet_authors = codes[self.store.author_codes] if len(codes) else np.empty(0, dtype=np.int32)
+            self._author_rows = np.argsort(self._tweet_authors, kind='stable')
+            self._author_offsets = np.zeros(len(lookup) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self._tweet_authors, minlength=len(lookup)), out=self._author_offsets[1:])
+            self._author_lookup = lookup
+
+    def time_range(self, start: Optional[int], end: Optional[int], with_missing: bool = False) -> Constraint:
+        """
+        Filter by posting time.
+
+        Args:
+            start: First epoch second kept, unbounded if None
+            end: Last epoch second kept, unbounded if None
+            with_missing: Also keep tweets whose created_at could not be parsed
+
+        Returns:
+            Constraint on timestamps
+        """
+        self._time_index()
+        low = max(MISSING_TIMESTAMP + 1, start) if start is not None else MISSING_TIMESTAMP + 1
+        lo = int(np.searchsorted(self._sorted_times, low, side='left'))
+        hi = int(np.searchsorted(self._sorted_times, end, side='right')) if end is not None else self.size
+        missing = int(np.searchsorted(self._sorted_times, MISSING_TIMESTAMP, side='right')) if with_missing else 0
+
+        def rows() -> np.ndarray:
+            return np.sort(np.concatenate([self._time_order[:missing], self._time_order[lo:hi]]))
+
+        def keep(candidates: np.ndarray) -> np.ndarray:
+            timestamps = self.store.timestamps[candidates]
+            mask = timestamps >= low
+            if end is not None:
+                mask &= timestamps <= end
+            if with_missing:
+                mask |= timestamps == MISSING_TIMESTAMP
+            return mask
+
+        return Constraint(max(hi - lo, 0) + missing, rows, keep)
+
+    def min_engagement(self, minimum: int) -> Constraint:
+        """Filter by total engagement of at least minimum."""
+        self._engagement_index()
+        lo = int(np.searchsorted(self._sorted_engagement, minimum, side='left'))
+        return Constraint(
+            self.size - lo,
+            lambda: np.sort(self._engagement_order[lo:]),
+            lambda candidates: self.store.engagement[candidates] >= minimum
+        )
+
+    def authors(self, authors: Iterable[str]) -> Constraint:
+        """Filter by author handles, compared like from: (case-insensitive, without @)."""
+        self._author_index()
+        codes = sorted({
+            self._author_lookup[name]
+            for name in map(_normalize_author, authors)
+            if name in self._author_lookup
+        })
+        spans = [(self._author_offsets[code], self._author_offsets[code + 1]) for code in codes]
+
+        def rows() -> np.ndarray:
+            if not spans:
+                return np.empty(0, dtype=np.int64)
+            return np.sort(np.concatenate([self._author_rows[start:end] for start, end in spans]))
+
+        return Constraint(
+            int(sum(end - start for start, end in spans)),
+            rows,
+            lambda candidates: np.isin(self._tweet_authors[candidates], codes)
+        )
+
+    def lang(self, lang: str) -> Constraint:
+        """Filter by language, tweets without one count as DEFAULT_LANG."""
+        store = self.store
+        codes = [code for code, name in enumerate(store.lang_names) if str(name).lower() == lang]
+        if store.lang_codes is None:
+            tweet_langs = np.full(self.size, -1, dtype=np.int16)
+        else:
+            tweet_langs = store.lang_codes
+        if lang == DEFAULT_LANG:
+            codes.append(-1)
+
+        def keep(candidates: np.ndarray) -> np.ndarray:
+            return np.isin(tweet_langs[candidates], codes)
+
+        # Languages have no sorted index; the mask is one vectorized pass
+        return Constraint(self.size, lambda: np.nonzero(keep(np.arange(self.size)))[0], keep)
+
+    def query_constraints(self, root: QueryNode) -> List[Constraint]:
+        """
+        Get filters that every match of a query satisfies.
+
+        Only filters joined to the rest of the query by AND are used,
+        plus ORs made only of from: filters.
+
+        Args:
+            root: Root node from QueryParser.parse_ast
+
+        Returns:
+            List of constraints, possibly empty
+        """
+        constraints = []
+        for node in root.children if isinstance(root, And) else (root,):
+            if isinstance(node, YearFilter):
+                constraints.append(self.time_range(
+                    day_start(date(node.year, 1, 1)) - YEAR_MARGIN_SECONDS,
+                    day_end(date(node.year, 12, 31)) + YEAR_MARGIN_SECONDS,
+                    with_missing=True
+                ))
+            elif isinstance(node, FieldFilter) and node.name == 'from':
+                constraints.append(self.authors([node.value]))
+            elif isinstance(node, FieldFilter) and node.name == 'lang':
+                constraints.append(self.lang(node.value))
+            elif (isinstance(node, Or) and node.children
+                    and all(isinstance(child, FieldFilter) and child.name == 'from' for child in node.children)):
+                constraints.append(self.authors([child.value for child in node.children]))
+        return constraints
+
+    def filter_constraints(self, filters: Optional[Dict]) -> List[Constraint]:
+        """
+        Get constraints of the advanced search filters.
+
+        Args:
+            filters: Dictionary with optional date_from and date_to
+                ('YYYY-MM-DD', inclusive), min_engagement and author
+
+        Returns:
+            List of constraints, possibly empty
+        """
+        filters = filters or {}
+        constraints = []
+        if filters.get('date_from') or filters.get('date_to'):
+            start = day_start(date.fromisoformat(filters['date_from'])) if filters.get('date_from') else None
+            end = day_end(date.fromisoformat(filters['date_to'])) if filters.get('date_to') else None
+            constraints.append(self.time_range(start, end))
+        if filters.get('min_engagement'):
+            constraints.append(self.min_engagement(int(filters['min_engagement'])))
+        if filters.get('author'):
+            constraints.append(self.authors([filters['author']]))
+        return constraints
+
+    def candidates(self, 
+                   root: QueryNode, 
+                   filters: Optional[Dict] = None,
+                   extra: Sequence[Constraint] = ()) -> Optional[np.ndarray]:
+        """
+        Get rows that can match a query under the search filters.
+
+        Args:
+            root: Root node from QueryParser.parse_ast
+            filters: Advanced search filters, see filter_constraints
+            extra: More constraints over the same rows, e.g. partition pruning
+
+        Returns:
+            Sorted candidate rows, None if nothing narrows the search
+        """
+        constraints = self.query_constraints(root) + self.filter_constraints(filters) + list(extra)
+        if not constraints:
+            return None
+        constraints.sort(key=lambda constraint: constraint.size)
+        rows = constraints[0].rows()
+        for constraint in constraints[1:]:
+            if not len(rows):
+                break
+            rows = rows[constraint.keep(rows)]
+        return rows
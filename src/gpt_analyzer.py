@@ -1,52 +1,321 @@
 # src/gpt_analyzer.py
 
+import asyncio
 import logging
 import re
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
 from config import (
-    async_client,
     GPT_MODEL, 
     MAX_TOKENS, 
     TEMPERATURE,
     MAX_TWEETS_FOR_GPT,
-    MIN_RELEVANCE_SCORE
+    MIN_RELEVANCE_SCORE,
+    PAYLOAD_TOKEN_BUDGET,
+    TWEET_TEXT_MAX_CHARS,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_MEMORY_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_MB,
+    USE_TWEET_ENRICHMENT,
+    ENRICHMENT_CACHE_MEMORY_ENTRIES,
+    ENRICHMENT_CACHE_MAX_ENTRIES,
+    FUSED_ANALYSIS,
+    ANALYSIS_MAX_TWEETS,
+    ANALYSIS_CONCURRENCY,
+    ANALYSIS_SUMMARY_PASS,
+    STREAM_RESPONSES,
+    GPT_REQUESTS_PER_MINUTE,
+    GPT_TOKENS_PER_MINUTE,
+    GPT_MAX_RETRIES,
+    GPT_RETRY_BASE_DELAY,
+    GPT_RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    SHARD_SERVERS,
+    SHARD_TIMEOUT_SECONDS,
+    SHARD_HEDGE_PERCENTILE,
+    SHARD_HEDGE_MIN_MS,
+    SHARD_MIN_ANSWERS
 )
 from search_prompts import (
     SYSTEM_ANALYSIS_PROMPT,
+    FUSED_ANALYSIS_PROMPT,
+    ANALYSIS_SUMMARY_PROMPT,
     SEMANTIC_SEARCH_PROMPT,
-    SENTIMENT_ANALYSIS_PROMPT
+    SENTIMENT_ANALYSIS_PROMPT,
+    TWEET_ENRICHMENT_PROMPT
 )
+from async_runtime import get_client
+from distributed_search import DistributedSearch, ShardUnavailable, parse_shard_servers
+from enrichment import (
+    apply_summary,
+    build_content_analysis,
+    build_sentiment_analysis,
+    merge_content_analyses,
+    merge_sentiment_analyses,
+    normalize_enrichment
+)
+from json_stream import StreamingJSONParser, recover_json
 from query_parser import QueryParser, TweetMatcher
+from request_scheduler import CircuitBreaker, Priority, RequestScheduler, SingleFlight
+from response_cache import ResponseCache, TweetEnrichmentCache, content_hash
+from search_engine import SearchEngine
+from search_index import InvertedIndex
+from token_budget import MESSAGE_OVERHEAD_TOKENS, TweetBatch, count_tokens, dumps_compact, iter_batches
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Called with stage name, completed steps and total steps of an analysis
+StageCallback = Callable[[str, int, int], None]
+
+# Called with completed chunks and total chunks
+ChunkCallback = Callable[[int, int], None]
+
+# Called with array name and element of a GPT response
+ItemCallback = Callable[[str, Any], None]
+
+# Response arrays whose elements are reported as soon as they arrive
+STREAMED_ARRAYS = ('matches', 'key_discussions')
+
+# Shared by all analyzers so the rate limits cover the whole process
+request_scheduler = RequestScheduler(
+    requests_per_minute=GPT_REQUESTS_PER_MINUTE,
+    tokens_per_minute=GPT_TOKENS_PER_MINUTE,
+    max_retries=GPT_MAX_RETRIES,
+    base_delay=GPT_RETRY_BASE_DELAY,
+    max_delay=GPT_RETRY_MAX_DELAY,
+    circuit_breaker=CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+)
+
+# Identical requests in flight at the same time share one completion
+inflight_requests = SingleFlight()
+
 class GPTAnalyzer:
-    def __init__(self):
-        """Initialize GPT analyzer components."""
+    def __init__(self, 
+                 index: Optional[InvertedIndex] = None,
+                 engine: Optional[SearchEngine] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 enrichment_cache: Optional[TweetEnrichmentCache] = None,
+                 shard_search: Optional[DistributedSearch] = None):
+        """
+        Initialize GPT analyzer components.
+        
+        Args:
+            index: Prebuilt index, used when searching the tweets it was built over
+            engine: Search engine (or ParallelSearch), used when searching its tweets
+            response_cache: Cache for GPT responses, built from config if None
+            enrichment_cache: Cache for per-tweet results, built from config if None
+            shard_search: Client of the shard servers searched by search_tweets,
+                built from SHARD_SERVERS if None
+        """
         self.query_parser = QueryParser()
         self.tweet_matcher = TweetMatcher()
+        self._index = index
+        self._search_engine = engine
+        # Engine built for other tweets searched
+        self._engine: Optional[SearchEngine] = None
+        
+        if shard_search is None and SHARD_SERVERS:
+            shard_search = DistributedSearch(
+                parse_shard_servers(SHARD_SERVERS),
+                timeout=SHARD_TIMEOUT_SECONDS,
+                hedge_percentile=SHARD_HEDGE_PERCENTILE,
+                hedge_min_seconds=SHARD_HEDGE_MIN_MS / 1000,
+                min_shards=SHARD_MIN_ANSWERS
+            )
+        self.shard_search = shard_search
+        
+        if response_cache is None and RESPONSE_CACHE_ENABLED:
+            response_cache = ResponseCache(
+                db_path=RESPONSE_CACHE_PATH,
+                memory_entries=RESPONSE_CACHE_MEMORY_ENTRIES,
+                ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+                max_disk_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                max_disk_bytes=RESPONSE_CACHE_MAX_MB * 1024 * 1024
+            )
+        self.response_cache = response_cache
+        
+        if enrichment_cache is None and USE_TWEET_ENRICHMENT:
+            enrichment_cache = TweetEnrichmentCache(
+                db_path=RESPONSE_CACHE_PATH if RESPONSE_CACHE_ENABLED else None,
+                memory_entries=ENRICHMENT_CACHE_MEMORY_ENTRIES,
+                max_disk_entries=ENRICHMENT_CACHE_MAX_ENTRIES
+            )
+        self.enrichment_cache = enrichment_cache
+        # Per-tweet results are reused only for the same model and prompt
+        self.enrichment_version = f"{GPT_MODEL}:{content_hash(TWEET_ENRICHMENT_PROMPT)[:12]}"
+        # Event loop and semaphore limiting concurrent chunk requests on it
+        self._chunk_semaphore: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    def _get_engine(self, tweets: List[Dict]) -> SearchEngine:
+        """
+        Get search engine for tweets, building it on first use.
+        
+        Args:
+            tweets: List of tweets to search
+            
+        Returns:
+            SearchEngine over the given tweets
+        """
+        engine = self._search_engine
+        if engine is not None and engine.tweets is tweets and engine.size == len(tweets):
+            return engine
+        if (self._engine is None
+                or self._engine.tweets is not tweets
+                or self._engine.size != len(tweets)):
+            index = self._index
+            if index is not None and (index.tweets is not tweets or index.size != len(tweets)):
+                index = None
+            self._engine = SearchEngine(tweets, index)
+        return self._engine
+
+    async def _fetch_completion(self, 
+                                prompt: str, 
+                                content: str, 
+                                temperature: float,
+                                item_keys: Tuple[str, ...],
+                                reported: Counter,
+                                on_item: Optional[ItemCallback] = None,
+                                priority: Priority = Priority.BULK) -> str:
+        """
+        Get completion text through the request scheduler, streamed when enabled.
+        
+        Args:
+            prompt: System prompt
+            content: User message content
+            temperature: Sampling temperature
+            item_keys: Names of top-level arrays reported to on_item
+            reported: Number of elements reported per array, updated here
+            on_item: Called with each array element as soon as it is complete
+            priority: Scheduling lane of the request
+            
+        Returns:
+            Full completion text, possibly truncated
+        """
+        messages = [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": content}
+        ]
+        
+        async def attempt() -> Tuple[str, Optional[int]]:
+            client = get_client()
+            if not STREAM_RESPONSES:
+                response = await client.chat.completions.create(
+                    model=GPT_MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=MAX_TOKENS
+                )
+                usage = getattr(response, 'usage', None)
+                return response.choices[0].message.content or '', getattr(usage, 'total_tokens', None)
+            
+            stream = await client.chat.completions.create(
+                model=GPT_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=MAX_TOKENS,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            # A retried attempt starts over; elements already reported are skipped
+            parser = StreamingJSONParser(item_keys)
+            parts = []
+            used_tokens = None
+            async for chunk in stream:
+                usage = getattr(chunk, 'usage', None)
+                if usage is not None:
+                    used_tokens = usage.total_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    for key, item in parser.feed(delta):
+                        if parser.counts[key] > reported[key]:
+                            reported[key] += 1
+                            if on_item:
+                                on_item(key, item)
+            return ''.join(parts), used_tokens
+        
+        reserved_tokens = (count_tokens(prompt) + count_tokens(content)
+                           + 2 * MESSAGE_OVERHEAD_TOKENS + MAX_TOKENS)
+        text, used_tokens = await request_scheduler.submit(attempt, reserved_tokens, priority)
+        request_scheduler.settle(reserved_tokens, used_tokens)
+        return text
 
     async def _gpt_request(self, 
                         prompt: str, 
                         content: str, 
-                        temp: Optional[float] = None) -> Dict:
+                        temp: Optional[float] = None,
+                        use_cache: bool = True,
+                        on_item: Optional[ItemCallback] = None,
+                        item_keys: Tuple[str, ...] = STREAMED_ARRAYS,
+                        priority: Priority = Priority.BULK) -> Dict:
+        """
+        Send a request to GPT and parse its JSON response.
+        
+        A response cut off by the token limit is recovered up to its last
+        complete element. Recovered responses are not cached. Concurrent
+        identical requests, from any session, share one completion; only
+        the caller that started it gets elements streamed to on_item, the
+        others get them once it finishes.
+        
+        Args:
+            prompt: System prompt
+            content: User message content
+            temp: Sampling temperature, TEMPERATURE if None
+            use_cache: Set to False to bypass the response cache
+            on_item: Called with array name and element for every element
+                of the item_keys arrays, as soon as it is complete when
+                streaming, otherwise once the response is parsed
+            item_keys: Names of top-level arrays reported to on_item
+            priority: Scheduling lane, INTERACTIVE for requests a user waits on
+            
+        Returns:
+            Parsed response, or a dictionary with an error in search_metadata
+        """
+        temperature = temp if temp is not None else TEMPERATURE
+        reported: Counter = Counter()
+        
+        def report_remaining(parsed: Dict):
+            # Report elements not already reported while streaming
+            if on_item and isinstance(parsed, dict):
+                for key in item_keys:
+                    items = parsed.get(key)
+                    if isinstance(items, list):
+                        for item in items[reported[key]:]:
+                            on_item(key, item)
+        
+        request_key = ResponseCache.make_key(GPT_MODEL, prompt, content, temperature, MAX_TOKENS)
+        cache_key = None
+        if use_cache and self.response_cache is not None:
+            cache_key = request_key
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("GPT response served from cache")
+                report_remaining(cached)
+                return cached
+        
         try:
-            response = await async_client.chat.completions.create(
-                model=GPT_MODEL,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": content}
-                ],
-                temperature=temp if temp is not None else TEMPERATURE,
-                max_tokens=MAX_TOKENS
+            raw_content, started = await inflight_requests.run(
+                request_key,
+                lambda: self._fetch_completion(
+                    prompt, content, temperature, item_keys, reported, on_item, priority
+                )
             )
+            if not started:
+                logger.info("Shared the response of an identical in-flight GPT request")
+                # The caller that started the request caches it
+                cache_key = None
             
             # Логуємо повний Raw Response
-            raw_content = response.choices[0].message.content
             logger.info(f"Raw GPT response: {raw_content}")
             
             # Видаляємо markdown-синтаксис
@@ -55,23 +324,30 @@ class GPTAnalyzer:
             try:
                 # Пробуємо розпарсити напряму
                 parsed_json = json.loads(clean_content)
-                
-                # НОВИЙ БЛОК: Додаткова перевірка sentiment_distribution
-                if 'sentiment' in parsed_json and 'sentiment_distribution' not in parsed_json:
-                    # Якщо немає distribution, але є key_sentiments
-                    sentiments = parsed_json.get('key_sentiments', [])
-                    distribution = {
-                        'positive': sum(1 for s in sentiments if s.get('sentiment') == 'positive'),
-                        'negative': sum(1 for s in sentiments if s.get('sentiment') == 'negative'),
-                        'neutral': sum(1 for s in sentiments if s.get('sentiment') == 'neutral')
-                    }
-                    parsed_json['sentiment_distribution'] = distribution
-                
-                return parsed_json
-            
             except json.JSONDecodeError:
-                # Решта коду без змін
-                pass
+                # Відповідь обрізана або з зайвим текстом: беремо всі повні елементи
+                parsed_json = recover_json(clean_content)
+                logger.warning("Recovered truncated or malformed GPT response")
+                cache_key = None
+            if not isinstance(parsed_json, dict):
+                raise ValueError("GPT response is not a valid JSON object")
+            
+            # НОВИЙ БЛОК: Додаткова перевірка sentiment_distribution
+            if 'sentiment' in parsed_json and 'sentiment_distribution' not in parsed_json:
+                # Якщо немає distribution, але є key_sentiments
+                sentiments = parsed_json.get('key_sentiments', [])
+                distribution = {
+                    'positive': sum(1 for s in sentiments if s.get('sentiment') == 'positive'),
+                    'negative': sum(1 for s in sentiments if s.get('sentiment') == 'negative'),
+                    'neutral': sum(1 for s in sentiments if s.get('sentiment') == 'neutral')
+                }
+                parsed_json['sentiment_distribution'] = distribution
+            
+            if cache_key is not None:
+                self.response_cache.set(cache_key, parsed_json)
+            
+            report_remaining(parsed_json)
+            return parsed_json
         
         except Exception as e:
             logger.error(f"Помилка GPT API: {e}")
@@ -141,52 +417,103 @@ class GPTAnalyzer:
             logger.error(f"JSON extraction error: {e}")
             raise
 
-    def _basic_search(self, tweets: List[Dict], query: str) -> List[Dict]:
+    def _basic_search(self, 
+                      tweets: List[Dict], 
+                      query: str, 
+                      limit: Optional[int] = MAX_TWEETS_FOR_GPT,
+                      filters: Optional[Dict] = None) -> List[Dict]:
         """
-        Perform initial filtering of tweets using QueryParser and TweetMatcher.
+        Perform initial filtering of tweets using the compiled query plan.
         
         Args:
             tweets: List of tweets to search
             query: Raw search query string
+            limit: Maximum number of tweets returned, all matches if None
+            filters: Advanced search filters (date_from, date_to,
+                min_engagement, author), see FilterEngine
             
         Returns:
-            List of potentially relevant tweets
+            List of potentially relevant tweets, most relevant first
         """
         try:
-            # Parse the query
-            parsed_query = self.query_parser.parse(query)
-            conditions = self.query_parser.generate_search_conditions(parsed_query)
-            
-            # Find matching tweets
-            matching_tweets = [
-                tweet for tweet in tweets 
-                if self.tweet_matcher.matches_conditions(tweet, conditions)
-            ]
-            
-            # Sort by basic relevance and limit number of tweets
-            for tweet in matching_tweets:
-                text = tweet['text'].lower()
-                matches = sum(1 for keyword in conditions['must_match_any'] 
-                            if keyword.lower() in text)
-                tweet['initial_relevance'] = matches
-            
-            matching_tweets.sort(key=lambda x: x['initial_relevance'], reverse=True)
-            return matching_tweets[:MAX_TWEETS_FOR_GPT]
+            return self._get_engine(tweets).search_tweets(query, limit, filters)
             
         except Exception as e:
             logger.error(f"Basic search error: {e}")
             return []
 
+    async def _keyword_search(self, 
+                              tweets: List[Dict], 
+                              query: str, 
+                              limit: Optional[int],
+                              filters: Optional[Dict]) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        Search the shard servers if configured, else (or if too few answer) tweets.
+        
+        Returns:
+            Matching tweets, most relevant first, and shard metadata
+        """
+        if self.shard_search is not None:
+            try:
+                found = await self.shard_search.search(query, limit, filters)
+                return found.tweets, {
+                    "shards": len(self.shard_search.replicas),
+                    "failed_shards": found.failed_shards,
+                    "partial": bool(found.failed_shards),
+                    "total_matches": found.total
+                }
+            except ShardUnavailable as e:
+                logger.error(f"Shard search failed, searching locally: {e}")
+        # Searching is CPU-bound (or waits on shard workers), so it runs
+        # off the event loop that streams the GPT requests of other sessions
+        loop = asyncio.get_running_loop()
+        matches = await loop.run_in_executor(None, lambda: self._basic_search(tweets, query, limit, filters))
+        return matches, {}
+
+    async def find_matches(self, 
+                           tweets: List[Dict], 
+                           query: str, 
+                           limit: Optional[int] = ANALYSIS_MAX_TWEETS,
+                           filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Get keyword matches of a query for analysis, most relevant first.
+        
+        Uses the shard servers like search_tweets, so the analysis covers
+        the tweets the search was run over.
+        
+        Args:
+            tweets: List of tweets to search
+            query: Raw search query string
+            limit: Maximum number of tweets returned, all matches if None
+            filters: Advanced search filters
+            
+        Returns:
+            List of matching tweets
+        """
+        matches, _ = await self._keyword_search(tweets, query, limit, filters)
+        return matches
+
     async def search_tweets(self, 
                           tweets: List[Dict], 
                           query: str,
-                          filters: Dict = None) -> Dict[str, Any]:
+                          filters: Dict = None,
+                          use_cache: bool = True,
+                          on_match: Optional[Callable[[Dict], None]] = None) -> Dict[str, Any]:
         """
         Search tweets using combination of basic filtering and GPT analysis.
+        
+        Set use_cache=False to bypass the response cache. on_match is
+        called with each relevant match as soon as it arrives.
+        
+        With shard servers configured, the keyword search runs on them
+        instead of over tweets; the metadata then tells which shards
+        answered. tweets are searched locally if too few shards answer.
         """
         try:
             # First, apply basic filtering
-            filtered_tweets = self._basic_search(tweets, query)
+            filtered_tweets, shard_metadata = await self._keyword_search(
+                tweets, query, MAX_TWEETS_FOR_GPT, filters
+            )
             logger.info(f"Found {len(filtered_tweets)} tweets in basic search")
             
             if not filtered_tweets:
@@ -195,43 +522,55 @@ class GPTAnalyzer:
                     "search_metadata": {
                         "total_tweets": 0,
                         "query": query,
-                        "message": "No tweets found matching your criteria"
+                        "message": "No tweets found matching your criteria",
+                        **shard_metadata
                     }
                 }
             
+            # Pack the most relevant tweets into the request token budget
+            batch = next(iter_batches(
+                filtered_tweets, PAYLOAD_TOKEN_BUDGET, MAX_TWEETS_FOR_GPT, TWEET_TEXT_MAX_CHARS
+            ))
+            filtered_tweets = batch.tweets
+            
             # Prepare context for GPT
             search_context = {
                 "query": query,
-                "tweets": filtered_tweets,
-                "filters": filters
+                "filters": filters,
+                "tweets": batch.payload
             }
             
+            # Map GPT results back to original tweets by ordinal as they arrive
+            enhanced_matches = []
+            seen = set()
+            
+            def on_item(key: str, match: Any):
+                original_tweet = batch.tweet(match.get('n')) if isinstance(match, dict) else None
+                if original_tweet is None or id(original_tweet) in seen:
+                    return
+                seen.add(id(original_tweet))
+                enhanced_match = {
+                    **original_tweet,
+                    'relevance_score': match.get('relevance_score', 0),
+                    'relevance_explanation': match.get('relevance_explanation', ''),
+                    'matched_concepts': match.get('matched_concepts', [])
+                }
+                enhanced_matches.append(enhanced_match)
+                if on_match and enhanced_match['relevance_score'] >= MIN_RELEVANCE_SCORE:
+                    on_match(enhanced_match)
+            
             # Use GPT for semantic analysis
             gpt_results = await self._gpt_request(
                 prompt=SEMANTIC_SEARCH_PROMPT,
-                content=json.dumps(search_context),
-                temp=0.3  # Lower temperature for more focused search
+                content=dumps_compact(search_context),
+                temp=0.3,  # Lower temperature for more focused search
+                use_cache=use_cache,
+                on_item=on_item,
+                item_keys=('matches',),
+                priority=Priority.INTERACTIVE
             )
             logger.info(f"GPT results: {json.dumps(gpt_results, indent=2)}")
             
-            # Ensure matches array exists
-            if 'matches' not in gpt_results:
-                gpt_results['matches'] = []
-            
-            # Map GPT results back to original tweets
-            enhanced_matches = []
-            for match in gpt_results.get('matches', []):
-                for original_tweet in filtered_tweets:
-                    if original_tweet['text'] == match.get('tweet_text', ''):
-                        enhanced_match = {
-                            **original_tweet,
-                            'relevance_score': match.get('relevance_score', 0),
-                            'relevance_explanation': match.get('relevance_explanation', ''),
-                            'matched_concepts': match.get('matched_concepts', [])
-                        }
-                        enhanced_matches.append(enhanced_match)
-                        break
-            
             gpt_results['matches'] = enhanced_matches
             
             # Filter results by minimum relevance score
@@ -246,7 +585,8 @@ class GPTAnalyzer:
                 "processed_tweets": len(gpt_results['matches']),
                 "query": query,
                 "timestamp": datetime.now().isoformat(),
-                "filters_applied": bool(filters)
+                "filters_applied": bool(filters),
+                **shard_metadata
             }
             
             return gpt_results
@@ -263,101 +603,584 @@ class GPTAnalyzer:
                 }
             }
 
-    async def analyze_content(self, tweets: List[Dict]) -> Dict[str, Any]:
-        try:
-            # Додаємо логування початку аналізу
-            logger.info(f"Starting content analysis for {len(tweets)} tweets")
+    def _batch_tweets(self, tweets: List[Dict]) -> List[TweetBatch]:
+        """
+        Split tweets into batches analyzed by separate requests.
+        
+        A batch holds at most MAX_TWEETS_FOR_GPT tweets, which bounds the
+        size of the response, and at most PAYLOAD_TOKEN_BUDGET tokens of
+        compact tweet payload.
+        
+        Args:
+            tweets: Tweets to split
+            
+        Returns:
+            List of batches, in tweet order
+        """
+        return list(iter_batches(
+            tweets, PAYLOAD_TOKEN_BUDGET, MAX_TWEETS_FOR_GPT, TWEET_TEXT_MAX_CHARS
+        ))
 
-            # Додаємо інформацію про автора до кожного твіту перед аналізом
-            enhanced_tweets = [
-                {**tweet, 'author': tweet.get('author_id', 'Unknown')} 
-                for tweet in tweets
-            ]
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent chunk requests on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._chunk_semaphore is None or self._chunk_semaphore[0] is not loop:
+            self._chunk_semaphore = (loop, asyncio.Semaphore(ANALYSIS_CONCURRENCY))
+        return self._chunk_semaphore[1]
+
+    async def _map_chunks(self, 
+                          chunks: List[TweetBatch], 
+                          analyze: Callable[[TweetBatch], Awaitable[Any]],
+                          on_chunk: Optional[ChunkCallback] = None) -> List[Any]:
+        """
+        Analyze chunks concurrently, at most ANALYSIS_CONCURRENCY at a time.
+        
+        Args:
+            chunks: Batches of tweets
+            analyze: Coroutine function analyzing one batch
+            on_chunk: Called as each chunk finishes
             
-            content_analysis = await self._gpt_request(
-                prompt=SYSTEM_ANALYSIS_PROMPT,
-                content=json.dumps(enhanced_tweets)
+        Returns:
+            Results in chunk order, None for chunks that failed
+        """
+        semaphore = self._semaphore()
+        completed = 0
+        
+        async def run(chunk: TweetBatch) -> Any:
+            nonlocal completed
+            try:
+                async with semaphore:
+                    return await analyze(chunk)
+            except Exception as e:
+                logger.error(f"Chunk analysis error: {e}")
+                return None
+            finally:
+                completed += 1
+                if on_chunk:
+                    on_chunk(completed, len(chunks))
+        
+        return await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+    async def _summarize(self, 
+                         content: Optional[Dict], 
+                         sentiment: Optional[Dict], 
+                         use_cache: bool = True):
+        """
+        Refine merged chunk results with a final GPT pass over the merged results.
+        
+        Args:
+            content: Merged content analysis, updated in place
+            sentiment: Merged sentiment analysis, updated in place
+            use_cache: Set to False to bypass the response cache
+        """
+        if not ANALYSIS_SUMMARY_PASS:
+            return
+        merged = {}
+        if content is not None:
+            merged["content"] = {
+                "topics": [
+                    {key: topic.get(key) for key in ('name', 'count', 'importance', 'context')}
+                    for topic in content.get('topics', [])
+                ],
+                "trends": content.get('trends', {})
+            }
+        if sentiment is not None:
+            merged["sentiment"] = {
+                key: sentiment.get(key) for key in (
+                    'overall_sentiment', 'sentiment_distribution', 'emotional_patterns'
+                )
+            }
+            merged["sentiment"]["key_sentiments"] = [
+                {key: item.get(key) for key in ('topic', 'sentiment')}
+                for item in sentiment.get('key_sentiments', [])
+            ]
+        try:
+            summary = await self._gpt_request(
+                prompt=ANALYSIS_SUMMARY_PROMPT,
+                content=dumps_compact(merged),
+                use_cache=use_cache
             )
+            apply_summary(content, sentiment, summary)
+        except Exception as e:
+            logger.error(f"Summary pass error: {e}")
+
+    async def _enrich_chunk(self, batch: TweetBatch) -> Dict[str, Dict]:
+        """
+        Get per-tweet results of one batch from GPT and cache them.
+        
+        Args:
+            batch: Tweets without cached results
             
-            # Додаткова перевірка та виправлення
-            if 'key_discussions' in content_analysis:
-                for discussion in content_analysis['key_discussions']:
-                    if 'author' not in discussion:
-                        # Намагаємось витягти автора з оригінального твіту
-                        matching_tweet = next(
-                            (tweet for tweet in tweets if tweet['text'] == discussion.get('tweet_text')), 
-                            None
-                        )
-                        discussion['author'] = matching_tweet.get('author_id', 'Unknown') if matching_tweet else 'Unknown'
-            
-            # Додаємо метадані
-            content_analysis['metadata'] = {
-                "analyzed_tweets": len(tweets),
+        Returns:
+            Dictionary of tweet id to normalized enrichment
+        """
+        # Per-tweet results are cached below, so skip the response cache
+        response = await self._gpt_request(
+            prompt=TWEET_ENRICHMENT_PROMPT,
+            content=dumps_compact(batch.payload),
+            use_cache=False
+        ) or {}
+        
+        fresh = {}
+        for raw in response.get('tweets') or []:
+            tweet = batch.tweet(raw.get('n')) if isinstance(raw, dict) else None
+            enrichment = normalize_enrichment(raw)
+            if tweet is not None and enrichment is not None:
+                fresh[str(tweet['id'])] = enrichment
+        
+        if len(fresh) < len(batch):
+            logger.warning(f"GPT returned no result for {len(batch) - len(fresh)} tweets")
+        if fresh and self.enrichment_cache is not None:
+            self.enrichment_cache.set_many(fresh, self.enrichment_version)
+        return fresh
+
+    async def _enrich_tweets(self, 
+                             tweets: List[Dict], 
+                             use_cache: bool = True,
+                             on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Dict]:
+        """
+        Get per-tweet sentiment, topics and keywords.
+        
+        Cached results are reused and only the remaining tweets are sent
+        to GPT, in concurrent chunks; their results are cached by tweet id
+        and model version.
+        
+        Args:
+            tweets: Tweets to analyze
+            use_cache: Set to False to analyze every tweet again
+            on_chunk: Called as each chunk sent to GPT finishes
+            
+        Returns:
+            Dictionary of tweet id to normalized enrichment
+        """
+        tweet_ids = [str(tweet['id']) for tweet in tweets if tweet.get('id') is not None]
+        enrichments = {}
+        if use_cache and self.enrichment_cache is not None:
+            enrichments = self.enrichment_cache.get_many(tweet_ids, self.enrichment_version)
+        
+        pending = {
+            str(tweet['id']): tweet for tweet in tweets
+            if tweet.get('id') is not None and str(tweet['id']) not in enrichments
+        }
+        chunks = self._batch_tweets(list(pending.values()))
+        logger.info(
+            f"Enrichment: {len(enrichments)} cached, {len(pending)} sent to GPT in {len(chunks)} chunks"
+        )
+        
+        for fresh in await self._map_chunks(chunks, self._enrich_chunk, on_chunk):
+            if fresh:
+                enrichments.update(fresh)
+        return enrichments
+
+    def estimate_requests(self, 
+                          tweets: List[Dict], 
+                          use_cache: bool = True,
+                          fused: Optional[bool] = None) -> int:
+        """
+        Estimate how many GPT requests analyze_all sends for tweets.
+        
+        Tweets with cached per-tweet results are left out. Cached responses
+        of the other modes are not, so there the estimate is an upper bound.
+        
+        Args:
+            tweets: Tweets to analyze
+            use_cache: Whether analyze_all will use the caches
+            fused: Fused analysis, FUSED_ANALYSIS if None
+            
+        Returns:
+            Number of GPT requests, summary pass included
+        """
+        summary = 1 if ANALYSIS_SUMMARY_PASS and self._needs_summary(tweets) else 0
+        if USE_TWEET_ENRICHMENT:
+            cached = {}
+            if use_cache and self.enrichment_cache is not None:
+                cached = self.enrichment_cache.get_many(
+                    [str(tweet['id']) for tweet in tweets if tweet.get('id') is not None],
+                    self.enrichment_version
+                )
+            pending = [
+                tweet for tweet in tweets
+                if tweet.get('id') is not None and str(tweet['id']) not in cached
+            ]
+            return len(self._batch_tweets(pending)) + summary
+        chunks = len(self._batch_tweets(tweets))
+        if FUSED_ANALYSIS if fused is None else fused:
+            return chunks + summary
+        # Content and sentiment requests, each with its own summary pass
+        return 2 * (chunks + summary)
+
+    def _needs_summary(self, tweets: List[Dict]) -> bool:
+        """Check whether tweets span more than one chunk."""
+        return len(self._batch_tweets(tweets)) > 1
+
+    def _content_result(self, tweets: List[Dict], enrichments: Dict[str, Dict]) -> Dict[str, Any]:
+        """Build content analysis from per-tweet enrichments."""
+        content_analysis = build_content_analysis(tweets, enrichments)
+        content_analysis['metadata'] = {
+            "analyzed_tweets": len(tweets),
+            "enriched_tweets": len(enrichments),
+            "timestamp": datetime.now().isoformat()
+        }
+        logger.info(f"Content analysis complete. Topics found: {len(content_analysis['topics'])}")
+        return content_analysis
+
+    def _sentiment_result(self, tweets: List[Dict], enrichments: Dict[str, Dict]) -> Dict[str, Any]:
+        """Build sentiment analysis from per-tweet enrichments."""
+        sentiment_analysis = build_sentiment_analysis(tweets, enrichments)
+        sentiment_analysis['metadata'] = {
+            "analyzed_tweets": len(tweets),
+            "enriched_tweets": len(enrichments),
+            "timestamp": datetime.now().isoformat()
+        }
+        logger.info(f"Sentiment analysis complete. Sentiment score: {sentiment_analysis['overall_sentiment']['score']}")
+        return sentiment_analysis
+
+    def _finish_content(self, 
+                        tweets: List[Dict], 
+                        content_analysis: Dict, 
+                        **metadata) -> Dict[str, Any]:
+        """Fill in authors and metadata of a content analysis returned by GPT."""
+        # Додаткова перевірка та виправлення
+        if 'key_discussions' in content_analysis:
+            tweets_by_text = None
+            for discussion in content_analysis['key_discussions']:
+                if 'author' not in discussion:
+                    # Намагаємось витягти автора з оригінального твіту
+                    if tweets_by_text is None:
+                        tweets_by_text = {tweet['text']: tweet for tweet in tweets}
+                    matching_tweet = tweets_by_text.get(discussion.get('tweet_text'))
+                    discussion['author'] = matching_tweet.get('author_id', 'Unknown') if matching_tweet else 'Unknown'
+
+        # Додаємо метадані
+        content_analysis['metadata'] = {
+            "analyzed_tweets": len(tweets),
+            "timestamp": datetime.now().isoformat(),
+            **metadata
+        }
+
+        # Логування завершення аналізу
+        logger.info(f"Content analysis complete. Topics found: {len(content_analysis.get('topics', []))}")
+        
+        return content_analysis
+
+    def _finish_sentiment(self, 
+                          tweets: List[Dict], 
+                          sentiment_analysis: Dict, 
+                          **metadata) -> Dict[str, Any]:
+        """Fill in distribution and metadata of a sentiment analysis returned by GPT."""
+        # ВАЖЛИВО: явно додаємо sentiment_distribution, якщо її немає
+        if 'sentiment_distribution' not in sentiment_analysis:
+            key_sentiments = sentiment_analysis.get('key_sentiments', [])
+            sentiment_analysis['sentiment_distribution'] = {
+                'positive': sum(1 for s in key_sentiments if s.get('sentiment') == 'positive'),
+                'negative': sum(1 for s in key_sentiments if s.get('sentiment') == 'negative'),
+                'neutral': sum(1 for s in key_sentiments if s.get('sentiment') == 'neutral')
+            }
+        
+        # Додаємо метадані
+        sentiment_analysis['metadata'] = {
+            "analyzed_tweets": len(tweets),
+            "timestamp": datetime.now().isoformat(),
+            **metadata
+        }
+
+        # Логування завершення аналізу
+        logger.info(f"Sentiment analysis complete. Sentiment score: {sentiment_analysis.get('overall_sentiment', {}).get('score', 'N/A')}")
+        
+        return sentiment_analysis
+
+    @staticmethod
+    def _content_error(error: Exception) -> Dict[str, Any]:
+        return {
+            "error": str(error),
+            "topics": [],
+            "key_discussions": [],
+            "trends": {"rising": [], "keywords": []},
+            "metadata": {
+                "error": True,
+                "timestamp": datetime.now().isoformat()
+            }
+        }
+
+    @staticmethod
+    def _sentiment_error(error: Exception) -> Dict[str, Any]:
+        return {
+            "error": str(error),
+            "overall_sentiment": {"score": 0, "summary": "", "confidence": 0},
+            "key_sentiments": [],
+            "sentiment_distribution": {
+                'positive': 0,
+                'negative': 0,
+                'neutral': 0
+            },
+            "emotional_patterns": {"primary_emotions": [], "notable_shifts": []},
+            "metadata": {
+                "error": True,
                 "timestamp": datetime.now().isoformat()
             }
+        }
 
-            # Логування завершення аналізу
-            logger.info(f"Content analysis complete. Topics found: {len(content_analysis.get('topics', []))}")
+    @staticmethod
+    def _resolve_discussions(content_analysis: Dict, batch: TweetBatch):
+        """Replace tweet ordinals of key discussions with the tweet text and author."""
+        discussions = []
+        for discussion in content_analysis.get('key_discussions') or []:
+            if not isinstance(discussion, dict):
+                continue
+            tweet = batch.tweet(discussion.pop('n', None))
+            if tweet is not None:
+                discussion['tweet_text'] = tweet.get('text', '')
+                discussion['author'] = tweet.get('author_id', 'Unknown')
+            if discussion.get('tweet_text'):
+                discussions.append(discussion)
+        content_analysis['key_discussions'] = discussions
+
+    async def _request_content(self, batch: TweetBatch, use_cache: bool = True) -> Optional[Dict]:
+        """Get content analysis of one batch from GPT."""
+        analysis = await self._gpt_request(
+            prompt=SYSTEM_ANALYSIS_PROMPT,
+            content=dumps_compact(batch.payload),
+            use_cache=use_cache
+        )
+        if not isinstance(analysis, dict) or 'topics' not in analysis:
+            return None
+        self._resolve_discussions(analysis, batch)
+        return analysis
+
+    async def _request_sentiment(self, batch: TweetBatch, use_cache: bool = True) -> Optional[Dict]:
+        """Get sentiment analysis of one batch from GPT."""
+        analysis = await self._gpt_request(
+            prompt=SENTIMENT_ANALYSIS_PROMPT,
+            content=dumps_compact(batch.payload),
+            use_cache=use_cache
+        )
+        if isinstance(analysis, dict) and (
+                'overall_sentiment' in analysis or 'sentiment_distribution' in analysis):
+            return analysis
+        return None
+
+    async def _request_fused(self, 
+                             batch: TweetBatch, 
+                             use_cache: bool = True) -> Optional[Tuple[Dict, Dict]]:
+        """Get content and sentiment analysis of one batch from a single GPT request."""
+        analysis = await self._gpt_request(
+            prompt=FUSED_ANALYSIS_PROMPT,
+            content=dumps_compact(batch.payload),
+            use_cache=use_cache
+        )
+        if not isinstance(analysis, dict):
+            return None
+        content_analysis = {
+            key: analysis[key] for key in ('topics', 'key_discussions', 'trends')
+            if key in analysis
+        }
+        self._resolve_discussions(content_analysis, batch)
+        sentiment_analysis = analysis.get('sentiment')
+        return content_analysis, dict(sentiment_analysis) if isinstance(sentiment_analysis, dict) else {}
+
+    async def analyze_content(self, 
+                              tweets: List[Dict], 
+                              use_cache: bool = True,
+                              on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Any]:
+        try:
+            if USE_TWEET_ENRICHMENT:
+                content_analysis = self._content_result(
+                    tweets, await self._enrich_tweets(tweets, use_cache, on_chunk)
+                )
+                if self._needs_summary(tweets):
+                    await self._summarize(content_analysis, None, use_cache)
+                return content_analysis
             
-            return content_analysis
+            # Додаємо логування початку аналізу
+            logger.info(f"Starting content analysis for {len(tweets)} tweets")
+
+            chunks = self._batch_tweets(tweets)
+            partials = await self._map_chunks(
+                chunks, lambda chunk: self._request_content(chunk, use_cache), on_chunk
+            )
+            valid = [partial for partial in partials if partial is not None]
+            if not valid:
+                raise ValueError("No chunk could be analyzed")
+            if len(chunks) == 1:
+                return self._finish_content(tweets, valid[0])
+            
+            # Reduce chunk results, then summarize only the merged result
+            content_analysis = merge_content_analyses(valid)
+            await self._summarize(content_analysis, None, use_cache)
+            return self._finish_content(
+                tweets, content_analysis, chunks=len(chunks), failed_chunks=len(chunks) - len(valid)
+            )
             
         except Exception as e:
             logger.error(f"Content analysis error: {e}")
-            return {
-                "error": str(e),
-                "topics": [],
-                "key_discussions": [],
-                "trends": {"rising": [], "keywords": []},
-                "metadata": {
-                    "error": True,
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
+            return self._content_error(e)
 
-    async def analyze_sentiment(self, tweets: List[Dict]) -> Dict[str, Any]:
+    async def analyze_sentiment(self, 
+                                tweets: List[Dict], 
+                                use_cache: bool = True,
+                                on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Any]:
         try:
+            if USE_TWEET_ENRICHMENT:
+                sentiment_analysis = self._sentiment_result(
+                    tweets, await self._enrich_tweets(tweets, use_cache, on_chunk)
+                )
+                if self._needs_summary(tweets):
+                    await self._summarize(None, sentiment_analysis, use_cache)
+                return sentiment_analysis
+            
             # Додаємо логування початку аналізу sentiment
             logger.info(f"Starting sentiment analysis for {len(tweets)} tweets")
 
-            sentiment_analysis = await self._gpt_request(
-                prompt=SENTIMENT_ANALYSIS_PROMPT,
-                content=json.dumps(tweets)
+            chunks = self._batch_tweets(tweets)
+            partials = await self._map_chunks(
+                chunks, lambda chunk: self._request_sentiment(chunk, use_cache), on_chunk
             )
+            valid = [
+                (partial, len(chunk)) for partial, chunk in zip(partials, chunks)
+                if partial is not None
+            ]
+            if not valid:
+                raise ValueError("No chunk could be analyzed")
+            if len(chunks) == 1:
+                return self._finish_sentiment(tweets, valid[0][0])
             
-            # ВАЖЛИВО: явно додаємо sentiment_distribution, якщо її немає
-            if 'sentiment_distribution' not in sentiment_analysis:
-                key_sentiments = sentiment_analysis.get('key_sentiments', [])
-                sentiment_analysis['sentiment_distribution'] = {
-                    'positive': sum(1 for s in key_sentiments if s.get('sentiment') == 'positive'),
-                    'negative': sum(1 for s in key_sentiments if s.get('sentiment') == 'negative'),
-                    'neutral': sum(1 for s in key_sentiments if s.get('sentiment') == 'neutral')
-                }
+            # Reduce chunk results, then summarize only the merged result
+            sentiment_analysis = merge_sentiment_analyses(valid)
+            await self._summarize(None, sentiment_analysis, use_cache)
+            return self._finish_sentiment(
+                tweets, sentiment_analysis, chunks=len(chunks), failed_chunks=len(chunks) - len(valid)
+            )
             
-            # Додаємо метадані
-            sentiment_analysis['metadata'] = {
-                "analyzed_tweets": len(tweets),
-                "timestamp": datetime.now().isoformat()
-            }
+        except Exception as e:
+            logger.error(f"Sentiment analysis error: {e}")
+            return self._sentiment_error(e)
 
-            # Логування завершення аналізу
-            logger.info(f"Sentiment analysis complete. Sentiment score: {sentiment_analysis.get('overall_sentiment', {}).get('score', 'N/A')}")
+    async def _analyze_fused(self, 
+                             tweets: List[Dict], 
+                             use_cache: bool = True,
+                             on_chunk: Optional[ChunkCallback] = None) -> Dict[str, Dict]:
+        """
+        Get content and sentiment analysis from one GPT request per chunk.
+        
+        Args:
+            tweets: Tweets to analyze
+            use_cache: Set to False to bypass the response cache
+            on_chunk: Called as each chunk finishes
             
-            return sentiment_analysis
+        Returns:
+            Dictionary with "content" and "sentiment" analyses
+        """
+        try:
+            logger.info(f"Starting fused analysis for {len(tweets)} tweets")
+            chunks = self._batch_tweets(tweets)
+            partials = await self._map_chunks(
+                chunks, lambda chunk: self._request_fused(chunk, use_cache), on_chunk
+            )
+            valid = [
+                (partial, len(chunk)) for partial, chunk in zip(partials, chunks)
+                if partial is not None
+            ]
+            if not valid:
+                raise ValueError("No chunk could be analyzed")
+            if len(chunks) == 1:
+                content_analysis, sentiment_analysis = valid[0][0]
+                return {
+                    "content": self._finish_content(tweets, content_analysis),
+                    "sentiment": self._finish_sentiment(tweets, sentiment_analysis)
+                }
             
+            content_analysis = merge_content_analyses([partial[0] for partial, _ in valid])
+            sentiment_analysis = merge_sentiment_analyses([(partial[1], size) for partial, size in valid])
+            await self._summarize(content_analysis, sentiment_analysis, use_cache)
+            metadata = {"chunks": len(chunks), "failed_chunks": len(chunks) - len(valid)}
+            return {
+                "content": self._finish_content(tweets, content_analysis, **metadata),
+                "sentiment": self._finish_sentiment(tweets, sentiment_analysis, **metadata)
+            }
         except Exception as e:
-            logger.error(f"Sentiment analysis error: {e}")
+            logger.error(f"Fused analysis error: {e}")
             return {
-                "error": str(e),
-                "overall_sentiment": {"score": 0, "summary": "", "confidence": 0},
-                "key_sentiments": [],
-                "sentiment_distribution": {
-                    'positive': 0,
-                    'negative': 0,
-                    'neutral': 0
-                },
-                "emotional_patterns": {"primary_emotions": [], "notable_shifts": []},
-                "metadata": {
-                    "error": True,
-                    "timestamp": datetime.now().isoformat()
+                "content": self._content_error(e),
+                "sentiment": self._sentiment_error(e)
+            }
+
+    async def analyze_all(self, 
+                          tweets: List[Dict], 
+                          use_cache: bool = True,
+                          fused: Optional[bool] = None,
+                          on_progress: Optional[StageCallback] = None) -> Dict[str, Dict]:
+        """
+        Run content and sentiment analysis of the same tweets.
+        
+        Tweets are analyzed in concurrent chunks and the chunk results
+        merged. With per-tweet enrichment the tweets are enriched once and
+        both analyses are built from the results. Otherwise the two kinds
+        of GPT requests run concurrently, or as one combined request per
+        chunk in fused mode.
+        
+        Args:
+            tweets: Tweets to analyze
+            use_cache: Set to False to bypass the caches
+            fused: Ask for both analyses in one request, FUSED_ANALYSIS if None
+            on_progress: Called with stage name, completed and total steps
+                as each chunk or stage finishes
+            
+        Returns:
+            Dictionary with "content" and "sentiment" analyses
+        """
+        fused = FUSED_ANALYSIS if fused is None else fused
+        
+        def report(stage: str, completed: int, total: int):
+            if on_progress:
+                on_progress(stage, completed, total)
+        
+        if USE_TWEET_ENRICHMENT:
+            chunk_count = 0
+            
+            def on_chunk(completed: int, total: int):
+                nonlocal chunk_count
+                chunk_count = total
+                report("enrichment", completed, total + 2)
+            
+            try:
+                enrichments = await self._enrich_tweets(tweets, use_cache, on_chunk)
+            except Exception as e:
+                logger.error(f"Tweet enrichment error: {e}")
+                report("enrichment", 1, 1)
+                return {
+                    "content": self._content_error(e),
+                    "sentiment": self._sentiment_error(e)
                 }
-            }
\ No newline at end of file
+            results = {
+                "content": self._content_result(tweets, enrichments),
+                "sentiment": self._sentiment_result(tweets, enrichments)
+            }
+            if self._needs_summary(tweets):
+                await self._summarize(results["content"], results["sentiment"], use_cache)
+            report("content", chunk_count + 1, chunk_count + 2)
+            report("sentiment", chunk_count + 2, chunk_count + 2)
+            return results
+        
+        if fused:
+            return await self._analyze_fused(
+                tweets, use_cache, lambda completed, total: report("analysis", completed, total)
+            )
+        
+        # Both analyses split the tweets the same way; count their chunks together
+        progress = {"content": (0, 1), "sentiment": (0, 1)}
+        
+        def chunk_reporter(stage: str) -> ChunkCallback:
+            def on_chunk(completed: int, total: int):
+                progress[stage] = (completed, total)
+                report(
+                    stage,
+                    sum(done for done, _ in progress.values()),
+                    sum(count for _, count in progress.values())
+                )
+            return on_chunk
+        
+        content_analysis, sentiment_analysis = await asyncio.gather(
+            self.analyze_content(tweets, use_cache, chunk_reporter("content")),
+            self.analyze_sentiment(tweets, use_cache, chunk_reporter("sentiment"))
+        )
+        return {"content": content_analysis, "sentiment": sentiment_analysis}
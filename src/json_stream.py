@@ -0,0 +1,203 @@
+# src/json_stream.py
+
+from collections import Counter
+from typing import Any, Iterable, List, Optional, Tuple
+import json
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLOSERS = {'{': '}', '[': ']'}
+
+
+class StreamingJSONParser:
+    """
+    Incremental, tolerant parser for a JSON object arriving in pieces.
+
+    Elements of watched top-level arrays (e.g. "matches") are returned
+    as soon as they are complete. Text before the first bracket, such as
+    a markdown fence, and anything after the root value are ignored. If
+    the text ends early, recover() closes it after the last complete
+    value, keeping only whole elements of top-level arrays.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        """
+        Initialize parser state.
+
+        Args:
+            keys: Names of top-level arrays whose elements are returned
+        """
+        self.keys = set(keys)
+        # Number of elements returned per array name
+        self.counts: Counter = Counter()
+
+        self._buffer = ''
+        self._position = 0
+        self._root_start: Optional[int] = None
+        self._done = False
+
+        # Open containers: kind ('{' or '['), key of the current value,
+        # whether an object expects a key next
+        self._stack: List[dict] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._element_start: Optional[int] = None
+
+        # Longest prefix that is valid once the open containers are closed
+        self._safe_end = 0
+        self._safe_closers = ''
+
+    @property
+    def done(self) -> bool:
+        """Whether the root value is complete."""
+        return self._done
+
+    def _closers(self) -> str:
+        return ''.join(CLOSERS[entry['kind']] for entry in reversed(self._stack))
+
+    def _mark_safe(self, end: int):
+        # Elements of watched arrays are recovered whole or not at all
+        if self._element_start is not None:
+            return
+        self._safe_end = end
+        self._safe_closers = self._closers()
+
+    def _top_array(self) -> Optional[str]:
+        """Get name of the top-level array at the top of the stack, if any."""
+        if (len(self._stack) == 2
+                and self._stack[0]['kind'] == '{'
+                and self._stack[1]['kind'] == '['):
+            return self._stack[1]['key'] or ''
+        return None
+
+    def _emit(self, name: str, end: int, items: List[Tuple[str, Any]]):
+        """Decode the element ending at end and add it to items if watched."""
+        text = self._buffer[self._element_start:end].strip()
+        self._element_start = None
+        if name not in self.keys:
+            return
+        try:
+            items.append((name, json.loads(text)))
+            self.counts[name] += 1
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed '{name}' element: {e}")
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next piece of text.
+
+        Args:
+            text: Next piece of the response
+
+        Returns:
+            List of (array name, element) for elements completed by this piece
+        """
+        self._buffer += text
+        items: List[Tuple[str, Any]] = []
+        buffer = self._buffer
+
+        for position in range(self._position, len(buffer)):
+            if self._done:
+                break
+            char = buffer[position]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    top = self._stack[-1]
+                    if top['kind'] == '{' and top['expect_key']:
+                        try:
+                            top['key'] = json.loads(buffer[self._string_start:position + 1])
+                        except json.JSONDecodeError:
+                            top['key'] = None
+                continue
+
+            if self._root_start is None:
+                if char not in CLOSERS:
+                    continue
+                self._root_start = position
+
+            if char in ' \t\r\n':
+                continue
+
+            name = self._top_array()
+            if name is not None and self._element_start is None and char not in ',]':
+                self._element_start = position
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in CLOSERS:
+                parent = self._stack[-1] if self._stack else None
+                key = parent['key'] if parent is not None and parent['kind'] == '{' else None
+                self._stack.append({'kind': char, 'key': key if char == '[' else None,
+                                    'expect_key': char == '{'})
+                self._mark_safe(position + 1)
+            elif char in '}]':
+                if name is not None and char == ']' and self._element_start is not None:
+                    # Scalar element closed by the end of the array
+                    self._emit(name, position, items)
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+                    self._mark_safe(position + 1)
+                    break
+                name = self._top_array()
+                if name is not None and self._element_start is not None:
+                    self._emit(name, position + 1, items)
+                self._mark_safe(position + 1)
+            elif char == ',':
+                if name is not None and self._element_start is not None:
+                    self._emit(name, position, items)
+                self._mark_safe(position)
+                top = self._stack[-1]
+                if top['kind'] == '{':
+                    top['expect_key'] = True
+                    top['key'] = None
+            elif char == ':':
+                self._stack[-1]['expect_key'] = False
+
+        self._position = len(buffer)
+        return items
+
+    def recover(self) -> Optional[Any]:
+        """
+        Get the value parsed so far.
+
+        Returns:
+            Complete root value, or the root value cut after its last
+            complete element with open containers closed; None if nothing
+            usable arrived
+        """
+        if self._root_start is None:
+            return None
+        text = self._buffer[self._root_start:self._safe_end] + self._safe_closers
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.error(f"Could not recover JSON response: {e}")
+            return None
+
+
+def recover_json(text: str) -> Optional[Any]:
+    """
+    Parse JSON that may be wrapped in other text or cut off.
+
+    Args:
+        text: Model response
+
+    Returns:
+        Parsed value, recovered up to the last complete element if
+        truncated, or None
+    """
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    return parser.recover()
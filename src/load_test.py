@@ -0,0 +1,170 @@
+# src/load_test.py
+
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import numpy as np
+from config import TWEETS_FILE, MAX_TWEETS_FOR_GPT, USE_FAKE_OPENAI
+from corpus_loader import load_corpus
+import gpt_analyzer
+from gpt_analyzer import GPTAnalyzer
+from request_scheduler import RequestScheduler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ('search', 'content', 'sentiment')
+
+# Queries cycled through by search requests
+QUERIES = [
+    'bitcoin', 'ethereum', 'defi', 'nft', 'web3', 'blockchain',
+    'crypto regulation', 'solana', 'stablecoin', 'airdrop'
+]
+
+
+def _failed(result: Any) -> bool:
+    """Whether an analyzer result reports an error."""
+    if not isinstance(result, dict):
+        return True
+    metadata = result.get('metadata') or result.get('search_metadata') or {}
+    return bool(result.get('error') or metadata.get('error'))
+
+
+def summarize_latencies(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """
+    Build the report of one scenario.
+
+    Args:
+        latencies: Seconds per completed request, failed ones included
+        errors: Number of failed requests
+        elapsed: Wall time of the scenario in seconds
+
+    Returns:
+        Dictionary with request counts, throughput and latency percentiles in ms
+    """
+    values = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(float(values.mean()), 1),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(values.max()), 1)
+    }
+
+
+async def run_scenario(analyzer: GPTAnalyzer,
+                       tweets: List[Dict],
+                       scenario: str,
+                       concurrency: int,
+                       total_requests: int,
+                       tweets_per_request: int = MAX_TWEETS_FOR_GPT,
+                       seed: int = 0) -> Dict[str, Any]:
+    """
+    Drive one analyzer method at a fixed concurrency.
+
+    Caches are bypassed so every request reaches the API; identical
+    concurrent requests are still coalesced.
+
+    Args:
+        analyzer: Analyzer under test
+        tweets: Tweets sampled for each request
+        scenario: One of SCENARIOS
+        concurrency: Requests in flight at the same time
+        total_requests: Requests to send
+        tweets_per_request: Tweets sent with each request
+        seed: Seed of the tweet sampling
+
+    Returns:
+        Report from summarize_latencies
+    """
+    rng = random.Random(seed)
+    samples = [
+        rng.sample(tweets, min(tweets_per_request, len(tweets)))
+        for _ in range(total_requests)
+    ]
+    operations: Dict[str, Callable[[int], Any]] = {
+        'search': lambda i: analyzer.search_tweets(samples[i], QUERIES[i % len(QUERIES)], use_cache=False),
+        'content': lambda i: analyzer.analyze_content(samples[i], use_cache=False),
+        'sentiment': lambda i: analyzer.analyze_sentiment(samples[i], use_cache=False)
+    }
+    operation = operations[scenario]
+    latencies: List[float] = []
+    errors = 0
+    next_request = iter(range(total_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_request:
+            started = time.perf_counter()
+            try:
+                failed = _failed(await operation(i))
+            except Exception as e:
+                logger.error(f"Request {i} failed: {e}")
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize_latencies(latencies, errors, time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test GPTAnalyzer; use USE_FAKE_OPENAI=1 to avoid API costs")
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--tweets-per-request', type=int, default=MAX_TWEETS_FOR_GPT)
+    parser.add_argument('--file', default=TWEETS_FILE, help="Tweets file to sample from")
+    parser.add_argument('--rpm', type=float, help="Override requests per minute limit of the scheduler")
+    parser.add_argument('--tpm', type=float, help="Override tokens per minute limit of the scheduler")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write the reports to this file")
+    args = parser.parse_args(argv)
+
+    if not USE_FAKE_OPENAI:
+        logger.warning("USE_FAKE_OPENAI is not set, the load test calls the real OpenAI API")
+    if args.rpm or args.tpm:
+        current = gpt_analyzer.request_scheduler
+        gpt_analyzer.request_scheduler = RequestScheduler(
+            requests_per_minute=args.rpm or current.requests.capacity,
+            tokens_per_minute=args.tpm or current.tokens.capacity,
+            max_retries=current.max_retries,
+            base_delay=current.base_delay,
+            max_delay=current.max_delay,
+            circuit_breaker=current.breaker
+        )
+
+    store, index = load_corpus(args.file)
+    tweets = store.tweets(store.all_rows())
+    analyzer = GPTAnalyzer(index=index)
+    scenarios = SCENARIOS if args.scenario == 'all' else (args.scenario,)
+
+    reports = {}
+    for scenario in scenarios:
+        reports[scenario] = asyncio.run(run_scenario(
+            analyzer, tweets, scenario, args.concurrency, args.requests,
+            args.tweets_per_request, args.seed
+        ))
+
+    print(f"{'scenario':<10} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for scenario, report in reports.items():
+        print(f"{scenario:<10} {report['requests']:>8} {report['errors']:>6} {report['throughput_rps']:>8} "
+              f"{report['p50_ms']:>9} {report['p95_ms']:>9} {report['p99_ms']:>9}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"config": vars(args), "reports": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# src/parallel_search.py
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import logging
+import multiprocessing
+import os
+import numpy as np
+from corpus_snapshot import open_snapshot, read_snapshot_header, write_snapshot
+from ranking import top_k_positions
+from search_engine import SearchEngine, SearchResult
+from search_index import InvertedIndex
+from tweet_store import TweetStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Engines of the shards opened in a worker process, by snapshot path
+_engines: Dict[str, SearchEngine] = {}
+
+
+def shard_bounds(size: int, shards: int) -> List[Tuple[int, int]]:
+    """Split rows 0..size into shards contiguous ranges of near equal length."""
+    return [(size * i // shards, size * (i + 1) // shards) for i in range(shards)]
+
+
+def shard_path(corpus_snapshot: str, shard: int, shards: int) -> str:
+    """Get snapshot path of a shard, next to the corpus snapshot."""
+    base = corpus_snapshot[:-len('.snap')] if corpus_snapshot.endswith('.snap') else corpus_snapshot
+    return f"{base}.shard{shard}-{shards}.snap"
+
+
+def load_shard(corpus_snapshot: str, path: str, start: int, end: int) -> SearchEngine:
+    """
+    Open a shard of a corpus snapshot, writing its snapshot first if missing or stale.
+
+    Args:
+        corpus_snapshot: Snapshot of the whole corpus
+        path: Shard snapshot path
+        start: First row of the shard in the corpus
+        end: One past the last row
+
+    Returns:
+        SearchEngine over the memory-mapped shard
+    """
+    source = {
+        "corpus": read_snapshot_header(corpus_snapshot)["source"],
+        "start": start,
+        "end": end
+    }
+    header = read_snapshot_header(path)
+    if header is None or header["source"] != source:
+        corpus, _ = open_snapshot(corpus_snapshot)
+        store = TweetStore.from_tweets(corpus.tweets(range(start, end)))
+        write_snapshot(path, store, InvertedIndex(store), source)
+    store, index = open_snapshot(path)
+    return SearchEngine(store, index)
+
+
+def open_shard(corpus_snapshot: str, path: str, start: int, end: int) -> int:
+    """Open a shard in the calling worker (see load_shard) and get its number of tweets."""
+    engine = _engines[path] = load_shard(corpus_snapshot, path, start, end)
+    return engine.size
+
+
+def search_shard(path: str, query: str, limit: Optional[int], filters: Optional[Dict]) -> SearchResult:
+    """Search a shard opened in the calling worker; rows are shard-local."""
+    return _engines[path].search(query, limit, filters)
+
+
+def merge_results(results: List[SearchResult], offsets: List[int], limit: Optional[int]) -> SearchResult:
+    """
+    Merge per-shard results into one.
+
+    Args:
+        results: Result of every shard, rows local to the shard
+        offsets: First corpus row of every shard
+        limit: Maximum number of rows kept, all if None
+
+    Returns:
+        SearchResult with corpus rows, best first; ties keep shard order
+    """
+    if not results:
+        return SearchResult(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0)
+    rows = np.concatenate([result.rows + offset for result, offset in zip(results, offsets)])
+    scores = np.concatenate([result.scores for result in results])
+    best = top_k_positions(scores, limit)
+    return SearchResult(rows[best], scores[best], sum(result.total for result in results))
+
+
+class ParallelSearch:
+    """
+    Keyword search split across shard worker processes.
+
+    The corpus is cut into contiguous row ranges. Every range is written
+    once as its own snapshot (tweet columns and inverted index) next to
+    the corpus snapshot, and is served by a dedicated worker process that
+    memory-maps it read-only, so workers share pages through the page
+    cache and only queries and result rows cross process boundaries.
+    Each worker returns its best rows with scores and its match count;
+    the results are merged here.
+
+    BM25 statistics are per shard, as in most sharded search engines;
+    shards of similar content rank close to a single index.
+
+    Has the search interface of SearchEngine, so it can be given to
+    GPTAnalyzer in its place.
+    """
+
+    def __init__(self, store: TweetStore, corpus_snapshot: str, shards: Optional[int] = None):
+        """
+        Start one worker per shard and open the shards in them.
+
+        Args:
+            store: Tweets of the corpus, rows are returned into it
+            corpus_snapshot: Snapshot file the store was opened from
+            shards: Number of shards and workers, one per CPU core if None
+        """
+        self.tweets = store
+        self.size = len(store)
+        self.shards = shards or os.cpu_count() or 1
+        self.bounds = shard_bounds(self.size, self.shards)
+        self.paths = [shard_path(corpus_snapshot, i, self.shards) for i in range(self.shards)]
+
+        # Spawned workers do not inherit the threads and locks of this process
+        context = multiprocessing.get_context('spawn')
+        self._workers = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context)
+            for _ in range(self.shards)
+        ]
+        opened = [
+            worker.submit(open_shard, corpus_snapshot, path, start, end)
+            for worker, path, (start, end) in zip(self._workers, self.paths, self.bounds)
+        ]
+        try:
+            for future in opened:
+                future.result()
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"Parallel search ready: {self.size} tweets in {self.shards} shards")
+
+    def search(self, query: str, limit: Optional[int] = None, filters: Optional[Dict] = None) -> SearchResult:
+        """
+        Search all shards in parallel and merge their best matches.
+
+        Args:
+            query: Raw search query string
+            limit: Maximum number of rows returned, all matches if None
+            filters: Advanced search filters
+
+        Returns:
+            SearchResult with rows of the whole corpus
+        """
+        futures: List[Future] = [
+            worker.submit(search_shard, path, query, limit, filters)
+            for worker, path in zip(self._workers, self.paths)
+        ]
+        results = [future.result() for future in futures]
+        return merge_results(results, [start for start, _ in self.bounds], limit)
+
+    def search_tweets(self, query: str, limit: Optional[int] = None, filters: Optional[Dict] = None) -> List[Dict]:
+        """Find the tweets matching a query, most relevant first (see search)."""
+        return self.tweets.tweets(self.search(query, limit, filters).rows)
+
+    def close(self):
+        """Stop the worker processes."""
+        for worker in self._workers:
+            worker.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,330 @@
+# src/partitions.py
+
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+import numpy as np
+from filter_engine import YEAR_MARGIN_SECONDS, Constraint
+from query_parser import And, Not, Or, QueryNode, Term, YearFilter
+from search_index import InvertedIndex
+from tweet_store import MISSING_TIMESTAMP, TweetStore, day_end, day_start
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# numpy datetime unit of each partition granularity
+GRANULARITY_UNITS = {'day': 'datetime64[D]', 'month': 'datetime64[M]'}
+
+# Bit positions set per trigram
+BLOOM_HASHES = 4
+
+# How many query pieces to keep partition masks for
+PIECE_CACHE_SIZE = 1024
+
+
+def _mix(codes: np.ndarray, seed: int) -> np.ndarray:
+    """Hash uint64 codes (splitmix64 finalizer)."""
+    mixed = (codes + np.uint64(seed)) * np.uint64(0x9E3779B97F4A7C15)
+    mixed ^= mixed >> np.uint64(29)
+    mixed *= np.uint64(0xBF58476D1CE4E5B9)
+    mixed ^= mixed >> np.uint64(32)
+    return mixed
+
+
+def trigram_codes(data: np.ndarray) -> np.ndarray:
+    """Get the 24-bit code of every byte trigram starting in data (uint8)."""
+    data = data.astype(np.uint64)
+    return (data[:-2] << np.uint64(16)) | (data[1:-1] << np.uint64(8)) | data[2:]
+
+
+def trigram_hashes(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Two independent uint64 hashes of every trigram code, for double hashing."""
+    return _mix(codes, 1), _mix(codes, 2) | np.uint64(1)
+
+
+def bloom_positions(first: np.ndarray, second: np.ndarray, bits: int) -> np.ndarray:
+    """Bit positions of hashed trigrams in a filter of bits bits."""
+    steps = np.arange(BLOOM_HASHES, dtype=np.uint64)
+    return ((first[:, None] + steps * second[:, None]) % np.uint64(bits)).ravel()
+
+
+class Partition(NamedTuple):
+    """Tweets posted in one day or month."""
+    key: str  # '2024-05', '2024-05-17', or 'unknown' for unparseable created_at
+    rows: np.ndarray  # Sorted store rows
+    min_time: int  # Earliest timestamp (epoch seconds)
+    max_time: int  # Latest timestamp
+
+
+class PartitionMap:
+    """
+    Store rows partitioned by posting day or month, for pruning.
+
+    Each partition keeps its time range and a Bloom filter of the
+    UTF-8 byte trigrams of its tokens. Terms match inside tokens, so a
+    partition can hold a match of a term only if every trigram of the
+    term is in its filter; a term shorter than three bytes never
+    prunes. The planner evaluates the query over partitions: partitions
+    outside a (year) or the date filters, and partitions missing a
+    trigram of a required term, are skipped, so a query on a recent
+    window or a rare keyword only touches the partitions that can match.
+
+    Pruning is a superset filter: what remains must still be matched.
+    """
+
+    def __init__(self,
+                 partitions: List[Partition],
+                 row_partitions: np.ndarray,
+                 blooms: np.ndarray,
+                 bloom_bits: int):
+        """
+        Initialize map.
+
+        Args:
+            partitions: Partitions in time order, 'unknown' last
+            row_partitions: Partition number of every store row
+            blooms: Packed Bloom filter bits, one row per partition (uint8)
+            bloom_bits: Bits per Bloom filter
+        """
+        self.partitions = partitions
+        self.row_partitions = row_partitions
+        self.blooms = blooms
+        self.bloom_bits = bloom_bits
+        self.min_times = np.array([partition.min_time for partition in partitions], dtype=np.int64)
+        self.max_times = np.array([partition.max_time for partition in partitions], dtype=np.int64)
+        self.sizes = np.array([len(partition.rows) for partition in partitions], dtype=np.int64)
+        self.unknown = np.array([partition.key == 'unknown' for partition in partitions], dtype=bool)
+        self._piece_cache: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+
+    @classmethod
+    def build(cls,
+              store: TweetStore,
+              index: Optional[InvertedIndex] = None,
+              granularity: str = 'month',
+              bits_per_trigram: int = 10) -> 'PartitionMap':
+        """
+        Partition a store.
+
+        Args:
+            store: Columnar tweets
+            index: Inverted index over the store; tokens are read from it
+                if given, otherwise from the tweet texts
+            granularity: 'day' or 'month'
+            bits_per_trigram: Bloom filter bits per distinct trigram of the
+                largest partition (10 gives about 1% false positives)
+
+        Returns:
+            PartitionMap over every row of the store
+        """
+        unit = GRANULARITY_UNITS[granularity]
+        timestamps = store.timestamps
+        missing = timestamps == MISSING_TIMESTAMP
+        periods = timestamps.astype('datetime64[s]').astype(unit)
+        # Unparseable created_at sorts after every real period
+        codes = np.where(missing, np.iinfo(np.int64).max, periods.astype(np.int64))
+        period_codes, row_partitions = np.unique(codes, return_inverse=True)
+        row_partitions = row_partitions.astype(np.int32)
+
+        order = np.argsort(row_partitions, kind='stable')
+        bounds = np.zeros(len(period_codes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_partitions, minlength=len(period_codes)), out=bounds[1:])
+        partitions = []
+        for number, code in enumerate(period_codes.tolist()):
+            rows = order[bounds[number]:bounds[number + 1]]
+            times = timestamps[rows]
+            if code == np.iinfo(np.int64).max:
+                key = 'unknown'
+            else:
+                key = str(np.int64(code).astype(unit))
+            partitions.append(Partition(key, rows, int(times.min()), int(times.max())))
+
+        blooms, bloom_bits = cls._build_blooms(
+            *cls._token_postings(store, index), row_partitions, len(partitions), bits_per_trigram
+        )
+        logger.info(
+            f"Partitioned {len(store)} tweets into {len(partitions)} {granularity} partitions "
+            f"with {bloom_bits}-bit trigram filters"
+        )
+        return cls(partitions, row_partitions, blooms, bloom_bits)
+
+    @staticmethod
+    def _token_postings(store: TweetStore,
+                        index: Optional[InvertedIndex]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the vocabulary and the (token, row) postings.
+
+        Returns:
+            UTF-8 bytes of all tokens, each followed by one separator
+            byte (uint8); start of every token in them plus the end; and
+            the token and row of every posting
+        """
+        if index is not None:
+            vocab = np.frombuffer(bytes(index.vocab_blob[0:len(index.vocab_blob)]), dtype=np.uint8)
+            starts = np.asarray(index.vocab_starts, dtype=np.int64)
+            offsets = np.asarray(index.doc_offsets)
+            posting_tokens = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+            return vocab, starts, posting_tokens, np.asarray(index.doc_ids[:offsets[-1]])
+
+        token_ids: Dict[str, int] = {}
+        posting_tokens: List[int] = []
+        posting_rows: List[int] = []
+        for row, text in enumerate(store.texts):
+            for token in set(text.lower().split()):
+                posting_tokens.append(token_ids.setdefault(token, len(token_ids)))
+                posting_rows.append(row)
+        encoded = [token.encode('utf-8') + b'\n' for token in token_ids]
+        starts = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(token) for token in encoded], out=starts[1:])
+        return (
+            np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            starts,
+            np.array(posting_tokens, dtype=np.int64),
+            np.array(posting_rows, dtype=np.int64)
+        )
+
+    @staticmethod
+    def _build_blooms(vocab: np.ndarray,
+                      starts: np.ndarray,
+                      posting_tokens: np.ndarray,
+                      posting_rows: np.ndarray,
+                      row_partitions: np.ndarray,
+                      partition_count: int,
+                      bits_per_trigram: int) -> Tuple[np.ndarray, int]:
+        """Build packed trigram Bloom filters of every partition."""
+        # Trigrams inside each token, grouped by token
+        lengths = np.diff(starts)
+        byte_tokens = np.repeat(np.arange(len(lengths)), lengths)
+        token_ends = np.repeat(starts[1:] - 1, lengths)
+        inside = np.flatnonzero(np.arange(len(vocab) - 2) + 2 < token_ends[:len(vocab) - 2])
+        gram_codes = trigram_codes(vocab)[inside]
+        gram_starts = np.searchsorted(byte_tokens[inside], np.arange(len(lengths) + 1))
+        gram_counts = np.diff(gram_starts)
+
+        # Partitions every token occurs in, then their trigrams
+        pairs = np.unique(posting_tokens.astype(np.int64) * partition_count + row_partitions[posting_rows])
+        pair_tokens, pair_partitions = pairs // partition_count, pairs % partition_count
+        counts = gram_counts[pair_tokens]
+        if not counts.sum():
+            return np.zeros((partition_count, 8), dtype=np.uint8), 64
+        ends = np.cumsum(counts)
+        grams = np.repeat(gram_starts[pair_tokens] - (ends - counts), counts) + np.arange(ends[-1])
+        partitions = np.repeat(pair_partitions, counts).astype(np.uint64)
+
+        # Distinct (partition, trigram) pairs size the filters
+        keys = np.unique((partitions << np.uint64(24)) | gram_codes[grams])
+        partitions = keys >> np.uint64(24)
+        first, second = trigram_hashes(keys & np.uint64(0xFFFFFF))
+
+        largest = int(np.bincount(partitions.astype(np.int64), minlength=partition_count).max())
+        bloom_bits = 64
+        while bloom_bits < largest * bits_per_trigram:
+            bloom_bits *= 2
+
+        # Set bits through flat positions over all filters
+        positions = bloom_positions(first, second, bloom_bits)
+        flat = np.unique(np.repeat(partitions, BLOOM_HASHES) * np.uint64(bloom_bits) + positions)
+        blooms = np.zeros(partition_count * bloom_bits // 8, dtype=np.uint8)
+        byte_index = (flat >> np.uint64(3)).astype(np.int64)
+        bit_values = np.left_shift(1, (flat & np.uint64(7)).astype(np.int64))
+        runs = np.flatnonzero(np.r_[True, byte_index[1:] != byte_index[:-1]])
+        blooms[byte_index[runs]] = np.add.reduceat(bit_values, runs).astype(np.uint8)
+        return blooms.reshape(partition_count, bloom_bits // 8), bloom_bits
+
+    def _piece_partitions(self, piece: str) -> np.ndarray:
+        """Mask of partitions whose filter holds every trigram of a piece."""
+        mask = self._piece_cache.get(piece)
+        if mask is not None:
+            self._piece_cache.move_to_end(piece)
+        else:
+            codes = np.unique(trigram_codes(np.frombuffer(piece.encode('utf-8'), dtype=np.uint8)))
+            mask = np.ones(len(self.partitions), dtype=bool)
+            if len(codes):
+                first, second = trigram_hashes(codes)
+                positions = bloom_positions(first, second, self.bloom_bits)
+                byte_index = (positions >> np.uint64(3)).astype(np.int64)
+                bit_values = np.left_shift(1, (positions & np.uint64(7)).astype(np.int64)).astype(np.uint8)
+                mask = np.all(self.blooms[:, byte_index] & bit_values, axis=1)
+            self._piece_cache[piece] = mask
+            if len(self._piece_cache) > PIECE_CACHE_SIZE:
+                self._piece_cache.popitem(last=False)
+        return mask
+
+    def _overlapping(self, start: Optional[int], end: Optional[int]) -> np.ndarray:
+        """Mask of partitions with tweets posted between start and end (inclusive, unbounded if None)."""
+        mask = ~self.unknown
+        if start is not None:
+            mask &= self.max_times >= start
+        if end is not None:
+            mask &= self.min_times <= end
+        return mask
+
+    def can_match(self, node: QueryNode) -> np.ndarray:
+        """
+        Evaluate a query tree over partitions.
+
+        Args:
+            node: Node from QueryParser.parse_ast
+
+        Returns:
+            Mask of partitions that can hold a match
+        """
+        if isinstance(node, Term):
+            mask = np.ones(len(self.partitions), dtype=bool)
+            for piece in node.text.lower().split():
+                mask &= self._piece_partitions(piece)
+            return mask
+        if isinstance(node, And):
+            mask = np.ones(len(self.partitions), dtype=bool)
+            for child in node.children:
+                if not isinstance(child, Not):
+                    mask &= self.can_match(child)
+            return mask
+        if isinstance(node, Or):
+            mask = np.zeros(len(self.partitions), dtype=bool)
+            for child in node.children:
+                mask |= self.can_match(child)
+            return mask
+        if isinstance(node, YearFilter):
+            # The year is read from created_at, which may not parse as a timestamp
+            return self._overlapping(
+                day_start(date(node.year, 1, 1)) - YEAR_MARGIN_SECONDS,
+                day_end(date(node.year, 12, 31)) + YEAR_MARGIN_SECONDS
+            ) | self.unknown
+        # Exclusions and field filters do not prune
+        return np.ones(len(self.partitions), dtype=bool)
+
+    def constraint(self, root: QueryNode, filters: Optional[Dict] = None) -> Optional[Constraint]:
+        """
+        Get the rows of partitions that can match a query.
+
+        Args:
+            root: Root node from QueryParser.parse_ast
+            filters: Advanced search filters; date_from and date_to prune
+
+        Returns:
+            Constraint for FilterEngine.candidates, None if no partition is skipped
+        """
+        mask = self.can_match(root)
+        filters = filters or {}
+        if filters.get('date_from') or filters.get('date_to'):
+            mask &= self._overlapping(
+                day_start(date.fromisoformat(filters['date_from'])) if filters.get('date_from') else None,
+                day_end(date.fromisoformat(filters['date_to'])) if filters.get('date_to') else None
+            )
+        if mask.all():
+            return None
+        kept = np.flatnonzero(mask)
+        logger.info(f"Searching {len(kept)} of {len(self.partitions)} partitions")
+
+        def rows() -> np.ndarray:
+            if not len(kept):
+                return np.empty(0, dtype=np.int64)
+            return np.sort(np.concatenate([self.partitions[number].rows for number in kept.tolist()]))
+
+        return Constraint(
+            int(self.sizes[kept].sum()),
+            rows,
+            lambda candidates: mask[self.row_partitions[candidates]]
+        )
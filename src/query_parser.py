@@ -1,7 +1,7 @@
 # src/query_parser.py
 
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
 import re
 import logging
 
@@ -9,6 +9,62 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tokens of the search query language, tried in order at each position
+TOKEN_PATTERN = re.compile(r'''
+    (?P<phrase>"[^"]*"|'[^']*'(?=[\s()]|$))   # quoted phrase
+  | (?P<year>\(\d{4}\))                      # (2024)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<neg>-)(?=\S)                          # -term, -"phrase", -(group)
+  | (?P<field>[a-zA-Z_]+:[^\s()"]+)            # from:user, lang:en
+  | (?P<word>[^\s()"]+)
+''', re.VERBOSE)
+
+# Field operators understood by the matcher
+SUPPORTED_FIELDS = ('from', 'lang', 'filter')
+SUPPORTED_TWEET_FILTERS = ('retweets', 'replies', 'links')
+
+# Fields that narrow the whole query when used outside parentheses
+QUERY_WIDE_FIELDS = ('lang', 'filter')
+
+@dataclass(frozen=True)
+class Term:
+    """Literal word or quoted phrase, matched as a substring of tweet text."""
+    text: str                    # normalized (lowercased) text
+    phrase: bool = False
+
+@dataclass(frozen=True)
+class And:
+    """All children must match."""
+    children: Tuple['QueryNode', ...]
+
+@dataclass(frozen=True)
+class Or:
+    """At least one child must match."""
+    children: Tuple['QueryNode', ...]
+
+@dataclass(frozen=True)
+class Not:
+    """Child must not match."""
+    child: 'QueryNode'
+
+@dataclass(frozen=True)
+class FieldFilter:
+    """Field operator such as from:user, lang:en or filter:retweets."""
+    name: str
+    value: str
+
+@dataclass(frozen=True)
+class YearFilter:
+    """Year operator written as (2024)."""
+    year: int
+
+@dataclass(frozen=True)
+class MatchAll:
+    """Matches every tweet (empty query)."""
+
+QueryNode = Union[Term, And, Or, Not, FieldFilter, YearFilter, MatchAll]
+
 @dataclass
 class SearchQuery:
     """Structure to hold parsed search query components."""
@@ -78,10 +134,10 @@ class QueryParser:
             
             # Process operators and keywords
             query = query.replace(' AND ', ' ')  # Normalize AND
-            if 'OR' in query:
+            if re.search(r'\bOR\b', query):
                 # Handle OR operator
                 search_query.operators.append('OR')
-                terms = [term.strip() for term in query.split('OR')]
+                terms = [term.strip() for term in re.split(r'\bOR\b', query)]
                 search_query.keywords = [term for term in terms if term]
             else:
                 # If no OR, split into individual words
@@ -101,6 +157,36 @@ class QueryParser:
             # Return empty query object in case of error
             return SearchQuery([], [], [], [], {}, None)
     
+    def parse_ast(self, query: str) -> QueryNode:
+        """
+        Parse search query into a boolean expression tree.
+        
+        AND binds tighter than OR and parentheses group sub-expressions,
+        so "a b OR c" means "(a AND b) OR c". Year, lang: and filter:
+        operators and exclusions used outside parentheses narrow the
+        whole query, so "a OR b -scam lang:en" excludes "scam" from both
+        branches.
+        
+        Args:
+            query: Raw search query string
+            
+        Returns:
+            Root node of the expression tree
+        """
+        try:
+            tokens = [
+                (match.lastgroup, match.group(match.lastgroup))
+                for match in TOKEN_PATTERN.finditer(query)
+            ]
+            parser = _AstBuilder(tokens)
+            root = parser.build()
+            logger.debug(f"Parsed query tree: {root}")
+            return root
+            
+        except Exception as e:
+            logger.error(f"Error parsing query tree: {e}")
+            return MatchAll()
+    
     def generate_search_conditions(self, query: SearchQuery) -> Dict:
         """
         Generate search conditions from parsed query.
@@ -121,6 +207,124 @@ class QueryParser:
             }
         }
 
+class _AstBuilder:
+    """Recursive descent parser over query tokens."""
+    
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+        self.query_wide: List[QueryNode] = []
+    
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+    
+    def _is_operator(self, token: Optional[Tuple[str, str]], operator: str) -> bool:
+        return token is not None and token == ('word', operator)
+    
+    def build(self) -> QueryNode:
+        nodes = []
+        while self._peek() is not None:
+            node = self._parse_or()
+            if node is not None:
+                nodes.append(node)
+            if self._peek() is not None:
+                # Unbalanced closing parenthesis at top level
+                self.pos += 1
+        nodes.extend(self.query_wide)
+        return _combine(And, nodes) or MatchAll()
+    
+    def _parse_or(self) -> Optional[QueryNode]:
+        branches = [self._parse_and()]
+        while self._is_operator(self._peek(), 'OR'):
+            self.pos += 1
+            branches.append(self._parse_and())
+        return _combine(Or, [branch for branch in branches if branch is not None])
+    
+    def _parse_and(self) -> Optional[QueryNode]:
+        nodes = []
+        while True:
+            token = self._peek()
+            if token is None or token[0] == 'rparen' or self._is_operator(token, 'OR'):
+                break
+            if self._is_operator(token, 'AND'):
+                self.pos += 1
+                continue
+            node = self._parse_unary()
+            if node is None:
+                continue
+            if self.depth == 0 and _is_query_wide(node):
+                self.query_wide.append(node)
+            else:
+                nodes.append(node)
+        return _combine(And, nodes)
+    
+    def _parse_unary(self) -> Optional[QueryNode]:
+        kind, value = self.tokens[self.pos]
+        if kind == 'neg':
+            self.pos += 1
+            if self._peek() is None or self._peek()[0] == 'rparen':
+                return None
+            child = self._parse_unary()
+            return Not(child) if child is not None else None
+        return self._parse_primary()
+    
+    def _parse_primary(self) -> Optional[QueryNode]:
+        kind, value = self.tokens[self.pos]
+        self.pos += 1
+        
+        if kind == 'lparen':
+            self.depth += 1
+            node = self._parse_or()
+            self.depth -= 1
+            if self._peek() is not None and self._peek()[0] == 'rparen':
+                self.pos += 1
+            return node
+        
+        if kind == 'phrase':
+            return Term(value[1:-1].lower().strip(), phrase=True)
+        
+        if kind == 'year':
+            return YearFilter(int(value[1:-1]))
+        
+        if kind == 'field':
+            name, field_value = value.split(':', 1)
+            name = name.lower()
+            if name in SUPPORTED_FIELDS:
+                field_value = field_value.lower()
+                if name == 'from':
+                    field_value = field_value.lstrip('@')
+                if name == 'filter' and field_value not in SUPPORTED_TWEET_FILTERS:
+                    logger.warning(f"Ignoring unsupported filter: {value}")
+                    return None
+                return FieldFilter(name, field_value)
+            # Not an operator (e.g. a URL), match it literally
+            return Term(value.lower())
+        
+        return Term(value.lower())
+
+def _is_query_wide(node: QueryNode) -> bool:
+    """Check whether a top-level node narrows the whole query."""
+    if isinstance(node, Not):
+        return True
+    if isinstance(node, YearFilter):
+        return True
+    return isinstance(node, FieldFilter) and node.name in QUERY_WIDE_FIELDS
+
+def _combine(node_type, nodes: List[QueryNode]) -> Optional[QueryNode]:
+    """Build an And/Or node, collapsing trivial cases."""
+    flattened = []
+    for node in nodes:
+        if isinstance(node, node_type):
+            flattened.extend(node.children)
+        else:
+            flattened.append(node)
+    if not flattened:
+        return None
+    if len(flattened) == 1:
+        return flattened[0]
+    return node_type(tuple(flattened))
+
 class TweetMatcher:
     """Class for matching tweets against search conditions."""
     
@@ -0,0 +1,265 @@
+# src/query_plan.py
+
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+import re
+import logging
+from query_parser import (
+    QueryParser,
+    QueryNode,
+    Term,
+    And,
+    Or,
+    Not,
+    FieldFilter,
+    YearFilter
+)
+from tweet_store import tweet_is_reply, tweet_is_retweet
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How many compiled plans to keep, keyed by query string and by parsed tree
+PLAN_CACHE_SIZE = 256
+
+# Language code assumed when a tweet has no 'lang' field
+DEFAULT_LANG = 'en'
+
+Evaluator = Callable[[int, Dict], bool]
+
+
+def tweet_year(tweet: Dict) -> Optional[int]:
+    """Get year a tweet was posted in, or None if it cannot be parsed."""
+    try:
+        return int(tweet['created_at'].split('-')[0])
+    except Exception:
+        return None
+
+
+def tweet_author(tweet: Dict) -> str:
+    """Get normalized author handle of a tweet."""
+    return str(tweet.get('author_id', '')).lower().lstrip('@')
+
+
+def tweet_lang(tweet: Dict) -> str:
+    """Get normalized language code of a tweet."""
+    return str(tweet.get('lang', DEFAULT_LANG)).lower()
+
+
+def tweet_has_filter(tweet: Dict, name: str) -> bool:
+    """
+    Check a filter: operator against a tweet.
+
+    Args:
+        tweet: Tweet dictionary
+        name: Filter name, one of SUPPORTED_TWEET_FILTERS
+
+    Returns:
+        Boolean indicating if tweet has the property
+    """
+    text = tweet.get('text') or ''
+    if name == 'retweets':
+        return tweet_is_retweet(tweet)
+    if name == 'replies':
+        return tweet_is_reply(tweet)
+    if name == 'links':
+        return 'http://' in text or 'https://' in text
+    return False
+
+
+class LiteralScanner:
+    """
+    Find all query literals in a text with a single pass.
+
+    Literals are compiled into one alternation evaluated as a lookahead
+    at every position, longest literal first, so each match reports the
+    longest literal starting there. Every other literal found at that
+    position is a prefix of it, so each literal carries a precomputed
+    mask of all literals it contains. This keeps the scan inside the
+    regex engine instead of a per-character Python loop.
+    """
+
+    def __init__(self, literals: List[str]):
+        """
+        Compile scanner for non-empty lowercase literals.
+
+        Args:
+            literals: Literals, bit i of a scan mask stands for literals[i]
+        """
+        self.literals = literals
+        self.full_mask = (1 << len(literals)) - 1
+        self._masks = {
+            literal: sum(
+                1 << i for i, other in enumerate(literals) if other in literal
+            )
+            for literal in literals
+        }
+        ordered = sorted(literals, key=len, reverse=True)
+        self._pattern = re.compile(
+            '(?=(' + '|'.join(re.escape(literal) for literal in ordered) + '))'
+        ) if literals else None
+
+    def scan(self, text: str) -> int:
+        """
+        Get bitmask of literals occurring in a lowercased text.
+
+        Args:
+            text: Lowercased tweet text
+
+        Returns:
+            Bitmask with bit i set if literals[i] occurs in text
+        """
+        if self._pattern is None:
+            return 0
+        mask = 0
+        masks = self._masks
+        for match in self._pattern.finditer(text):
+            mask |= masks[match.group(1)]
+            if mask == self.full_mask:
+                break
+        return mask
+
+
+class QueryPlan:
+    """Executable form of a parsed query."""
+
+    def __init__(self, root: QueryNode):
+        """
+        Compile a query tree.
+
+        Args:
+            root: Root node from QueryParser.parse_ast
+        """
+        self.root = root
+
+        positive, negative = set(), set()
+        _collect_literals(root, positive, negative, negated=False)
+        self.literals = sorted(positive | negative)
+        self.positive_literals = sorted(positive)
+        self.bits = {literal: 1 << i for i, literal in enumerate(self.literals)}
+        self.positive_mask = sum(self.bits[literal] for literal in positive)
+
+        self.scanner = LiteralScanner(self.literals)
+        self._evaluate = self._compile(root)
+
+    def _compile(self, node: QueryNode) -> Evaluator:
+        """Turn a tree node into an evaluator over (literal mask, tweet)."""
+        if isinstance(node, Term):
+            if not node.text:
+                # Empty phrase is contained in every text
+                return lambda mask, tweet: True
+            bit = self.bits[node.text]
+            return lambda mask, tweet: mask & bit != 0
+
+        if isinstance(node, (And, Or)):
+            # Plain terms collapse into one mask test, the rest stay callables
+            term_mask = 0
+            others = []
+            for child in node.children:
+                if isinstance(child, Term) and child.text:
+                    term_mask |= self.bits[child.text]
+                else:
+                    others.append(self._compile(child))
+
+            if isinstance(node, And):
+                def evaluate_and(mask, tweet):
+                    if mask & term_mask != term_mask:
+                        return False
+                    return all(evaluate(mask, tweet) for evaluate in others)
+                return evaluate_and
+
+            def evaluate_or(mask, tweet):
+                if mask & term_mask:
+                    return True
+                return any(evaluate(mask, tweet) for evaluate in others)
+            return evaluate_or
+
+        if isinstance(node, Not):
+            child = self._compile(node.child)
+            return lambda mask, tweet: not child(mask, tweet)
+
+        if isinstance(node, YearFilter):
+            year = node.year
+            return lambda mask, tweet: tweet_year(tweet) == year
+
+        if isinstance(node, FieldFilter):
+            value = node.value
+            if node.name == 'from':
+                return lambda mask, tweet: tweet_author(tweet) == value
+            if node.name == 'lang':
+                return lambda mask, tweet: tweet_lang(tweet) == value
+            return lambda mask, tweet: tweet_has_filter(tweet, value)
+
+        return lambda mask, tweet: True
+
+    def scan(self, text: str) -> int:
+        """Get bitmask of query literals occurring in a lowercased text."""
+        return self.scanner.scan(text)
+
+    def match_mask(self, tweet: Dict) -> Optional[int]:
+        """
+        Match a tweet, scanning its text once.
+
+        Args:
+            tweet: Tweet dictionary
+
+        Returns:
+            Literal bitmask if tweet matches, None otherwise
+        """
+        try:
+            mask = self.scanner.scan(tweet['text'].lower())
+            return mask if self._evaluate(mask, tweet) else None
+        except Exception as e:
+            logger.error(f"Error matching tweet: {e}")
+            return None
+
+    def matches(self, tweet: Dict) -> bool:
+        """Check if tweet matches the query."""
+        return self.match_mask(tweet) is not None
+
+    def relevance(self, mask: int) -> int:
+        """Count distinct non-excluded query literals in a scan mask."""
+        return bin(mask & self.positive_mask).count('1')
+
+
+def _collect_literals(node: QueryNode, positive: set, negative: set, negated: bool):
+    """Split literals of a tree by whether they appear under a NOT."""
+    if isinstance(node, Term):
+        if node.text:
+            (negative if negated else positive).add(node.text)
+    elif isinstance(node, (And, Or)):
+        for child in node.children:
+            _collect_literals(child, positive, negative, negated)
+    elif isinstance(node, Not):
+        _collect_literals(node.child, positive, negative, not negated)
+
+
+_parser = QueryParser()
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile_tree(root: QueryNode) -> QueryPlan:
+    return QueryPlan(root)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile_text(query: str) -> QueryPlan:
+    return _compile_tree(_parser.parse_ast(query))
+
+
+def compile_query(query: str) -> QueryPlan:
+    """
+    Parse and compile a search query, memoized by query string.
+
+    Plans are also shared by queries with the same parsed tree, so
+    spelling variants (e.g. extra spaces between words) compile once,
+    while spaces inside quoted phrases are kept as written.
+
+    Args:
+        query: Raw search query string
+
+    Returns:
+        Compiled QueryPlan
+    """
+    return _compile_text(query)
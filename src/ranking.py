@@ -0,0 +1,148 @@
+# src/ranking.py
+
+from typing import Dict, Iterable, Optional, Sequence
+import logging
+import numpy as np
+from search_index import InvertedIndex
+from tweet_store import ENGAGEMENT_FIELDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+DEFAULT_ENGAGEMENT_BOOST = 0.2
+
+
+def top_k_positions(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """
+    Find the best scores without sorting all of them.
+
+    Args:
+        scores: Score of every candidate
+        k: Number of candidates to select, all if None
+
+    Returns:
+        Positions of the selected candidates, best first; ties keep candidate order
+    """
+    positions = np.arange(len(scores))
+    if k is not None and k < len(scores):
+        # Partial selection is linear; only the k winners get sorted.
+        # Candidates tied with the k-th score are taken in order
+        k = max(k, 0)
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k] if k else np.inf
+        better = positions[scores > threshold]
+        tied = positions[scores == threshold][:k - len(better)]
+        positions = np.concatenate([better, tied])
+    return positions[np.lexsort((positions, -scores[positions]))]
+
+
+def top_k_rows(rows: np.ndarray, scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """
+    Select the best scored rows without sorting all of them.
+
+    Args:
+        rows: Candidate rows
+        scores: Score of every candidate
+        k: Number of rows to select, all candidates if None
+
+    Returns:
+        Selected rows, best first; ties keep candidate order
+    """
+    return np.asarray(rows)[top_k_positions(scores, k)]
+
+
+def engagement_column(tweets: Sequence[Dict]) -> np.ndarray:
+    """Total engagement per tweet, read from the store column when there is one."""
+    if hasattr(tweets, 'column'):
+        return tweets.column('engagement')
+    return np.array([
+        sum((tweet.get('metrics') or {}).get(field, 0) for field in ENGAGEMENT_FIELDS)
+        for tweet in tweets
+    ], dtype=np.int64)
+
+
+class BM25Scorer:
+    """
+    Okapi BM25 over the postings of an inverted index.
+
+    Document frequencies and tweet lengths come from the index, so
+    scoring a query only touches the postings of its words. Query words
+    keep the substring semantics of matching: "crypto" counts every
+    token containing it, e.g. "#crypto" and "cryptocurrency".
+
+    Scores can be boosted by engagement: they are multiplied by
+    1 + boost * log(1 + engagement) / log(1 + max engagement), and a
+    query without words (e.g. only from:) ranks by engagement alone.
+    """
+
+    def __init__(self,
+                 index: InvertedIndex,
+                 engagement: Optional[np.ndarray] = None,
+                 k1: float = DEFAULT_K1,
+                 b: float = DEFAULT_B,
+                 engagement_boost: float = DEFAULT_ENGAGEMENT_BOOST):
+        """
+        Precompute corpus statistics.
+
+        Args:
+            index: Index over the tweets
+            engagement: Total engagement per tweet, no boost if None
+            k1: Term frequency saturation
+            b: Length normalization, 0 ignores tweet length
+            engagement_boost: Largest relative boost, for the most engaged tweet
+        """
+        self.index = index
+        self.k1 = k1
+        self.b = b
+        self.documents = len(index.all_docs)
+        lengths = index.doc_lengths
+        average = lengths[index.all_docs].mean() if self.documents else 1.0
+        # Per-tweet part of the BM25 denominator
+        self.length_norm = (k1 * (1 - b + b * lengths / max(average, 1.0))).astype(np.float32)
+
+        self.boost = None
+        if engagement is not None and engagement_boost:
+            engagement = np.log1p(np.maximum(engagement, 0).astype(np.float64))
+            top = engagement.max() if len(engagement) else 0.0
+            if top > 0:
+                self.boost = (engagement_boost * engagement / top).astype(np.float32)
+
+    def idf(self, document_frequency: int) -> float:
+        """BM25 inverse document frequency, always positive."""
+        return float(np.log(1 + (self.documents - document_frequency + 0.5) / (document_frequency + 0.5)))
+
+    def score(self, rows: np.ndarray, terms: Iterable[str]) -> np.ndarray:
+        """
+        Score candidate tweets against query terms.
+
+        Args:
+            rows: Sorted candidate rows
+            terms: Keywords and phrases of the query; phrases count word by word
+
+        Returns:
+            Score of every candidate
+        """
+        rows = np.asarray(rows)
+        scores = np.zeros(len(rows), dtype=np.float32)
+        words = [word for term in terms for word in term.lower().split()]
+
+        for word in words:
+            docs, freqs = self.index.term_postings(word)
+            if not len(docs) or not len(rows):
+                continue
+            idf = self.idf(len(docs))
+            positions = np.searchsorted(rows, docs)
+            found = positions < len(rows)
+            found[found] = rows[positions[found]] == docs[found]
+            docs, freqs, positions = docs[found], freqs[found], positions[found]
+            freqs = freqs.astype(np.float32)
+            scores[positions] += idf * freqs * (self.k1 + 1) / (freqs + self.length_norm[docs])
+
+        if self.boost is not None:
+            if words:
+                scores *= 1 + self.boost[rows]
+            else:
+                scores += self.boost[rows]
+        return scores
@@ -0,0 +1,469 @@
+# src/request_scheduler.py
+
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# HTTP statuses worth retrying; 5xx also count as upstream failures
+RETRYABLE_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+
+
+class Priority(IntEnum):
+    """Scheduling lane of a request; lower values are admitted first."""
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously up to its capacity."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Get seconds until amount is available (amounts over capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(missing, 0) / self.refill_per_second
+
+    def take(self, amount: float):
+        """Remove tokens; call only after wait_time returned 0."""
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        """Return unused tokens."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated upstream failures.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests are rejected for reset_seconds. Then a single probe request
+    is let through; its success closes the circuit, its failure opens it
+    again. Errors that say nothing about upstream health (e.g. 400 or 429)
+    neither count as failures nor close the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self, now: float) -> bool:
+        """Check whether a request may go upstream."""
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        """Let another probe through after one that ended without an answer."""
+        self._probing = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self, now: float):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit breaker open after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = now
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: float = field(compare=False)
+    loop: asyncio.AbstractEventLoop = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """Get HTTP status of an API error, None for connection errors and others."""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Read the delay requested by the server from an API error.
+
+    Args:
+        error: Exception raised by the client
+
+    Returns:
+        Seconds from retry-after-ms or retry-after headers, None if absent
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_connection_error(error: Exception) -> bool:
+    return any(cls.__name__ in ('APIConnectionError', 'APITimeoutError') for cls in type(error).__mro__) \
+        or isinstance(error, (ConnectionError, asyncio.TimeoutError))
+
+
+class RequestScheduler:
+    """
+    Admission control in front of an API client.
+
+    Requests wait for both a requests-per-minute and a tokens-per-minute
+    token bucket, in priority order, then run with retries. Retries use
+    jittered exponential backoff and honor retry-after; a 429 pauses all
+    admissions for the requested time. Server and connection failures
+    feed a circuit breaker that rejects requests while upstream is
+    degraded.
+
+    Waiting uses futures of the caller's own event loop, so one scheduler
+    may be shared by every loop and thread of the process.
+    """
+
+    def __init__(self,
+                 requests_per_minute: float = 500,
+                 tokens_per_minute: float = 150000,
+                 max_retries: int = 5,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30.0,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize limits.
+
+        Args:
+            requests_per_minute: Request rate limit
+            tokens_per_minute: Token rate limit (prompt plus completion)
+            max_retries: Retries after the first attempt
+            base_delay: Backoff ceiling of the first retry in seconds
+            max_delay: Largest backoff in seconds
+            circuit_breaker: Breaker for upstream failures, default if None
+        """
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = circuit_breaker or CircuitBreaker()
+
+        self._lock = threading.Lock()
+        self._queue: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "rejected": 0
+        }
+
+    def _wake_head(self):
+        """Wake the first waiter in priority order, on its own loop."""
+        if self._queue:
+            head = self._queue[0]
+            if not head.future.done():
+                head.loop.call_soon_threadsafe(_wake, head.future)
+
+    def _reserve(self, tokens: float) -> float:
+        """Take one request and tokens if available, else get seconds to wait."""
+        now = time.monotonic()
+        wait = max(
+            self._paused_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now)
+        )
+        if wait <= 0:
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            return 0.0
+        return wait
+
+    async def _acquire(self, tokens: float, priority: Priority):
+        """Wait for rate limit capacity, behind waiters of higher priority."""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(int(priority), next(self._sequence), tokens, loop, loop.create_future())
+        with self._lock:
+            heapq.heappush(self._queue, waiter)
+            self._wake_head()
+
+        try:
+            while True:
+                with self._lock:
+                    if self._queue[0] is waiter:
+                        wait = self._reserve(tokens)
+                        if wait == 0:
+                            heapq.heappop(self._queue)
+                            self._wake_head()
+                            return
+                    else:
+                        wait = None
+                        waiter.future = loop.create_future()
+                if wait is None:
+                    await waiter.future
+                else:
+                    # The head waits for refill; a new head may arrive meanwhile
+                    waiter.future = loop.create_future()
+                    try:
+                        await asyncio.wait_for(asyncio.shield(waiter.future), wait)
+                    except asyncio.TimeoutError:
+                        pass
+        except BaseException:
+            with self._lock:
+                if waiter in self._queue:
+                    self._queue.remove(waiter)
+                    heapq.heapify(self._queue)
+                self._wake_head()
+            raise
+
+    def settle(self, reserved_tokens: float, used_tokens: Optional[float]):
+        """
+        Return tokens reserved but not used by a finished request.
+
+        Args:
+            reserved_tokens: Tokens passed to submit
+            used_tokens: Tokens reported by the API, nothing returned if None
+        """
+        if used_tokens is not None and used_tokens < reserved_tokens:
+            with self._lock:
+                self.tokens.give_back(reserved_tokens - used_tokens)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def submit(self,
+                     call: Callable[[], Awaitable[T]],
+                     tokens: float,
+                     priority: Priority = Priority.INTERACTIVE) -> T:
+        """
+        Run an API call under the rate limits, retrying transient errors.
+
+        Args:
+            call: Creates a fresh coroutine for each attempt
+            tokens: Tokens to reserve (prompt plus maximum completion)
+            priority: Lane of the request
+
+        Returns:
+            Result of the call
+
+        Raises:
+            CircuitOpenError: The circuit breaker rejected the request
+            Exception: Last error of the call if it is not retryable or
+                retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                allowed = self.breaker.allow(time.monotonic())
+                if not allowed:
+                    self.stats["rejected"] += 1
+            if not allowed:
+                raise CircuitOpenError("GPT API is unavailable, try again shortly")
+
+            await self._acquire(tokens, priority)
+            try:
+                self.stats["requests"] += 1
+                result = await call()
+            except asyncio.CancelledError:
+                with self._lock:
+                    # Let the next probe through if this one was cancelled
+                    self.breaker.release_probe()
+                raise
+            except Exception as e:
+                status = error_status(e)
+                upstream_failure = _is_connection_error(e) or (status is not None and status >= 500)
+                retryable = upstream_failure or status in RETRYABLE_STATUSES
+                now = time.monotonic()
+                with self._lock:
+                    if upstream_failure:
+                        self.breaker.record_failure(now)
+                        self.stats["failures"] += 1
+                    else:
+                        # Not a sign of upstream health either way
+                        self.breaker.release_probe()
+
+                if not retryable or attempt == self.max_retries:
+                    raise
+
+                delay = self._backoff(attempt)
+                retry_after = retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if status == 429:
+                    self.stats["rate_limited"] += 1
+                    with self._lock:
+                        # Everyone waits, not only this request
+                        self._paused_until = max(self._paused_until, now + delay)
+                self.stats["retries"] += 1
+                logger.warning(f"GPT request failed ({status or type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            with self._lock:
+                self.breaker.record_success()
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counters, queue length and circuit state."""
+        with self._lock:
+            return {
+                **self.stats,
+                "waiting": len(self._queue),
+                "circuit": self.breaker.state
+            }
+
+
+@dataclass
+class _Flight:
+    future: concurrent.futures.Future
+    task: asyncio.Task
+    loop: asyncio.AbstractEventLoop
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time and shares its outcome.
+
+    Callers arriving while a call with the same key is running await it
+    instead of starting their own, from any event loop or thread. The
+    result or exception is delivered to every caller. A caller that is
+    cancelled stops waiting; the call itself is cancelled only when no
+    callers are left. If the call is cancelled under remaining callers
+    (e.g. its event loop shut down), one of them starts it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {"started": 0, "joined": 0}
+
+    def _finish(self, key: str, flight: _Flight, task: asyncio.Task):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if task.cancelled():
+            flight.future.cancel()
+        elif task.exception() is not None:
+            flight.future.set_exception(task.exception())
+        else:
+            flight.future.set_result(task.result())
+
+    def _leave(self, key: str, flight: _Flight):
+        with self._lock:
+            flight.waiters -= 1
+            abandoned = flight.waiters == 0 and not flight.future.done()
+            if abandoned and self._flights.get(key) is flight:
+                # Late callers must not join a call about to be cancelled
+                del self._flights[key]
+        if abandoned:
+            flight.loop.call_soon_threadsafe(flight.task.cancel)
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run call, or wait for the running call with the same key.
+
+        Args:
+            key: Fingerprint of the call
+            call: Creates the coroutine if no call with key is running
+
+        Returns:
+            Tuple of the result and whether this caller started the call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        while True:
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                flight = self._flights.get(key)
+                started = flight is None
+                if started:
+                    task = loop.create_task(call())
+                    flight = _Flight(concurrent.futures.Future(), task, loop)
+                    self._flights[key] = flight
+                    task.add_done_callback(lambda done, flight=flight: self._finish(key, flight, done))
+                    self.stats["started"] += 1
+                else:
+                    self.stats["joined"] += 1
+                flight.waiters += 1
+
+            waiting = asyncio.wrap_future(flight.future)
+            try:
+                return await asyncio.shield(waiting), started
+            except asyncio.CancelledError:
+                if not waiting.cancelled():
+                    # This caller was cancelled; nobody reads its outcome
+                    waiting.add_done_callback(lambda done: done.cancelled() or done.exception())
+                    self._leave(key, flight)
+                    raise
+            # The shared call was cancelled for another caller; start over
+            logger.info("Shared request was cancelled, retrying")
+
+    def in_flight(self) -> int:
+        """Get number of running calls."""
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,389 @@
+# src/response_cache.py
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content: str) -> str:
+    """Get SHA-256 hex digest of a string."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for parsed GPT responses.
+
+    Entries live in an in-memory LRU tier backed by an optional SQLite
+    tier on disk. Both tiers expire entries after a TTL; the disk tier
+    also evicts least recently used entries beyond an entry count or
+    total size limit. Values are stored as JSON, so every hit returns a
+    fresh copy that callers may modify.
+    """
+
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 memory_entries: int = 256,
+                 ttl_seconds: float = 24 * 3600,
+                 max_disk_entries: int = 10000,
+                 max_disk_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize cache tiers.
+
+        Args:
+            db_path: SQLite file for the disk tier, memory only if None
+            memory_entries: Capacity of the in-memory LRU tier
+            ttl_seconds: Lifetime of an entry
+            max_disk_entries: Maximum number of entries on disk
+            max_disk_bytes: Maximum total size of values on disk
+        """
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "evictions": 0
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        size INTEGER NOT NULL
+                    )
+                """)
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Response cache disk tier disabled: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(model: str,
+                 prompt: str,
+                 content: str,
+                 temperature: float,
+                 max_tokens: int) -> str:
+        """
+        Build cache key for a request.
+
+        Args:
+            model: Model name
+            prompt: System prompt
+            content: User message content
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            Hex digest identifying the request
+        """
+        fingerprint = json.dumps([
+            model,
+            content_hash(prompt),
+            content_hash(content),
+            temperature,
+            max_tokens
+        ])
+        return content_hash(fingerprint)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Copy of the cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        value, created_at = row
+                        if created_at + self.ttl_seconds > now:
+                            self._db.execute(
+                                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                            )
+                            self._db.commit()
+                            self._remember(key, created_at + self.ttl_seconds, value)
+                            self.stats["hits"] += 1
+                            self.stats["disk_hits"] += 1
+                            return json.loads(value)
+                        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Response cache read error: {e}")
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """
+        Store a response in both tiers.
+
+        Args:
+            key: Key from make_key
+            value: JSON-serializable response
+        """
+        now = time.time()
+        serialized = json.dumps(value)
+        with self._lock:
+            self._remember(key, now + self.ttl_seconds, serialized)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                        (key, serialized, now, now, len(serialized))
+                    )
+                    self._evict_disk(now)
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Response cache write error: {e}")
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        """Put entry into the memory tier, evicting the least recently used."""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now: float):
+        """Drop expired entries, then least recently used ones over the limits."""
+        self._db.execute(
+            "DELETE FROM responses WHERE created_at <= ?", (now - self.ttl_seconds,)
+        )
+        count, total_size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        while count > self.max_disk_entries or total_size > self.max_disk_bytes:
+            row = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            count -= 1
+            total_size -= row[1]
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current memory tier size."""
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._memory)}
+
+
+class TweetEnrichmentCache:
+    """
+    Per-tweet GPT results keyed by tweet id and model version.
+
+    A tweet's text does not change, so entries never expire; changing
+    the model or the enrichment prompt changes the version and leaves
+    old entries unused until they are evicted. Entries live in an
+    in-memory LRU tier backed by an optional SQLite table, which may
+    share its file with ResponseCache.
+    """
+
+    # SQLite limits the number of parameters per statement
+    _LOOKUP_BATCH = 500
+
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 memory_entries: int = 10000,
+                 max_disk_entries: int = 1000000):
+        """
+        Initialize cache tiers.
+
+        Args:
+            db_path: SQLite file for the disk tier, memory only if None
+            memory_entries: Capacity of the in-memory LRU tier
+            max_disk_entries: Maximum number of entries on disk
+        """
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS tweet_enrichments (
+                        tweet_id TEXT NOT NULL,
+                        model_version TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (tweet_id, model_version)
+                    )
+                """)
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS tweet_enrichments_created "
+                    "ON tweet_enrichments (created_at)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Enrichment cache disk tier disabled: {e}")
+                self._db = None
+
+    def get_many(self, tweet_ids: Iterable[str], model_version: str) -> Dict[str, Dict]:
+        """
+        Look up enrichments for several tweets.
+
+        Args:
+            tweet_ids: Tweet ids
+            model_version: Model and prompt version the results came from
+
+        Returns:
+            Dictionary of tweet id to a copy of its enrichment, for cached
+            tweets only
+        """
+        requested = list(dict.fromkeys(tweet_ids))
+        found: Dict[str, Dict] = {}
+        with self._lock:
+            missing = []
+            for tweet_id in requested:
+                value = self._memory.get((tweet_id, model_version))
+                if value is not None:
+                    self._memory.move_to_end((tweet_id, model_version))
+                    found[tweet_id] = json.loads(value)
+                else:
+                    missing.append(tweet_id)
+
+            if missing and self._db is not None:
+                try:
+                    for start in range(0, len(missing), self._LOOKUP_BATCH):
+                        batch = missing[start:start + self._LOOKUP_BATCH]
+                        rows = self._db.execute(
+                            "SELECT tweet_id, value FROM tweet_enrichments "
+                            f"WHERE model_version = ? AND tweet_id IN ({','.join('?' * len(batch))})",
+                            (model_version, *batch)
+                        ).fetchall()
+                        for tweet_id, value in rows:
+                            self._remember((tweet_id, model_version), value)
+                            found[tweet_id] = json.loads(value)
+                except sqlite3.Error as e:
+                    logger.error(f"Enrichment cache read error: {e}")
+
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(requested) - len(found)
+        return found
+
+    def set_many(self, enrichments: Dict[str, Dict], model_version: str):
+        """
+        Store enrichments for several tweets in both tiers.
+
+        Args:
+            enrichments: Dictionary of tweet id to JSON-serializable result
+            model_version: Model and prompt version the results came from
+        """
+        now = time.time()
+        rows = [
+            (tweet_id, model_version, json.dumps(value), now)
+            for tweet_id, value in enrichments.items()
+        ]
+        with self._lock:
+            for tweet_id, _, value, _ in rows:
+                self._remember((tweet_id, model_version), value)
+
+            if self._db is not None and rows:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO tweet_enrichments VALUES (?, ?, ?, ?)", rows
+                    )
+                    self._evict_disk()
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Enrichment cache write error: {e}")
+
+    def _remember(self, key: tuple, value: str):
+        """Put entry into the memory tier, evicting the least recently used."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self):
+        """Drop the oldest entries over the entry limit."""
+        count = self._db.execute("SELECT COUNT(*) FROM tweet_enrichments").fetchone()[0]
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM tweet_enrichments WHERE rowid IN ("
+                "SELECT rowid FROM tweet_enrichments ORDER BY created_at LIMIT ?)",
+                (excess,)
+            )
+            self.stats["evictions"] += excess
+
+    def clear(self):
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM tweet_enrichments")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current memory tier size."""
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._memory)}
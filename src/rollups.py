@@ -0,0 +1,253 @@
+# src/rollups.py
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import logging
+import numpy as np
+from config import ROLLUP_TOP_N
+from tweet_store import MISSING_TIMESTAMP, METRIC_FIELDS, TweetStore, day_start
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+# Day of tweets whose created_at could not be parsed
+MISSING_DAY = MISSING_TIMESTAMP // SECONDS_PER_DAY
+
+# Totals kept per rollup cell, in column order
+STAT_FIELDS = ('count', 'engagement') + METRIC_FIELDS
+
+# Columns top tweets can be ranked by
+SORT_COLUMNS = ('engagement', 'retweet_count', 'reply_count', 'like_count')
+
+
+def engagement_bucket(engagement: np.ndarray) -> np.ndarray:
+    """Bucket 0 holds engagement up to 0, bucket b > 0 holds 2**(b-1) to 2**b - 1."""
+    engagement = np.asarray(engagement, dtype=np.int64)
+    buckets = np.zeros(engagement.shape, dtype=np.int64)
+    positive = engagement > 0
+    buckets[positive] = np.floor(np.log2(engagement[positive])).astype(np.int64) + 1
+    return buckets
+
+
+def bucket_floor(bucket: int) -> int:
+    """Smallest engagement of a positive bucket."""
+    return 1 << (bucket - 1)
+
+
+def concat_ranges(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenate values[start:end] for every pair of bounds."""
+    lengths = ends - starts
+    if not lengths.sum():
+        return values[:0]
+    positions = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return values[positions]
+
+
+def day_number(day: date) -> int:
+    """Get the UTC day number of a date, as used by rollup cells."""
+    return day_start(day) // SECONDS_PER_DAY
+
+
+class EngagementRollup:
+    """
+    Author x day engagement rollups over the tweets of one TweetStore.
+
+    Live tweets are grouped into cells by author, engagement bucket
+    (powers of two) and UTC day, and every cell keeps its tweet count,
+    total engagement and the sum of each metric. For each author and day
+    the best tweets by each sort column are kept, at most top_n of them.
+
+    The totals for an author, date range and minimum engagement add up
+    whole cells; only the one bucket that contains the minimum is split
+    by checking its tweets' engagement. Top tweets are picked among the
+    kept ones and found by scanning the author's cells only when the
+    kept tweets cannot prove the result (e.g. after many deletions).
+
+    Deleting tweets (remove) subtracts them from their cells, so the
+    rollup stays current without being rebuilt.
+    """
+
+    def __init__(self, store: TweetStore, deleted: Optional[np.ndarray] = None, top_n: int = ROLLUP_TOP_N):
+        """
+        Build rollups of a store.
+
+        Args:
+            store: Columnar tweets
+            deleted: Mask of deleted rows, shared with the caller, who
+                must call remove() for rows deleted later
+            top_n: Best tweets kept per author, day and sort column
+        """
+        self.store = store
+        self.top_n = top_n
+        self.deleted = deleted if deleted is not None else np.zeros(len(store), dtype=bool)
+        live = np.flatnonzero(~self.deleted)
+
+        timestamps = store.timestamps
+        self.days = np.where(timestamps == MISSING_TIMESTAMP, MISSING_DAY, timestamps // SECONDS_PER_DAY)
+        self.buckets = engagement_bucket(store.engagement)
+        authors = store.author_codes.astype(np.int64)
+        self.values = np.column_stack(
+            [np.ones(len(store), dtype=np.int64), store.engagement] + [store.metrics[field] for field in METRIC_FIELDS]
+        )
+
+        # Cells: live rows grouped by author, bucket and day
+        self.cell_rows = live[np.lexsort((self.days[live], self.buckets[live], authors[live]))]
+        rows = self.cell_rows
+        changed = np.ones(len(rows), dtype=bool)
+        changed[1:] = (
+            (authors[rows[1:]] != authors[rows[:-1]])
+            | (self.buckets[rows[1:]] != self.buckets[rows[:-1]])
+            | (self.days[rows[1:]] != self.days[rows[:-1]])
+        )
+        starts = np.flatnonzero(changed)
+        self.cell_offsets = np.append(starts, len(rows))
+        self.cell_authors = authors[rows[starts]]
+        self.cell_buckets = self.buckets[rows[starts]]
+        self.cell_days = self.days[rows[starts]]
+        self.cell_stats = (
+            np.add.reduceat(self.values[rows], starts) if len(rows)
+            else np.zeros((0, len(STAT_FIELDS)), dtype=np.int64)
+        )
+        self.row_cells = np.full(len(store), -1, dtype=np.int64)
+        self.row_cells[rows] = np.repeat(np.arange(len(starts)), np.diff(self.cell_offsets))
+        self.author_cells = np.searchsorted(self.cell_authors, np.arange(len(store.author_names) + 1))
+
+        # Best tweets per author and day, for each sort column
+        by_day = live[np.lexsort((self.days[live], authors[live]))]
+        day_changed = np.ones(len(by_day), dtype=bool)
+        day_changed[1:] = (
+            (authors[by_day[1:]] != authors[by_day[:-1]])
+            | (self.days[by_day[1:]] != self.days[by_day[:-1]])
+        )
+        group_starts = np.flatnonzero(day_changed)
+        group_sizes = np.diff(np.append(group_starts, len(by_day)))
+        self.group_authors = authors[by_day[group_starts]]
+        self.group_days = self.days[by_day[group_starts]]
+        self.author_groups = np.searchsorted(self.group_authors, np.arange(len(store.author_names) + 1))
+        kept_sizes = np.minimum(group_sizes, top_n)
+        self.top_offsets = np.zeros(len(group_starts) + 1, dtype=np.int64)
+        np.cumsum(kept_sizes, out=self.top_offsets[1:])
+        ranks = np.arange(len(by_day)) - np.repeat(group_starts, group_sizes)
+
+        self.top_rows: Dict[str, np.ndarray] = {}
+        self.top_floors: Dict[str, np.ndarray] = {}
+        for column in SORT_COLUMNS:
+            values = store.column(column)
+            ranked = live[np.lexsort((live, -values[live], self.days[live], authors[live]))]
+            self.top_rows[column] = ranked[ranks < top_n]
+            # Best value left out of each group, -1 when nothing was
+            floors = np.full(len(group_starts), -1, dtype=np.int64)
+            truncated = group_sizes > top_n
+            floors[truncated] = values[ranked[group_starts[truncated] + top_n]]
+            self.top_floors[column] = floors
+
+    def remove(self, rows: np.ndarray):
+        """Subtract deleted rows from their cells."""
+        rows = rows[self.row_cells[rows] >= 0]
+        np.subtract.at(self.cell_stats, self.row_cells[rows], self.values[rows])
+        self.row_cells[rows] = -1
+
+    def _day_range(self, date_from: Optional[date], date_to: Optional[date]) -> Tuple[int, int]:
+        if date_from is None and date_to is None:
+            return MISSING_DAY, np.iinfo(np.int64).max
+        return (
+            day_number(date_from) if date_from is not None else MISSING_DAY + 1,
+            day_number(date_to) if date_to is not None else np.iinfo(np.int64).max
+        )
+
+    def _cell_rows(self, cells: np.ndarray) -> np.ndarray:
+        """Live rows of cells."""
+        rows = concat_ranges(self.cell_rows, self.cell_offsets[cells], self.cell_offsets[cells + 1])
+        return rows[~self.deleted[rows]]
+
+    def author_rows(self, author_id: str) -> np.ndarray:
+        """Get live rows of an author, in row order."""
+        code = self.store.author_code(author_id)
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(self._cell_rows(np.arange(self.author_cells[code], self.author_cells[code + 1])))
+
+    def statistics(self,
+                   author_id: str,
+                   date_from: Optional[date] = None,
+                   date_to: Optional[date] = None,
+                   min_engagement: int = 0,
+                   sort_by: str = 'engagement',
+                   top_n: int = 5) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Summarize the tweets of an author.
+
+        Args:
+            author_id: Author of the tweets
+            date_from: Keep tweets posted on or after this date
+            date_to: Keep tweets posted on or before this date
+            min_engagement: Keep tweets with at least this total engagement
+            sort_by: Column top tweets are ranked by
+            top_n: Number of top tweets
+
+        Returns:
+            Totals in STAT_FIELDS order, top rows (best first) and their values
+        """
+        totals = np.zeros(len(STAT_FIELDS), dtype=np.int64)
+        empty = np.empty(0, dtype=np.int64)
+        code = self.store.author_code(author_id)
+        if code < 0:
+            return totals, empty, empty
+
+        low, high = self._day_range(date_from, date_to)
+        cells = np.arange(self.author_cells[code], self.author_cells[code + 1])
+        cells = cells[(self.cell_days[cells] >= low) & (self.cell_days[cells] <= high)]
+
+        # Whole cells above the minimum, tweet by tweet in the bucket holding it
+        split = -1
+        if min_engagement > 0:
+            lowest = int(engagement_bucket(np.array([min_engagement]))[0])
+            cells = cells[self.cell_buckets[cells] >= lowest]
+            if bucket_floor(lowest) < min_engagement:
+                split = lowest
+        whole = cells[self.cell_buckets[cells] != split]
+        totals += self.cell_stats[whole].sum(axis=0)
+        rows = self._cell_rows(cells[self.cell_buckets[cells] == split])
+        rows = rows[self.store.engagement[rows] >= min_engagement]
+        totals += self.values[rows].sum(axis=0)
+
+        # Top tweets among the kept ones of the author's days in range
+        values = self.store.column(sort_by)
+        groups = np.arange(self.author_groups[code], self.author_groups[code + 1])
+        groups = groups[(self.group_days[groups] >= low) & (self.group_days[groups] <= high)]
+        candidates = concat_ranges(self.top_rows[sort_by], self.top_offsets[groups], self.top_offsets[groups + 1])
+        candidates = candidates[~self.deleted[candidates] & (self.store.engagement[candidates] >= min_engagement)]
+        top = self.store.top_k(np.sort(candidates), top_n, sort_by)
+
+        # Tweets left out of a day rank at most its floor; below it the
+        # kept tweets may not be the best
+        floor = self.top_floors[sort_by][groups].max() if len(groups) else -1
+        wanted = min(top_n, int(totals[0]))
+        if top_n > self.top_n or len(top) < wanted or (floor >= 0 and wanted and values[top[-1]] <= floor):
+            rows = self._cell_rows(cells)
+            rows = np.sort(rows[self.store.engagement[rows] >= min_engagement])
+            top = self.store.top_k(rows, top_n, sort_by)
+        return totals, top, values[top]
+
+
+def combine_statistics(parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]], top_n: int) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """
+    Combine statistics of several rollups.
+
+    Args:
+        parts: Result of EngagementRollup.statistics for each rollup
+        top_n: Number of top tweets
+
+    Returns:
+        Summed totals and (part, row) of the top tweets, best first; ties keep part order
+    """
+    totals = np.zeros(len(STAT_FIELDS), dtype=np.int64)
+    candidates = []
+    for number, (part_totals, rows, values) in enumerate(parts):
+        totals += part_totals
+        candidates.extend((-int(value), number, position, int(row)) for position, (row, value) in enumerate(zip(rows, values)))
+    candidates.sort()
+    return totals, [(number, row) for _, number, _, row in candidates[:top_n]]
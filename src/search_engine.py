@@ -0,0 +1,201 @@
+# src/search_engine.py
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import heapq
+import logging
+import numpy as np
+from config import (
+    USE_INVERTED_INDEX,
+    SEARCH_RANKING,
+    BM25_K1,
+    BM25_B,
+    ENGAGEMENT_BOOST,
+    FILTER_SCAN_MAX_ROWS,
+    VECTOR_DIMENSIONS,
+    USE_PARTITION_PRUNING,
+    PARTITION_GRANULARITY,
+    PARTITION_BLOOM_BITS
+)
+from filter_engine import FilterEngine
+from partitions import PartitionMap
+from query_plan import QueryPlan, compile_query
+from ranking import BM25Scorer, engagement_column, top_k_positions
+from search_index import InvertedIndex
+from tweet_store import TweetStore
+from vector_index import VectorIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SearchResult(NamedTuple):
+    """Best matches of a query."""
+    rows: np.ndarray  # Rows of the best matches, best first
+    scores: np.ndarray  # Score of each returned row (float32)
+    total: int  # Number of tweets that matched, before the limit
+
+
+class SearchEngine:
+    """
+    Keyword search over one corpus: filters, matching and ranking.
+
+    The inverted index, filter engine, partitions, BM25 statistics and
+    vectors are built on first use and kept for the life of the engine, so an engine
+    should be reused for every search over the same tweets.
+    """
+
+    def __init__(self, tweets: Sequence[Dict], index: Optional[InvertedIndex] = None):
+        """
+        Initialize engine for tweets.
+
+        Args:
+            tweets: Tweets to search, a TweetStore or a list of dictionaries
+            index: Prebuilt index over the tweets, built on first use if None
+        """
+        self.tweets = tweets
+        self.size = len(tweets)
+        self._index = index
+        self._filter_engine: Optional[FilterEngine] = None
+        self._partitions: Optional[PartitionMap] = None
+        self._scorer: Optional[BM25Scorer] = None
+        self._vectors: Optional[VectorIndex] = None
+
+    @property
+    def index(self) -> InvertedIndex:
+        """Inverted index over the tweets."""
+        if self._index is None:
+            self._index = InvertedIndex(self.tweets)
+        return self._index
+
+    @property
+    def filter_engine(self) -> FilterEngine:
+        """Filter engine over the tweet columns."""
+        if self._filter_engine is None:
+            tweets = self.tweets
+            store = tweets if isinstance(tweets, TweetStore) else TweetStore.from_tweets(tweets)
+            self._filter_engine = FilterEngine(store)
+        return self._filter_engine
+
+    @property
+    def partitions(self) -> PartitionMap:
+        """Time partitions of the tweets with trigram filters."""
+        if self._partitions is None:
+            self._partitions = PartitionMap.build(
+                self.filter_engine.store,
+                self.index if USE_INVERTED_INDEX else None,
+                PARTITION_GRANULARITY,
+                PARTITION_BLOOM_BITS
+            )
+        return self._partitions
+
+    @property
+    def scorer(self) -> BM25Scorer:
+        """BM25 scorer with the statistics of the tweets."""
+        if self._scorer is None:
+            self._scorer = BM25Scorer(
+                self.index,
+                engagement=engagement_column(self.tweets) if ENGAGEMENT_BOOST else None,
+                k1=BM25_K1,
+                b=BM25_B,
+                engagement_boost=ENGAGEMENT_BOOST
+            )
+        return self._scorer
+
+    @property
+    def vectors(self) -> VectorIndex:
+        """Hashed TF-IDF vectors of the tweets."""
+        if self._vectors is None:
+            if USE_INVERTED_INDEX:
+                self._vectors = VectorIndex.from_index(self.index, VECTOR_DIMENSIONS)
+            else:
+                self._vectors = VectorIndex.from_texts((tweet['text'] for tweet in self.tweets), VECTOR_DIMENSIONS)
+        return self._vectors
+
+    def _scores(self, rows: np.ndarray, plan: QueryPlan) -> np.ndarray:
+        """Score matching rows with the configured ranking, higher is more relevant."""
+        if SEARCH_RANKING == 'bm25':
+            return self.scorer.score(rows, plan.positive_literals)
+        if SEARCH_RANKING == 'vector':
+            vectors = self.vectors
+            return vectors.scores(rows, vectors.query_vector(plan.positive_literals))
+        return np.array(
+            [plan.relevance(plan.scan(self.tweets[row]['text'].lower())) for row in rows.tolist()],
+            dtype=np.float32
+        )
+
+    def search(self, query: str, limit: Optional[int] = None, filters: Optional[Dict] = None) -> SearchResult:
+        """
+        Find the tweets matching a query, most relevant first.
+
+        Matches are ranked by SEARCH_RANKING: BM25 over the inverted
+        index (boosted by engagement), hashed TF-IDF similarity, or the
+        number of query terms they contain.
+
+        Args:
+            query: Raw search query string
+            limit: Maximum number of rows returned, all matches if None
+            filters: Advanced search filters (date_from, date_to,
+                min_engagement, author), see FilterEngine
+
+        Returns:
+            SearchResult with rows and scores of the best matches
+        """
+        # Parse and compile the query (memoized by query string)
+        plan = compile_query(query)
+        tweets = self.tweets
+
+        # Apply filters first, so selective ones shrink the set of
+        # tweets whose text is matched; partitions that cannot hold a
+        # match are skipped as a whole
+        pruning = []
+        if USE_PARTITION_PRUNING:
+            constraint = self.partitions.constraint(plan.root, filters)
+            if constraint is not None:
+                pruning.append(constraint)
+        candidates = self.filter_engine.candidates(plan.root, filters, pruning)
+        if candidates is None:
+            scan_rows = range(len(tweets))
+        else:
+            logger.info(f"Filters left {len(candidates)} of {len(tweets)} tweets")
+            scan_rows = candidates.tolist()
+
+        use_index = USE_INVERTED_INDEX and (candidates is None or len(candidates) > FILTER_SCAN_MAX_ROWS)
+        if not use_index and (SEARCH_RANKING == 'keywords' or (SEARCH_RANKING == 'bm25' and not USE_INVERTED_INDEX)):
+            # BM25 needs the index statistics; a scan ranks by the
+            # number of query terms, holding at most limit matches
+            total = 0
+
+            def matches():
+                nonlocal total
+                for row in scan_rows:
+                    mask = plan.match_mask(tweets[row])
+                    if mask is not None:
+                        total += 1
+                        yield plan.relevance(mask), -row
+
+            if limit is None:
+                ranked = sorted(matches(), reverse=True)
+            else:
+                ranked = heapq.nlargest(limit, matches())
+            return SearchResult(
+                np.array([-row for _, row in ranked], dtype=np.int64),
+                np.array([relevance for relevance, _ in ranked], dtype=np.float32),
+                total
+            )
+
+        if use_index:
+            rows = self.index.evaluate(plan.root)
+            if candidates is not None:
+                rows = np.intersect1d(rows, candidates, assume_unique=True)
+        else:
+            rows = np.array([row for row in scan_rows if plan.matches(tweets[row])], dtype=np.int64)
+
+        # Keep only the most relevant matches; tweets are not modified
+        scores = self._scores(rows, plan)
+        best = top_k_positions(scores, limit)
+        return SearchResult(np.asarray(rows)[best].astype(np.int64), scores[best], len(rows))
+
+    def search_tweets(self, query: str, limit: Optional[int] = None, filters: Optional[Dict] = None) -> List[Dict]:
+        """Find the tweets matching a query, most relevant first (see search)."""
+        return [self.tweets[row] for row in self.search(query, limit, filters).rows.tolist()]
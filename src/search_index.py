@@ -0,0 +1,481 @@
+# src/search_index.py
+
+from collections import OrderedDict
+from array import array
+from typing import List, Dict, Optional, Sequence, Tuple
+import logging
+import numpy as np
+from query_parser import (
+    QueryNode,
+    Term,
+    And,
+    Or,
+    Not,
+    FieldFilter,
+    YearFilter,
+    SUPPORTED_TWEET_FILTERS
+)
+from query_plan import (
+    DEFAULT_LANG,
+    tweet_year,
+    tweet_author,
+    tweet_has_filter
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How many resolved terms to keep in the per-index postings cache
+TERM_CACHE_SIZE = 1024
+
+
+class InvertedIndex:
+    """
+    Token-level inverted index over tweet texts.
+
+    Tweets are tokenized once (lowercased, split on whitespace) into
+    postings lists with token positions. Query trees from
+    QueryParser.parse_ast, as well as the flat conditions produced by
+    QueryParser.generate_search_conditions, are then evaluated as set
+    operations over postings instead of rescanning every tweet.
+
+    Matching keeps the substring semantics of TweetMatcher: a term
+    without whitespace matches a tweet when it occurs inside any of its
+    tokens, and a multi-word term (e.g. a quoted phrase) matches when its
+    words occur at consecutive positions and the exact phrase is found
+    in the tweet text.
+    """
+
+    def __init__(self, tweets: Sequence[Dict], arrays: Optional[Dict] = None):
+        """
+        Build the index from a sequence of tweets.
+
+        Args:
+            tweets: Tweets to index, addressed by their position
+            arrays: Prebuilt index data from IndexBuilder.finish, the
+                tweets are tokenized here when omitted
+        """
+        if arrays is None:
+            builder = IndexBuilder()
+            builder.extend(tweets)
+            arrays = builder.finish()
+
+        self.tweets = tweets
+        self.size = len(tweets)
+        self._term_cache: OrderedDict = OrderedDict()
+
+        self.all_docs = arrays['all_docs']
+        self.years = arrays['years']
+        self.langs = arrays['langs']
+        self.lang_names = arrays['lang_names']
+        self.lang_codes = {lang: code for code, lang in enumerate(self.lang_names)}
+        self.authors = arrays['authors']
+        self.author_names = arrays['author_names']
+        self._author_codes: Optional[Dict[str, int]] = None
+        self.tweet_filters = arrays['tweet_filters']
+        self.doc_offsets = arrays['doc_offsets']
+        self.doc_ids = arrays['doc_ids']
+        self.pos_offsets = arrays['pos_offsets']
+        self.positions = arrays['positions']
+
+        # Sorted vocabulary is one newline-joined UTF-8 blob, so substring
+        # lookups run as bytes.find over it; vocab_starts has the byte
+        # offset of every token plus one past the end
+        self.vocab_blob = arrays['vocab_blob']
+        self.vocab_starts = arrays['vocab_starts']
+        self.vocab_size = len(self.vocab_starts) - 1
+        self._doc_lengths: Optional[np.ndarray] = None
+
+    @property
+    def author_codes(self) -> Dict[str, int]:
+        """Map of normalized author handle to author code, built on first use."""
+        if self._author_codes is None:
+            self._author_codes = {name: code for code, name in enumerate(self.author_names)}
+        return self._author_codes
+
+    @property
+    def doc_lengths(self) -> np.ndarray:
+        """Number of tokens of every tweet, computed on first use."""
+        if self._doc_lengths is None:
+            self._doc_lengths = np.bincount(
+                self.doc_ids, weights=np.diff(self.pos_offsets), minlength=self.size
+            ).astype(np.int32)
+        return self._doc_lengths
+
+    def token(self, token_id: int) -> str:
+        """Get vocabulary token by id."""
+        start, end = self.vocab_starts[token_id], self.vocab_starts[token_id + 1] - 1
+        return bytes(self.vocab_blob[start:end]).decode('utf-8')
+
+    def _normalize_text(self, text: str) -> str:
+        """Normalize text the same way TweetMatcher does."""
+        return text.lower().strip()
+
+    def _find_tokens(self, piece: str, mode: str) -> List[int]:
+        """
+        Find vocabulary tokens that contain a whitespace-free piece.
+
+        Args:
+            piece: Lowercased text without whitespace
+            mode: 'contains', 'prefix', 'suffix' or 'exact'
+
+        Returns:
+            Sorted list of token ids
+        """
+        blob = self.vocab_blob
+        starts = self.vocab_starts
+        encoded = piece.encode('utf-8')
+        found = []
+        last_token = -1
+        index = blob.find(encoded)
+        while index != -1:
+            token_id = int(np.searchsorted(starts, index, side='right')) - 1
+            if token_id != last_token or mode != 'contains':
+                at_start = index == starts[token_id]
+                at_end = index + len(encoded) == starts[token_id + 1] - 1
+                if (mode == 'contains'
+                        or (mode == 'prefix' and at_start)
+                        or (mode == 'suffix' and at_end)
+                        or (mode == 'exact' and at_start and at_end)):
+                    if token_id != last_token:
+                        found.append(token_id)
+                        last_token = token_id
+            index = blob.find(encoded, index + 1)
+        return found
+
+    def _token_docs(self, token_ids: List[int]) -> np.ndarray:
+        """Union of postings lists for the given tokens."""
+        if not token_ids:
+            return np.empty(0, dtype=np.int32)
+        if len(token_ids) == 1:
+            token_id = token_ids[0]
+            return self.doc_ids[self.doc_offsets[token_id]:self.doc_offsets[token_id + 1]]
+        return np.unique(np.concatenate([
+            self.doc_ids[self.doc_offsets[token_id]:self.doc_offsets[token_id + 1]]
+            for token_id in token_ids
+        ]))
+
+    def _token_positions(self, token_ids: List[int], docs: np.ndarray) -> Dict[int, set]:
+        """Collect positions of the given tokens, grouped by document."""
+        by_doc: Dict[int, set] = {}
+        for token_id in token_ids:
+            start, end = self.doc_offsets[token_id], self.doc_offsets[token_id + 1]
+            token_docs = self.doc_ids[start:end]
+            for posting in np.nonzero(np.isin(token_docs, docs, assume_unique=True))[0]:
+                posting = start + posting
+                doc_positions = by_doc.setdefault(int(self.doc_ids[posting]), set())
+                doc_positions.update(
+                    self.positions[self.pos_offsets[posting]:self.pos_offsets[posting + 1]].tolist()
+                )
+        return by_doc
+
+    def _phrase_docs(self, normalized: str, pieces: List[str]) -> np.ndarray:
+        """Resolve a multi-word term using token positions."""
+        last = len(pieces) - 1
+        piece_tokens = [
+            self._find_tokens(
+                piece,
+                'suffix' if i == 0 else 'prefix' if i == last else 'exact'
+            )
+            for i, piece in enumerate(pieces)
+        ]
+
+        candidates = self._token_docs(piece_tokens[0])
+        for token_ids in piece_tokens[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, self._token_docs(token_ids), assume_unique=True)
+        if not len(candidates):
+            return candidates
+
+        piece_positions = [self._token_positions(token_ids, candidates) for token_ids in piece_tokens]
+        matched = []
+        for doc_id in candidates.tolist():
+            first_positions = piece_positions[0].get(doc_id, ())
+            if not any(
+                all(start + i in piece_positions[i].get(doc_id, ()) for i in range(1, len(pieces)))
+                for start in first_positions
+            ):
+                continue
+            # Positions ignore the exact whitespace between words, so the
+            # final check runs against the tweet text itself
+            if normalized in self._normalize_text(self.tweets[doc_id]['text']):
+                matched.append(doc_id)
+        return np.array(matched, dtype=np.int32)
+
+    def term_postings(self, piece: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get tweets containing a whitespace-free piece, with occurrence counts.
+
+        Args:
+            piece: Lowercased text without whitespace
+
+        Returns:
+            Sorted tweet ids and, for each, the number of its tokens containing the piece
+        """
+        token_ids = self._find_tokens(piece, 'contains')
+        if not token_ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        starts = self.doc_offsets[token_ids]
+        ends = self.doc_offsets[np.array(token_ids) + 1]
+        docs = np.concatenate([self.doc_ids[start:end] for start, end in zip(starts, ends)])
+        freqs = np.concatenate([
+            self.pos_offsets[start + 1:end + 1] - self.pos_offsets[start:end]
+            for start, end in zip(starts, ends)
+        ])
+        if len(token_ids) == 1:
+            return docs, freqs
+        docs, inverse = np.unique(docs, return_inverse=True)
+        return docs, np.bincount(inverse, weights=freqs).astype(np.int64)
+
+    def term_docs(self, term: str) -> np.ndarray:
+        """
+        Get sorted ids of tweets whose text contains the term.
+
+        Args:
+            term: Keyword, phrase or exclusion term
+
+        Returns:
+            Sorted array of matching tweet ids
+        """
+        normalized = self._normalize_text(term)
+        cached = self._term_cache.get(normalized)
+        if cached is not None:
+            self._term_cache.move_to_end(normalized)
+            return cached
+
+        pieces = normalized.split()
+        if not pieces:
+            # Empty term is a substring of every text
+            docs = self.all_docs
+        elif len(pieces) == 1:
+            docs = self._token_docs(self._find_tokens(pieces[0], 'contains'))
+        else:
+            docs = self._phrase_docs(normalized, pieces)
+
+        self._term_cache[normalized] = docs
+        if len(self._term_cache) > TERM_CACHE_SIZE:
+            self._term_cache.popitem(last=False)
+        return docs
+
+    def search(self, conditions: Dict) -> List[int]:
+        """
+        Find tweets matching search conditions.
+
+        Args:
+            conditions: Search conditions dictionary
+
+        Returns:
+            Ids of matching tweets in corpus order
+        """
+        try:
+            result = self.all_docs
+
+            # Exclusions first, as in TweetMatcher
+            for term in conditions['must_not_match']:
+                result = np.setdiff1d(result, self.term_docs(term), assume_unique=True)
+
+            for phrase in conditions['must_match_all']:
+                result = np.intersect1d(result, self.term_docs(phrase), assume_unique=True)
+
+            if conditions['must_match_any']:
+                keyword_docs = [self.term_docs(keyword) for keyword in conditions['must_match_any']]
+                any_docs = np.unique(np.concatenate(keyword_docs))
+                result = np.intersect1d(result, any_docs, assume_unique=True)
+
+            filters = conditions['filters']
+
+            if filters.get('year'):
+                result = result[self.years[result] == filters['year']]
+
+            if filters.get('lang'):
+                lang_code = self.lang_codes.get(filters['lang'])
+                if lang_code is None:
+                    return []
+                result = result[self.langs[result] == lang_code]
+
+            return result.tolist()
+
+        except Exception as e:
+            logger.error(f"Index search error: {e}")
+            return []
+
+    def evaluate(self, node: QueryNode) -> np.ndarray:
+        """
+        Evaluate a query tree over postings.
+
+        Args:
+            node: Root node from QueryParser.parse_ast
+
+        Returns:
+            Sorted array of matching tweet ids
+        """
+        if isinstance(node, Term):
+            return self.term_docs(node.text)
+
+        if isinstance(node, And):
+            # Intersect positive children first, then subtract exclusions
+            positives = [child for child in node.children if not isinstance(child, Not)]
+            negatives = [child.child for child in node.children if isinstance(child, Not)]
+            result = self.all_docs
+            for child in positives:
+                if not len(result):
+                    return result
+                result = np.intersect1d(result, self.evaluate(child), assume_unique=True)
+            for child in negatives:
+                if not len(result):
+                    return result
+                result = np.setdiff1d(result, self.evaluate(child), assume_unique=True)
+            return result
+
+        if isinstance(node, Or):
+            return np.unique(np.concatenate([self.evaluate(child) for child in node.children]))
+
+        if isinstance(node, Not):
+            return np.setdiff1d(self.all_docs, self.evaluate(node.child), assume_unique=True)
+
+        if isinstance(node, YearFilter):
+            return np.nonzero(self.years == node.year)[0].astype(np.int32)
+
+        if isinstance(node, FieldFilter):
+            if node.name == 'from':
+                code = self.author_codes.get(node.value)
+                if code is None:
+                    return np.empty(0, dtype=np.int32)
+                return np.nonzero(self.authors == code)[0].astype(np.int32)
+            if node.name == 'lang':
+                codes = [
+                    code for lang, code in self.lang_codes.items()
+                    if str(lang).lower() == node.value
+                ]
+                return self.all_docs[np.isin(self.langs[self.all_docs], codes)]
+            return self.all_docs[self.tweet_filters[node.value][self.all_docs]]
+
+        return self.all_docs
+
+
+class IndexBuilder:
+    """
+    Incremental builder for InvertedIndex.
+
+    Tweets are added one at a time in row order, so the index can be
+    filled while a corpus is still being loaded. Postings accumulate in
+    compact arrays and are laid out as flat numpy arrays by finish().
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._entries: Dict[str, Tuple[array, array, array]] = {}
+        self._valid = array('i')
+        self._years = array('i')
+        self._langs = array('i')
+        self._lang_codes: Dict = {}
+        self._authors = array('i')
+        self._author_codes: Dict[str, int] = {}
+        self._tweet_filters = {name: array('b') for name in SUPPORTED_TWEET_FILTERS}
+
+    def add(self, tweet: Dict) -> int:
+        """
+        Index the next tweet.
+
+        Args:
+            tweet: Tweet dictionary
+
+        Returns:
+            Id assigned to the tweet (its row number)
+        """
+        doc_id = self.size
+        self.size += 1
+
+        try:
+            text = tweet['text'].lower()
+        except Exception:
+            # TweetMatcher never matches tweets without usable text
+            self._years.append(-1)
+            self._langs.append(-1)
+            self._authors.append(-1)
+            for flags in self._tweet_filters.values():
+                flags.append(0)
+            return doc_id
+        self._valid.append(doc_id)
+
+        year = tweet_year(tweet)
+        self._years.append(-1 if year is None else year)
+        lang = tweet.get('lang', DEFAULT_LANG)
+        self._langs.append(self._lang_codes.setdefault(lang, len(self._lang_codes)))
+        self._authors.append(
+            self._author_codes.setdefault(tweet_author(tweet), len(self._author_codes))
+        )
+        for name, flags in self._tweet_filters.items():
+            flags.append(tweet_has_filter(tweet, name))
+
+        token_positions: Dict[str, List[int]] = {}
+        for position, token in enumerate(text.split()):
+            token_positions.setdefault(token, []).append(position)
+        for token, positions in token_positions.items():
+            entry = self._entries.get(token)
+            if entry is None:
+                entry = self._entries[token] = (array('i'), array('i'), array('i'))
+            entry[0].append(doc_id)
+            entry[1].append(len(positions))
+            entry[2].extend(positions)
+        return doc_id
+
+    def extend(self, tweets: Sequence[Dict]):
+        """Index many tweets."""
+        for tweet in tweets:
+            self.add(tweet)
+
+    def finish(self) -> Dict:
+        """
+        Lay postings out as flat arrays.
+
+        Returns:
+            Index data accepted by InvertedIndex
+        """
+        entries = self._entries
+        vocab = sorted(entries)
+        encoded = [token.encode('utf-8') for token in vocab]
+        vocab_starts = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum([len(token) + 1 for token in encoded], out=vocab_starts[1:])
+
+        doc_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum([len(entries[token][0]) for token in vocab], out=doc_offsets[1:])
+
+        def flatten(part: int) -> np.ndarray:
+            if not vocab:
+                return np.empty(0, dtype=np.int32)
+            return np.concatenate([
+                np.frombuffer(entries[token][part], dtype=np.int32) for token in vocab
+            ])
+
+        doc_ids = flatten(0)
+        term_freqs = flatten(1)
+        positions = flatten(2)
+        pos_offsets = np.zeros(len(term_freqs) + 1, dtype=np.int64)
+        np.cumsum(term_freqs, out=pos_offsets[1:])
+
+        logger.info(
+            f"Built inverted index: {len(self._valid)} tweets, "
+            f"{len(vocab)} tokens, {len(doc_ids)} postings"
+        )
+
+        return {
+            'all_docs': np.frombuffer(self._valid, dtype=np.int32),
+            'years': np.frombuffer(self._years, dtype=np.int32),
+            'langs': np.frombuffer(self._langs, dtype=np.int32),
+            'lang_names': list(self._lang_codes),
+            'authors': np.frombuffer(self._authors, dtype=np.int32),
+            'author_names': list(self._author_codes),
+            'tweet_filters': {
+                name: np.frombuffer(flags, dtype=np.int8).astype(bool)
+                for name, flags in self._tweet_filters.items()
+            },
+            'vocab_blob': b'\n'.join(encoded),
+            'vocab_starts': vocab_starts,
+            'doc_offsets': doc_offsets,
+            'doc_ids': doc_ids,
+            'pos_offsets': pos_offsets,
+            'positions': positions
+        }
@@ -0,0 +1,562 @@
+# src/segments.py
+
+from bisect import bisect_right
+from collections.abc import Sequence
+from datetime import date
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import json
+import logging
+import math
+import os
+import threading
+import time
+import numpy as np
+from config import (
+    SEGMENT_MEMORY_TWEETS,
+    SEGMENT_MERGE_FACTOR,
+    SEGMENT_FLUSH_SECONDS,
+    INGEST_POLL_SECONDS,
+    LOAD_BATCH_SIZE
+)
+from parallel_search import merge_results
+from ranking import top_k_positions
+from rollups import STAT_FIELDS, EngagementRollup, combine_statistics
+from search_engine import SearchEngine, SearchResult
+from search_index import InvertedIndex
+from tweet_store import TweetStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Segment:
+    """
+    Immutable indexed tweets with a deletion mask.
+
+    Deleted rows stay in the segment, hidden from searches, until the
+    segment is merged.
+    """
+
+    def __init__(self, engine: Any):
+        """
+        Initialize segment.
+
+        Args:
+            engine: SearchEngine (or ParallelSearch) over a TweetStore
+        """
+        self.engine = engine
+        self.tweets: TweetStore = engine.tweets
+        self.size = engine.size
+        self.deleted = np.zeros(self.size, dtype=bool)
+        self.deleted_count = 0
+        self._rollup: Optional[EngagementRollup] = None
+
+    @classmethod
+    def from_tweets(cls, tweets: Iterable[Dict]) -> 'Segment':
+        """Build and index a segment."""
+        store = TweetStore.from_tweets(tweets)
+        return cls(SearchEngine(store, InvertedIndex(store)))
+
+    @property
+    def live(self) -> int:
+        """Number of tweets not deleted."""
+        return self.size - self.deleted_count
+
+    def delete(self, tweet_ids: Iterable[str]) -> int:
+        """Mark tweets deleted, returning how many were live here."""
+        rows = self.tweets.rows_for_ids(tweet_ids)
+        rows = np.unique(rows[~self.deleted[rows]])
+        self.deleted[rows] = True
+        self.deleted_count += len(rows)
+        if self._rollup is not None:
+            self._rollup.remove(rows)
+        return len(rows)
+
+    @property
+    def rollup(self) -> EngagementRollup:
+        """Author x day rollups of live tweets, built on first use and kept current."""
+        if self._rollup is None:
+            self._rollup = EngagementRollup(self.tweets, self.deleted)
+        return self._rollup
+
+    def live_tweets(self) -> Iterator[Dict]:
+        """Tweets not deleted, in row order."""
+        return iter(self.tweets.tweets(np.nonzero(~self.deleted)[0]))
+
+    def author_tweets(self, author_id: str) -> List[Dict]:
+        """Live tweets of an author."""
+        return self.tweets.tweets(self.rollup.author_rows(author_id))
+
+    def search(self, query: str, limit: Optional[int], filters: Optional[Dict]) -> SearchResult:
+        """Search live tweets; rows are local to the segment."""
+        if not self.deleted_count:
+            return self.engine.search(query, limit, filters)
+        result = self.engine.search(query, None, filters)
+        keep = ~self.deleted[result.rows]
+        rows, scores = result.rows[keep], result.scores[keep]
+        best = top_k_positions(scores, limit)
+        return SearchResult(rows[best], scores[best], len(rows))
+
+
+class MemorySegment:
+    """
+    Mutable segment receiving new tweets.
+
+    Tweets are searchable as soon as they are added. The first search
+    after an append indexes only the tweets added since the previous
+    one, as a small engine of its own. An engine is combined with the
+    one before it while that one is not larger, so the segment keeps
+    about log2(size) engines and every tweet is reindexed that many
+    times at most, instead of the whole segment on every search.
+    """
+
+    def __init__(self):
+        self.tweets: List[Dict] = []
+        self.deleted: set = set()
+        self._rows: Dict[str, int] = {}
+        # (first row, engine over a copy of the tweets from that row)
+        self._engines: List[Tuple[int, SearchEngine]] = []
+        self._rollup: Optional[EngagementRollup] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.tweets)
+
+    @property
+    def live(self) -> int:
+        return len(self.tweets) - len(self.deleted)
+
+    def add(self, tweet: Dict):
+        """Append a tweet; any live tweet with its id must be deleted first."""
+        self._rows[str(tweet.get('id', ''))] = len(self.tweets)
+        self.tweets.append(tweet)
+        self._rollup = None
+
+    def delete(self, tweet_ids: Iterable[str]) -> int:
+        """Mark tweets deleted, returning how many were live here."""
+        count = 0
+        for tweet_id in map(str, tweet_ids):
+            row = self._rows.pop(tweet_id, None)
+            if row is not None:
+                self.deleted.add(row)
+                if self._rollup is not None:
+                    self._rollup.deleted[row] = True
+                    self._rollup.remove(np.array([row]))
+                count += 1
+        return count
+
+    @property
+    def rollup(self) -> EngagementRollup:
+        """Author x day rollups of live tweets, rebuilt on first use after an append."""
+        if self._rollup is None:
+            deleted = np.zeros(len(self.tweets), dtype=bool)
+            deleted[list(self.deleted)] = True
+            self._rollup = EngagementRollup(TweetStore.from_tweets(list(self.tweets)), deleted)
+        return self._rollup
+
+    def live_tweets(self) -> Iterator[Dict]:
+        return (tweet for row, tweet in enumerate(self.tweets) if row not in self.deleted)
+
+    def author_tweets(self, author_id: str) -> List[Dict]:
+        return [tweet for tweet in self.live_tweets() if str(tweet.get('author_id', '')) == author_id]
+
+    def _index_new_tweets(self):
+        """Index tweets added since the last search, combining engines of similar size."""
+        start = self._engines[-1][0] + self._engines[-1][1].size if self._engines else 0
+        if start == len(self.tweets):
+            return
+        while self._engines and self._engines[-1][1].size <= len(self.tweets) - start:
+            start = self._engines.pop()[0]
+        # Over a copy, so later appends do not change the indexed tweets
+        self._engines.append((start, SearchEngine(self.tweets[start:])))
+
+    def search(self, query: str, limit: Optional[int], filters: Optional[Dict]) -> SearchResult:
+        """Search live tweets; rows are local to the segment."""
+        self._index_new_tweets()
+        results = []
+        for start, engine in self._engines:
+            if not self.deleted:
+                results.append(engine.search(query, limit, filters))
+                continue
+            result = engine.search(query, None, filters)
+            keep = np.array([row + start not in self.deleted for row in result.rows.tolist()], dtype=bool)
+            rows, scores = result.rows[keep], result.scores[keep]
+            best = top_k_positions(scores, limit)
+            results.append(SearchResult(rows[best], scores[best], len(rows)))
+        return merge_results(results, [start for start, _ in self._engines], limit)
+
+
+class SegmentedTweets(Sequence):
+    """
+    All tweets of a SegmentedCorpus as one sequence, segment after segment.
+
+    Deleted tweets keep their rows until their segment is merged.
+    """
+
+    def __init__(self, corpus: 'SegmentedCorpus'):
+        self._corpus = corpus
+
+    def __len__(self) -> int:
+        return self._corpus.size
+
+    def __getitem__(self, row: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        return self._corpus.tweet(row)
+
+
+class SegmentedCorpus:
+    """
+    Searchable corpus that grows without rebuilding what it already has.
+
+    Log-structured: new tweets go into a mutable memory segment, which
+    is flushed into an immutable indexed segment once it holds
+    memory_tweets tweets (or on flush()). Whenever merge_factor segments
+    of the same size tier exist, they are merged into one, dropping
+    deleted tweets. Ingest cost is therefore proportional to the new
+    tweets, plus merges whose total work grows logarithmically. The base
+    segment (the loaded corpus) is never merged.
+
+    A tweet is deleted by id; appending a tweet with a known id replaces
+    the old version. Searches run on every segment and the best matches
+    are merged, like ParallelSearch; BM25 statistics are per segment.
+    Rows of search results index tweets and stay valid until the next
+    flush or merge; search_tweets resolves them under the same lock.
+
+    Has the search interface of SearchEngine, so it can be given to
+    GPTAnalyzer in its place. All methods are thread-safe.
+    """
+
+    def __init__(self,
+                 base: Optional[Any] = None,
+                 memory_tweets: int = SEGMENT_MEMORY_TWEETS,
+                 merge_factor: int = SEGMENT_MERGE_FACTOR):
+        """
+        Initialize corpus.
+
+        Args:
+            base: SearchEngine (or ParallelSearch) over the loaded corpus
+            memory_tweets: Tweets held by the memory segment before a flush
+            merge_factor: Segments of one size tier merged together
+        """
+        self.memory_tweets = memory_tweets
+        self.merge_factor = max(2, merge_factor)
+        self.segments: List[Segment] = [Segment(base)] if base is not None else []
+        self._base_segments = len(self.segments)
+        self.memory = MemorySegment()
+        self.tweets = SegmentedTweets(self)
+        # Changes whenever the searchable tweets change
+        self.generation = 0
+        self._offsets = [0]
+        self._lock = threading.RLock()
+        self._update_offsets()
+
+    def _update_offsets(self):
+        offsets = [0]
+        for segment in self.segments:
+            offsets.append(offsets[-1] + segment.size)
+        self._offsets = offsets
+
+    @property
+    def size(self) -> int:
+        """Number of rows, deleted tweets included."""
+        return self._offsets[-1] + self.memory.size
+
+    @property
+    def live(self) -> int:
+        """Number of tweets not deleted."""
+        with self._lock:
+            return sum(segment.live for segment in self.segments) + self.memory.live
+
+    def tweet(self, row: int) -> Dict:
+        """Get tweet by row of the combined sequence."""
+        with self._lock:
+            if row < 0:
+                row += self.size
+            if not 0 <= row < self.size:
+                raise IndexError("tweet row out of range")
+            if row >= self._offsets[-1]:
+                return self.memory.tweets[row - self._offsets[-1]]
+            segment = bisect_right(self._offsets, row) - 1
+            return self.segments[segment].tweets[row - self._offsets[segment]]
+
+    def replace_base(self, engine: Any):
+        """Search the base segment with another engine over the same tweets, e.g. ParallelSearch."""
+        with self._lock:
+            if not self._base_segments or engine.size != self.segments[0].size:
+                raise ValueError("Engine does not cover the base segment")
+            self.segments[0].engine = engine
+
+    def append(self, tweets: Iterable[Dict]) -> int:
+        """
+        Add tweets, searchable right away.
+
+        Args:
+            tweets: New tweets; a known id replaces the earlier version
+
+        Returns:
+            Number of tweets added
+        """
+        tweets = list(tweets)
+        with self._lock:
+            # Earlier versions are looked up once for the whole batch
+            self._delete([str(tweet.get('id', '')) for tweet in tweets])
+            seen = set()
+            for tweet in tweets:
+                tweet_id = str(tweet.get('id', ''))
+                if tweet_id in seen:
+                    self._delete([tweet_id])
+                seen.add(tweet_id)
+                self.memory.add(tweet)
+                if self.memory.size >= self.memory_tweets:
+                    self._flush()
+            if tweets:
+                self.generation += 1
+        return len(tweets)
+
+    def _delete(self, tweet_ids: List[str]) -> int:
+        count = self.memory.delete(tweet_ids)
+        for segment in self.segments:
+            count += segment.delete(tweet_ids)
+        return count
+
+    def delete(self, tweet_ids: Iterable[str]) -> int:
+        """
+        Delete tweets by id.
+
+        Returns:
+            Number of tweets deleted
+        """
+        with self._lock:
+            count = self._delete([str(tweet_id) for tweet_id in tweet_ids])
+            if count:
+                self.generation += 1
+            return count
+
+    def flush(self):
+        """Turn the memory segment into an indexed segment and merge segments."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self.memory.size:
+            memory, self.memory = self.memory, MemorySegment()
+            if memory.live:
+                self.segments.append(Segment.from_tweets(memory.live_tweets()))
+                logger.info(f"Flushed {memory.live} new tweets into segment {len(self.segments) - 1}")
+            self._merge()
+            self._update_offsets()
+            self.generation += 1
+
+    def _tier(self, segment: Segment) -> int:
+        """Size tier: 0 up to memory_tweets live tweets, one more per merge_factor times as many."""
+        if segment.live <= self.memory_tweets:
+            return 0
+        return int(math.log(segment.live / self.memory_tweets, self.merge_factor))
+
+    def _merge(self):
+        """Merge runs of merge_factor adjacent segments of one tier, newest first."""
+        factor = self.merge_factor
+        merged = True
+        while merged:
+            merged = False
+            tiers = [self._tier(segment) for segment in self.segments]
+            for start in range(len(self.segments) - factor, self._base_segments - 1, -1):
+                if len(set(tiers[start:start + factor])) == 1:
+                    run = self.segments[start:start + factor]
+                    segment = Segment.from_tweets(chain.from_iterable(part.live_tweets() for part in run))
+                    self.segments[start:start + factor] = [segment] if segment.size else []
+                    logger.info(f"Merged {factor} segments into one of {segment.size} tweets")
+                    merged = True
+                    break
+
+    def author_tweets(self, author_id: str) -> List[Dict]:
+        """Get live tweets of an author."""
+        with self._lock:
+            return [
+                tweet
+                for segment in chain(self.segments, [self.memory])
+                for tweet in segment.author_tweets(author_id)
+            ]
+
+    def author_statistics(self,
+                          author_id: str,
+                          date_from: Optional[date] = None,
+                          date_to: Optional[date] = None,
+                          min_engagement: int = 0,
+                          sort_by: str = 'engagement',
+                          top_n: int = 5) -> Dict:
+        """
+        Summarize live tweets of an author from the segments' rollups.
+
+        Args:
+            author_id: Author of the tweets
+            date_from: Keep tweets posted on or after this date
+            date_to: Keep tweets posted on or before this date
+            min_engagement: Keep tweets with at least this total engagement
+            sort_by: Column top tweets are ranked by
+            top_n: Number of top tweets
+
+        Returns:
+            Dictionary with totals, average, metric totals and top tweets
+        """
+        with self._lock:
+            parts = [segment for segment in chain(self.segments, [self.memory]) if segment.size]
+            totals, top = combine_statistics(
+                [
+                    segment.rollup.statistics(author_id, date_from, date_to, min_engagement, sort_by, top_n)
+                    for segment in parts
+                ],
+                top_n
+            )
+            top_tweets = [parts[part].tweets[row] for part, row in top]
+
+        totals = dict(zip(STAT_FIELDS, totals.tolist()))
+        count = totals.pop('count')
+        total_engagement = totals.pop('engagement')
+        return {
+            "total_tweets": count,
+            "total_engagement": total_engagement,
+            "avg_engagement": total_engagement / count if count else 0,
+            "metric_totals": totals,
+            "top_tweets": top_tweets
+        }
+
+    def close(self):
+        """Close segment engines holding resources, such as ParallelSearch worker processes."""
+        with self._lock:
+            for segment in self.segments:
+                close = getattr(segment.engine, 'close', None)
+                if close is not None:
+                    close()
+
+    def search(self, query: str, limit: Optional[int] = None, filters: Optional[Dict] = None) -> SearchResult:
+        """
+        Search every segment and merge their best matches.
+
+        Args:
+            query: Raw search query string
+            limit: Maximum number of rows returned, all matches if None
+            filters: Advanced search filters
+
+        Returns:
+            SearchResult with rows of tweets
+        """
+        with self._lock:
+            parts = list(chain(self.segments, [self.memory]))
+            offsets = self._offsets
+            results = [segment.search(query, limit, filters) for segment in parts if segment.size]
+            return merge_results(results, [offsets[i] for i, segment in enumerate(parts) if segment.size], limit)
+
+    def search_tweets(self, query: str, limit: Optional[int] = None, filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Find the tweets matching a query, most relevant first.
+
+        Rows are turned into tweets while the lock is held, so a flush or
+        merge on another thread cannot shift them in between.
+        """
+        with self._lock:
+            return [self.tweet(row) for row in self.search(query, limit, filters).rows.tolist()]
+
+
+class JsonlFollower:
+    """
+    Follows a JSONL file, adding tweets as lines are appended to it.
+
+    Only complete lines are read; a partly written last line is read
+    once finished. A file that shrank was replaced and is read again
+    from the start, with known tweet ids replacing their old versions.
+    """
+
+    def __init__(self,
+                 path: str,
+                 append: Callable[[List[Dict]], Any],
+                 flush: Optional[Callable[[], Any]] = None,
+                 poll_seconds: float = INGEST_POLL_SECONDS,
+                 flush_seconds: float = SEGMENT_FLUSH_SECONDS):
+        """
+        Initialize follower.
+
+        Args:
+            path: JSONL file of tweets
+            append: Called with each batch of new tweets
+            flush: Called once no tweets arrived for flush_seconds after some did
+            poll_seconds: Seconds between checks for new lines
+            flush_seconds: Idle time before flush is called
+        """
+        self.path = path
+        self.append = append
+        self.flush = flush
+        self.poll_seconds = poll_seconds
+        self.flush_seconds = flush_seconds
+        self.offset = 0
+        self._last_tweet: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> int:
+        """
+        Read lines appended since the last poll.
+
+        Returns:
+            Number of tweets added
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size < self.offset:
+            logger.info(f"{self.path} shrank, reading it again")
+            self.offset = 0
+        if size == self.offset:
+            return 0
+
+        count = 0
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            batch: List[Dict] = []
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                self.offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except ValueError as e:
+                    logger.error(f"Skipping invalid line in {self.path}: {e}")
+                    continue
+                if len(batch) >= LOAD_BATCH_SIZE:
+                    count += self.append(batch) or 0
+                    batch = []
+            if batch:
+                count += self.append(batch) or 0
+        if count:
+            self._last_tweet = time.monotonic()
+        return count
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+                if (self.flush is not None and self._last_tweet is not None
+                        and time.monotonic() - self._last_tweet >= self.flush_seconds):
+                    self._last_tweet = None
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Error following {self.path}: {e}")
+
+    def start(self) -> 'JsonlFollower':
+        """Read the file and keep following it on a background thread."""
+        self.poll()
+        self._thread = threading.Thread(target=self._run, name='jsonl-follower', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop following."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
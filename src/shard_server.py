@@ -0,0 +1,173 @@
+# src/shard_server.py
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+import argparse
+import asyncio
+import json
+import logging
+import struct
+from config import SNAPSHOT_DIR
+from corpus_snapshot import open_corpus
+from search_engine import SearchEngine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Every message is a big-endian uint32 byte length followed by UTF-8 JSON
+FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Malformed frame from the other side of a connection."""
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    """Serialize a message with its length prefix."""
+    body = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(body) > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Message of {len(body)} bytes exceeds {MAX_FRAME_BYTES}")
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """
+    Read one message.
+
+    Raises:
+        asyncio.IncompleteReadError: Connection closed
+        ProtocolError: Oversized or invalid message
+    """
+    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    try:
+        message = json.loads(await reader.readexactly(length))
+    except ValueError as e:
+        raise ProtocolError(f"Invalid frame: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("Frame is not a JSON object")
+    return message
+
+
+class ShardServer:
+    """
+    Serves searches over one part of the corpus.
+
+    Requests are {"id", "op", ...} objects; every response carries the
+    id of its request, so a client can keep many requests in flight on
+    one connection and responses may come back in any order. Operations:
+
+    - ping: {"ok", "shard", "tweets"}
+    - search with query, limit and filters: {"ok", "shard", "total",
+      "tweets", "scores"}, the best matching tweets with their scores
+
+    Failures are answered with {"ok": false, "error"}. Searches run one
+    at a time on a worker thread, so the event loop keeps answering.
+    """
+
+    def __init__(self, engine: SearchEngine, name: str, delay_seconds: float = 0.0):
+        """
+        Initialize server.
+
+        Args:
+            engine: Search engine over the part of the corpus served
+            name: Shard name reported in responses
+            delay_seconds: Extra latency added to every search, for testing
+        """
+        self.engine = engine
+        self.name = name
+        self.delay_seconds = delay_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shard-search')
+
+    def _search(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.engine.search(request['query'], request.get('limit'), request.get('filters'))
+        return {
+            "ok": True,
+            "shard": self.name,
+            "total": result.total,
+            "tweets": [self.engine.tweets[row] for row in result.rows.tolist()],
+            "scores": result.scores.tolist()
+        }
+
+    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one request."""
+        op = request.get('op')
+        if op == 'ping':
+            return {"ok": True, "shard": self.name, "tweets": self.engine.size}
+        if op == 'search':
+            if self.delay_seconds:
+                await asyncio.sleep(self.delay_seconds)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._search, request)
+        return {"ok": False, "error": f"Unknown operation: {op}"}
+
+    async def _respond(self, request: Dict[str, Any], writer: asyncio.StreamWriter):
+        try:
+            response = await self.handle_request(request)
+        except Exception as e:
+            logger.error(f"Request {request.get('id')} failed: {e}")
+            response = {"ok": False, "error": str(e)}
+        response['id'] = request.get('id')
+        if not writer.is_closing():
+            writer.write(encode_frame(response))
+            await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests of one client until it disconnects."""
+        tasks: Set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                task = asyncio.create_task(self._respond(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ProtocolError, ConnectionError) as e:
+            logger.error(f"Closing connection: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        """Accept connections until cancelled."""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info(f"Shard {self.name} serving {self.engine.size} tweets on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve searches over a tweets file or one shard of it")
+    parser.add_argument('--file', required=True, help="Tweets file (or a pre-split part of it), opened through its snapshot")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--shard', type=int, help="Serve only this shard of a JSONL file (0-based), reading only its bytes")
+    parser.add_argument('--shards', type=int, help="Number of shards the file is split into")
+    parser.add_argument('--delay-ms', type=float, default=0, help="Extra latency per search, for testing")
+    args = parser.parse_args(argv)
+
+    part = None
+    name = "0/1"
+    if args.shards:
+        if args.shard is None or not 0 <= args.shard < args.shards:
+            parser.error("--shard must be between 0 and --shards - 1")
+        part = (args.shard, args.shards)
+        name = f"{args.shard}/{args.shards}"
+    try:
+        store, index = open_corpus(args.file, SNAPSHOT_DIR, part=part)
+    except ValueError as e:
+        parser.error(str(e))
+    engine = SearchEngine(store, index)
+
+    server = ShardServer(engine, name, args.delay_ms / 1000)
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# src/token_budget.py
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+import re
+from config import GPT_MODEL
+
+try:
+    import tiktoken
+except ImportError:  # Optional, token counts are estimated without it
+    tiktoken = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Estimate used when tiktoken is not available
+CHARS_PER_TOKEN = 4
+
+# Tokens added per message by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """Get tiktoken encoding for a model, None if it cannot be loaded."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        logger.warning(f"Token encoding unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = GPT_MODEL) -> int:
+    """
+    Count tokens of a string for a model.
+
+    Args:
+        text: Text sent to the model
+        model: Model name
+
+    Returns:
+        Exact count with tiktoken installed, otherwise an estimate
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text))
+
+
+def dumps_compact(payload: Any) -> str:
+    """Serialize payload as JSON without optional whitespace or escaping."""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+
+
+def trim_text(text: str, max_chars: int) -> str:
+    """Collapse whitespace and cut text to at most max_chars characters."""
+    text = WHITESPACE_PATTERN.sub(' ', text or '').strip()
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - 1].rstrip() + '…'
+
+
+def compact_tweet(ordinal: int, tweet: Dict, max_chars: int) -> Dict:
+    """
+    Build the wire form of a tweet.
+
+    Args:
+        ordinal: Position of the tweet in its request, starting at 1
+        tweet: Tweet dictionary
+        max_chars: Maximum length of the text sent
+
+    Returns:
+        Dictionary with ordinal "n", author and trimmed text
+    """
+    return {
+        "n": ordinal,
+        "author": tweet.get('author_id', 'Unknown'),
+        "text": trim_text(tweet.get('text', ''), max_chars)
+    }
+
+
+@dataclass
+class TweetBatch:
+    """Tweets of one request with their wire form and token count."""
+    tweets: List[Dict]
+    payload: List[Dict]
+    tokens: int
+
+    def __len__(self) -> int:
+        return len(self.tweets)
+
+    def tweet(self, ordinal: Any) -> Optional[Dict]:
+        """Get tweet by the ordinal the model returned, None if invalid."""
+        try:
+            index = int(ordinal) - 1
+        except (TypeError, ValueError):
+            return None
+        return self.tweets[index] if 0 <= index < len(self.tweets) else None
+
+
+def iter_batches(tweets: List[Dict],
+                 token_budget: int,
+                 max_tweets: int,
+                 max_chars: int,
+                 model: str = GPT_MODEL) -> Iterator[TweetBatch]:
+    """
+    Pack tweets, in order, into batches fitting a token budget.
+
+    Args:
+        tweets: Tweets to pack
+        token_budget: Maximum tokens of the serialized payload per batch
+        max_tweets: Maximum tweets per batch, bounding the response size
+        max_chars: Maximum length of each tweet text
+        model: Model whose tokenizer is used
+
+    Yields:
+        Batches; a single tweet over the budget gets a batch of its own
+    """
+    batch_tweets: List[Dict] = []
+    payload: List[Dict] = []
+    # Opening and closing brackets of the array
+    used = 1
+
+    for tweet in tweets:
+        item = compact_tweet(len(payload) + 1, tweet, max_chars)
+        # Item plus its separating comma
+        cost = count_tokens(dumps_compact(item), model) + 1
+        if payload and (used + cost > token_budget or len(payload) >= max_tweets):
+            yield TweetBatch(batch_tweets, payload, used)
+            batch_tweets, payload, used = [], [], 1
+            item = compact_tweet(1, tweet, max_chars)
+        batch_tweets.append(tweet)
+        payload.append(item)
+        used += cost
+
+    if payload:
+        yield TweetBatch(batch_tweets, payload, used)
@@ -0,0 +1,482 @@
+# src/tweet_store.py
+
+from array import array
+from calendar import timegm
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Iterable, Optional, Sequence, Union
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Metric fields stored as int64 columns
+METRIC_FIELDS = ('retweet_count', 'reply_count', 'like_count', 'quote_count')
+
+# Metrics summed into total engagement
+ENGAGEMENT_FIELDS = ('retweet_count', 'reply_count', 'like_count')
+
+# Timestamp stored for tweets whose created_at cannot be parsed
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+
+def tweet_is_retweet(tweet: Dict) -> bool:
+    """Check if a tweet is a retweet, by its flags or an "RT @" prefix."""
+    return (
+        bool(tweet.get('is_retweet') or tweet.get('retweeted_status'))
+        or (tweet.get('text') or '').startswith('RT @')
+    )
+
+
+def tweet_is_reply(tweet: Dict) -> bool:
+    """Check if a tweet is a reply, by its flags or a leading mention."""
+    return (
+        bool(tweet.get('is_reply') or tweet.get('in_reply_to_user_id'))
+        or (tweet.get('text') or '').startswith('@')
+    )
+
+
+def parse_timestamp(created_at: str) -> int:
+    """
+    Convert created_at string to epoch seconds.
+
+    Args:
+        created_at: ISO 8601 timestamp, naive values are treated as UTC
+
+    Returns:
+        Epoch seconds or MISSING_TIMESTAMP if it cannot be parsed
+    """
+    try:
+        parsed = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        return timegm(parsed.utctimetuple())
+    except Exception:
+        return MISSING_TIMESTAMP
+
+
+def day_start(day: date) -> int:
+    """Get epoch seconds of midnight UTC for a date."""
+    return timegm(day.timetuple())
+
+
+def day_end(day: date) -> int:
+    """Get epoch seconds of the last second of a date (UTC)."""
+    return day_start(day + timedelta(days=1)) - 1
+
+
+class StringColumn(Sequence):
+    """Strings stored as one UTF-8 heap plus an offsets array."""
+
+    def __init__(self, heap: Union[bytes, bytearray, memoryview], offsets: np.ndarray):
+        """
+        Initialize column over an existing heap.
+
+        Args:
+            heap: Concatenated UTF-8 encoded strings
+            offsets: int64 array of n + 1 byte offsets into the heap
+        """
+        self.heap = heap
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> 'StringColumn':
+        """Build a column from Python strings."""
+        builder = StringColumnBuilder()
+        for value in strings:
+            builder.append(value)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return bytes(self.heap[start:end]).decode('utf-8')
+
+
+class StringColumnBuilder:
+    """Append-only builder for StringColumn."""
+
+    def __init__(self):
+        self.heap = bytearray()
+        self.offsets = array('q', [0])
+
+    def append(self, value: str):
+        """Append one string."""
+        self.heap += value.encode('utf-8')
+        self.offsets.append(len(self.heap))
+
+    def build(self) -> StringColumn:
+        """Finish the column without copying the heap."""
+        return StringColumn(self.heap, np.frombuffer(self.offsets, dtype=np.int64))
+
+
+class TweetStore(Sequence):
+    """
+    Columnar storage for tweets.
+
+    Metrics are int64 columns, created_at is parsed once into int64
+    epoch seconds and author_id is dictionary-encoded into int32 codes.
+    Statistics, filters and top-k selection run as vectorized operations
+    over row arrays. Indexing the store returns a tweet dictionary built
+    on demand, so it can still be passed wherever a list of tweets is
+    expected.
+
+    Only the fields of the tweet schema (id, text, created_at, author_id,
+    metrics and lang) are kept, plus is_retweet and is_reply flags
+    standing in for retweeted_status and in_reply_to_user_id.
+    """
+
+    def __init__(self,
+                 ids: Sequence[str],
+                 texts: Sequence[str],
+                 created_at: Sequence[str],
+                 timestamps: np.ndarray,
+                 author_codes: np.ndarray,
+                 author_names: Sequence[str],
+                 metrics: Dict[str, np.ndarray],
+                 lang_codes: Optional[np.ndarray] = None,
+                 lang_names: Optional[List[str]] = None,
+                 engagement: Optional[np.ndarray] = None,
+                 is_retweet: Optional[np.ndarray] = None,
+                 is_reply: Optional[np.ndarray] = None):
+        """
+        Initialize store from prepared columns.
+
+        Args:
+            ids: Tweet ids
+            texts: Tweet texts
+            created_at: Original created_at strings
+            timestamps: Epoch seconds per tweet (int64)
+            author_codes: Index into author_names per tweet (int32)
+            author_names: Author id for each code
+            metrics: Column per name in METRIC_FIELDS (int64)
+            lang_codes: Index into lang_names per tweet, -1 where the
+                tweet has no language (int16)
+            lang_names: Language for each code
+            engagement: Precomputed total engagement per tweet (int64)
+            is_retweet: Retweet flag per tweet (bool), none set if None
+            is_reply: Reply flag per tweet (bool), none set if None
+        """
+        self.ids = ids
+        self.texts = texts
+        self.created_at = created_at
+        self.timestamps = timestamps
+        self.author_codes = author_codes
+        self.author_names = author_names
+        self.metrics = metrics
+        self.lang_codes = lang_codes
+        self.lang_names = lang_names or []
+        if engagement is None:
+            engagement = sum(metrics[field] for field in ENGAGEMENT_FIELDS)
+        self.engagement = engagement
+        self.is_retweet = is_retweet if is_retweet is not None else np.zeros(len(ids), dtype=bool)
+        self.is_reply = is_reply if is_reply is not None else np.zeros(len(ids), dtype=bool)
+
+        self._authors: Optional[List[str]] = None
+        self._author_lookup: Optional[Dict[str, int]] = None
+        self._id_lookup: Optional[Dict[str, int]] = None
+
+    @property
+    def authors(self) -> List[str]:
+        """Sorted unique author ids."""
+        if self._authors is None:
+            self._authors = sorted(self.author_names)
+        return self._authors
+
+    def author_code(self, author_id: str) -> int:
+        """Get dictionary code of an author, -1 if unknown."""
+        if self._author_lookup is None:
+            self._author_lookup = {name: code for code, name in enumerate(self.author_names)}
+        return self._author_lookup.get(author_id, -1)
+
+    @classmethod
+    def from_tweets(cls, tweets: Iterable[Dict]) -> 'TweetStore':
+        """
+        Build a store from tweet dictionaries.
+
+        Args:
+            tweets: Tweets in the mock_tweets.json schema
+
+        Returns:
+            TweetStore with one row per tweet
+        """
+        builder = TweetStoreBuilder()
+        builder.extend(tweets)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(row, slice):
+            return [self.tweet(i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("tweet row out of range")
+        return self.tweet(row)
+
+    def tweet(self, row: int) -> Dict:
+        """
+        Build tweet dictionary for a row.
+
+        Args:
+            row: Row number
+
+        Returns:
+            Tweet dictionary in the mock_tweets.json schema
+        """
+        row = int(row)
+        tweet = {
+            "id": self.ids[row],
+            "text": self.texts[row],
+            "created_at": self.created_at[row],
+            "author_id": self.author_names[self.author_codes[row]],
+            "metrics": {
+                field: int(self.metrics[field][row]) for field in METRIC_FIELDS
+            }
+        }
+        if self.lang_codes is not None and self.lang_codes[row] >= 0:
+            tweet['lang'] = self.lang_names[self.lang_codes[row]]
+        if self.is_retweet[row]:
+            tweet['is_retweet'] = True
+        if self.is_reply[row]:
+            tweet['is_reply'] = True
+        return tweet
+
+    def tweets(self, rows: Iterable[int]) -> List[Dict]:
+        """Build tweet dictionaries for rows."""
+        return [self.tweet(row) for row in rows]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get numeric column by name.
+
+        Args:
+            name: 'engagement', 'timestamp' or one of METRIC_FIELDS
+
+        Returns:
+            Column array
+        """
+        if name == 'engagement':
+            return self.engagement
+        if name == 'timestamp':
+            return self.timestamps
+        return self.metrics[name]
+
+    def all_rows(self) -> np.ndarray:
+        """Get array of all row numbers."""
+        return np.arange(len(self), dtype=np.int64)
+
+    def author_rows(self, author_id: str) -> np.ndarray:
+        """Get rows of tweets posted by an author."""
+        code = self.author_code(author_id)
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        return np.nonzero(self.author_codes == code)[0]
+
+    def rows_for_ids(self, tweet_ids: Iterable[str]) -> np.ndarray:
+        """
+        Map tweet ids to rows, skipping unknown ids.
+
+        Args:
+            tweet_ids: Tweet ids
+
+        Returns:
+            Rows in the order of the given ids
+        """
+        if self._id_lookup is None:
+            self._id_lookup = {tweet_id: row for row, tweet_id in enumerate(self.ids)}
+        lookup = self._id_lookup
+        return np.array(
+            [lookup[tweet_id] for tweet_id in map(str, tweet_ids) if tweet_id in lookup],
+            dtype=np.int64
+        )
+
+    def filter_rows(self,
+                    rows: Optional[np.ndarray] = None,
+                    author_id: Optional[str] = None,
+                    date_from: Optional[date] = None,
+                    date_to: Optional[date] = None,
+                    min_engagement: int = 0) -> np.ndarray:
+        """
+        Filter rows by author, date range and engagement.
+
+        Args:
+            rows: Rows to filter, all rows if None
+            author_id: Keep tweets by this author only
+            date_from: Keep tweets posted on or after this date
+            date_to: Keep tweets posted on or before this date
+            min_engagement: Keep tweets with at least this total engagement
+
+        Returns:
+            Filtered rows, in input order
+        """
+        if rows is None:
+            rows = self.all_rows()
+        mask = np.ones(len(rows), dtype=bool)
+
+        if author_id is not None:
+            mask &= self.author_codes[rows] == self.author_code(author_id)
+
+        if date_from is not None or date_to is not None:
+            timestamps = self.timestamps[rows]
+            mask &= timestamps != MISSING_TIMESTAMP
+            if date_from is not None:
+                mask &= timestamps >= day_start(date_from)
+            if date_to is not None:
+                mask &= timestamps <= day_end(date_to)
+
+        if min_engagement:
+            mask &= self.engagement[rows] >= min_engagement
+
+        return rows[mask]
+
+    def top_k(self, rows: np.ndarray, k: int, column: str = 'engagement') -> np.ndarray:
+        """
+        Select rows with the largest values of a column.
+
+        Args:
+            rows: Candidate rows
+            k: Number of rows to select
+            column: Column to rank by
+
+        Returns:
+            Up to k rows, highest value first
+        """
+        if k <= 0 or not len(rows):
+            return rows[:0]
+        values = self.column(column)[rows]
+        if k < len(rows):
+            # Partition finds the k-th largest value, ties at the boundary
+            # are resolved by input order like a stable full sort would
+            kth_value = -np.partition(-values, k - 1)[k - 1]
+            above = np.nonzero(values > kth_value)[0]
+            ties = np.nonzero(values == kth_value)[0][:k - len(above)]
+            selected = np.concatenate([above, ties])
+        else:
+            selected = np.arange(len(rows))
+        order = selected[np.lexsort((selected, -values[selected]))]
+        return rows[order]
+
+    def sort_rows(self, rows: np.ndarray, column: str = 'engagement') -> np.ndarray:
+        """Sort rows by a column, highest value first."""
+        return rows[np.argsort(-self.column(column)[rows], kind='stable')]
+
+    def statistics(self, rows: np.ndarray, top_n: int = 5, sort_by: str = 'engagement') -> Dict:
+        """
+        Calculate engagement statistics for rows.
+
+        Args:
+            rows: Rows to summarize
+            top_n: Number of top rows to return
+            sort_by: Column used to pick top rows
+
+        Returns:
+            Dictionary with totals, average and top rows
+        """
+        if not len(rows):
+            return {
+                "total_tweets": 0,
+                "total_engagement": 0,
+                "avg_engagement": 0,
+                "top_rows": rows[:0]
+            }
+
+        total_engagement = int(self.engagement[rows].sum())
+        return {
+            "total_tweets": len(rows),
+            "total_engagement": total_engagement,
+            "avg_engagement": total_engagement / len(rows),
+            "top_rows": self.top_k(rows, top_n, sort_by)
+        }
+
+
+class TweetStoreBuilder:
+    """
+    Append-only builder for TweetStore.
+
+    Tweets are converted into compact columns as they are added, so a
+    corpus can be loaded in batches without keeping tweet dictionaries
+    around.
+    """
+
+    def __init__(self):
+        self.ids = StringColumnBuilder()
+        self.texts = StringColumnBuilder()
+        self.created_at = StringColumnBuilder()
+        self.timestamps = array('q')
+        self.author_codes = array('i')
+        self.lang_codes = array('h')
+        self.metrics = {field: array('q') for field in METRIC_FIELDS}
+        self.is_retweet = array('b')
+        self.is_reply = array('b')
+        self._author_lookup: Dict[str, int] = {}
+        self._lang_lookup: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def add(self, tweet: Dict) -> int:
+        """
+        Append one tweet.
+
+        Args:
+            tweet: Tweet in the mock_tweets.json schema
+
+        Returns:
+            Row number of the tweet
+        """
+        row = len(self.timestamps)
+        self.ids.append(str(tweet.get('id', '')))
+        self.texts.append(tweet.get('text') or '')
+        created_at = tweet.get('created_at') or ''
+        self.created_at.append(created_at)
+        self.timestamps.append(parse_timestamp(created_at))
+
+        author = str(tweet.get('author_id', ''))
+        self.author_codes.append(
+            self._author_lookup.setdefault(author, len(self._author_lookup))
+        )
+
+        lang = tweet.get('lang')
+        self.lang_codes.append(
+            -1 if lang is None
+            else self._lang_lookup.setdefault(lang, len(self._lang_lookup))
+        )
+
+        metrics = tweet.get('metrics') or {}
+        for field in METRIC_FIELDS:
+            self.metrics[field].append(int(metrics.get(field, 0) or 0))
+
+        self.is_retweet.append(tweet_is_retweet(tweet))
+        self.is_reply.append(tweet_is_reply(tweet))
+        return row
+
+    def extend(self, tweets: Iterable[Dict]):
+        """Append many tweets."""
+        for tweet in tweets:
+            self.add(tweet)
+
+    def build(self) -> TweetStore:
+        """Finish the store, reusing the accumulated buffers."""
+        has_langs = bool(self._lang_lookup)
+        return TweetStore(
+            ids=self.ids.build(),
+            texts=self.texts.build(),
+            created_at=self.created_at.build(),
+            timestamps=np.frombuffer(self.timestamps, dtype=np.int64),
+            author_codes=np.frombuffer(self.author_codes, dtype=np.int32),
+            author_names=list(self._author_lookup),
+            metrics={
+                field: np.frombuffer(values, dtype=np.int64)
+                for field, values in self.metrics.items()
+            },
+            lang_codes=np.frombuffer(self.lang_codes, dtype=np.int16) if has_langs else None,
+            lang_names=list(self._lang_lookup),
+            is_retweet=np.frombuffer(self.is_retweet, dtype=np.int8).astype(bool),
+            is_reply=np.frombuffer(self.is_reply, dtype=np.int8).astype(bool)
+        )
@@ -0,0 +1,205 @@
+# src/vector_index.py
+
+from typing import Dict, Iterable, List, Optional
+import logging
+import re
+import zlib
+import numpy as np
+from ranking import top_k_rows
+from search_index import InvertedIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIMENSIONS = 512
+
+# Rows weighted per step while building, bounds the float32 scratch matrix
+BUILD_CHUNK_ROWS = 8192
+
+# Punctuation around a word, e.g. "#web3," -> "web3"
+EDGE_PUNCTUATION = re.compile(r'^\W+|\W+$')
+
+
+def word_feature(token: str) -> str:
+    """Normalize a lowercased whitespace-free token, '' if nothing is left or it is a link."""
+    if token.startswith('http'):
+        return ''
+    return EDGE_PUNCTUATION.sub('', token)
+
+
+def feature_bucket(feature: str, dimensions: int) -> int:
+    """Hash a word into one of the vector dimensions."""
+    return zlib.crc32(feature.encode('utf-8')) % dimensions
+
+
+class VectorIndex:
+    """
+    Hashed TF-IDF vectors of tweet texts, one row per tweet.
+
+    Words are normalized (lowercased, punctuation around them stripped)
+    and hashed into a fixed number of dimensions, weighted by
+    1 + log(term frequency) times the inverse document frequency of
+    their dimension, and every row is L2-normalized. Rows are stored as
+    one float16 matrix, so scoring any set of candidates against a query
+    is a single matrix-vector product giving cosine similarities.
+    """
+
+    def __init__(self, matrix: np.ndarray, idf: np.ndarray):
+        """
+        Wrap prebuilt vectors.
+
+        Args:
+            matrix: Normalized rows, shape (tweets, dimensions)
+            idf: Inverse document frequency of every dimension
+        """
+        self.matrix = matrix
+        self.idf = idf
+        self.size, self.dimensions = matrix.shape
+
+    @classmethod
+    def from_index(cls, index: InvertedIndex, dimensions: int = DEFAULT_DIMENSIONS) -> 'VectorIndex':
+        """
+        Build vectors from the postings of an inverted index, without re-tokenizing.
+
+        Args:
+            index: Index over the tweets
+            dimensions: Number of hashed dimensions
+
+        Returns:
+            VectorIndex with a row per indexed tweet
+        """
+        vocabulary = index.vocab_blob[0:len(index.vocab_blob)].decode('utf-8').split('\n') if index.vocab_size else []
+        buckets = np.array([
+            feature_bucket(feature, dimensions) if feature else -1
+            for feature in map(word_feature, vocabulary)
+        ], dtype=np.int64)
+
+        # Postings are grouped by token; regroup them by tweet
+        token_ids = np.repeat(np.arange(index.vocab_size), np.diff(index.doc_offsets))
+        posting_buckets = buckets[token_ids]
+        keep = posting_buckets >= 0
+        docs = index.doc_ids[keep]
+        order = np.argsort(docs, kind='stable')
+        docs = docs[order]
+        posting_buckets = posting_buckets[keep][order]
+        term_freqs = np.diff(index.pos_offsets)[keep][order]
+
+        matrix = cls._counts(index.size, dimensions, docs, posting_buckets, term_freqs)
+        vectors = cls._weighted(matrix)
+        logger.info(f"Built vector index: {vectors.size} tweets, {dimensions} dimensions")
+        return vectors
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], dimensions: int = DEFAULT_DIMENSIONS) -> 'VectorIndex':
+        """
+        Build vectors by tokenizing texts the same way InvertedIndex does.
+
+        Args:
+            texts: Tweet texts in row order
+            dimensions: Number of hashed dimensions
+
+        Returns:
+            VectorIndex with a row per text
+        """
+        buckets: Dict[str, int] = {}
+        docs: List[int] = []
+        posting_buckets: List[int] = []
+        size = 0
+        for row, text in enumerate(texts):
+            size = row + 1
+            for token in text.lower().split():
+                bucket = buckets.get(token)
+                if bucket is None:
+                    feature = word_feature(token)
+                    bucket = buckets[token] = feature_bucket(feature, dimensions) if feature else -1
+                if bucket >= 0:
+                    docs.append(row)
+                    posting_buckets.append(bucket)
+
+        matrix = cls._counts(
+            size, dimensions,
+            np.array(docs, dtype=np.int64),
+            np.array(posting_buckets, dtype=np.int64),
+            np.ones(len(docs), dtype=np.int64)
+        )
+        return cls._weighted(matrix)
+
+    @staticmethod
+    def _counts(size: int,
+                dimensions: int,
+                docs: np.ndarray,
+                buckets: np.ndarray,
+                term_freqs: np.ndarray) -> np.ndarray:
+        """Sum term frequencies per (tweet, dimension); docs must be sorted."""
+        matrix = np.zeros((size, dimensions), dtype=np.float16)
+        for start in range(0, size, BUILD_CHUNK_ROWS):
+            end = min(start + BUILD_CHUNK_ROWS, size)
+            lo, hi = np.searchsorted(docs, [start, end])
+            cells = (docs[lo:hi] - start) * dimensions + buckets[lo:hi]
+            counts = np.bincount(cells, weights=term_freqs[lo:hi], minlength=(end - start) * dimensions)
+            matrix[start:end] = counts.reshape(end - start, dimensions)
+        return matrix
+
+    @classmethod
+    def _weighted(cls, matrix: np.ndarray) -> 'VectorIndex':
+        """Turn raw counts into normalized TF-IDF rows, in place."""
+        size, dimensions = matrix.shape
+        df = np.zeros(dimensions, dtype=np.int64)
+        for start in range(0, size, BUILD_CHUNK_ROWS):
+            df += np.count_nonzero(matrix[start:start + BUILD_CHUNK_ROWS], axis=0)
+        idf = (np.log((1 + size) / (1 + df)) + 1).astype(np.float32)
+
+        for start in range(0, size, BUILD_CHUNK_ROWS):
+            chunk = matrix[start:start + BUILD_CHUNK_ROWS].astype(np.float32)
+            present = chunk > 0
+            chunk[present] = 1 + np.log(chunk[present])
+            chunk *= idf
+            norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+            np.divide(chunk, norms, out=chunk, where=norms > 0)
+            matrix[start:start + BUILD_CHUNK_ROWS] = chunk
+        return cls(matrix, idf)
+
+    def query_vector(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        Vectorize query terms like a tweet.
+
+        Words are matched whole, so a term that only occurs inside longer
+        words (e.g. "crypto" in "cryptocurrency") adds nothing to the score.
+
+        Args:
+            terms: Keywords and phrases of the query
+
+        Returns:
+            Normalized float32 vector, all zeros if no term has a usable word
+        """
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for term in terms:
+            for token in term.lower().split():
+                feature = word_feature(token)
+                if feature:
+                    vector[feature_bucket(feature, self.dimensions)] += 1
+        present = vector > 0
+        vector[present] = (1 + np.log(vector[present])) * self.idf[present]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the given rows to a query vector."""
+        return self.matrix[rows].astype(np.float32) @ query
+
+    def top_k(self, rows: np.ndarray, query: np.ndarray, k: Optional[int]) -> np.ndarray:
+        """
+        Select the rows most similar to a query.
+
+        Args:
+            rows: Candidate rows
+            query: Vector from query_vector
+            k: Number of rows to select, all candidates if None
+
+        Returns:
+            Selected rows, best first; ties keep candidate order
+        """
+        rows = np.asarray(rows)
+        scores = self.scores(rows, query) if len(rows) else np.empty(0, dtype=np.float32)
+        return top_k_rows(rows, scores, k)